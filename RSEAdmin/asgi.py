@@ -0,0 +1,23 @@
+"""
+ASGI config for RSEAdmin project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+The time sheet AJAX views are async so are served without blocking a worker
+thread when the app is run by an ASGI server (e.g. uvicorn workers in gunicorn).
+
+For more information on this file, see
+https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+from django.urls import get_resolver
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "RSEAdmin.settings.production")
+
+application = get_asgi_application()
+
+# The URL configuration is otherwise imported on the first request from within the event loop, where the database
+# queries made by module level form definitions (e.g. the date ranges in rse.forms) are not permitted.
+get_resolver().url_patterns
@@ -0,0 +1,43 @@
+"""
+Middleware used by the production settings.
+
+WhiteNoiseMiddleware only supports synchronous requests. When the site is
+served by an ASGI server Django would therefore run the entire middleware chain
+(and every async view below it) in the single thread used for thread sensitive
+code, serialising all requests handled by a worker. The subclass below serves
+static files in the same way under both WSGI and ASGI.
+"""
+
+import asyncio
+
+from asgiref.sync import markcoroutinefunction, sync_to_async
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+
+class AsyncWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise middleware which can be used in both sync and async middleware chains.
+    Static files are found and opened in a worker thread when used in an async chain.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        if asyncio.iscoroutinefunction(self.get_response):
+            # mark the instance as a coroutine function so that Django does not adapt the next handler
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file, thread_sensitive=False)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve, thread_sensitive=False)(static_file, request)
+        return await self.get_response(request)
@@ -0,0 +1,106 @@
+"""
+Database routing for an optional read replica.
+
+Reporting views (which only read from the database) are marked with the
+read_replica decorator. Queries made by a marked view for a GET (or HEAD)
+request are routed to the DATABASE_REPLICA database if one is configured in
+DATABASES, all other queries (and all writes) use the default (primary)
+database. Replicas lag behind the primary so reads which must see a recent
+write stay on the primary:
+
+* once a request writes to the database all of its remaining reads are
+  routed to the primary.
+* ReplicaPinningMiddleware marks a client which has made a POST (or other
+  unsafe) request with a cookie for DATABASE_REPLICA_PIN_SECONDS, reads of
+  marked views use the primary while the cookie is present (e.g. viewing a
+  report after editing a time sheet).
+
+The decorator must be applied below login_required so that the session and
+user of the request are read from the primary.
+"""
+
+import contextvars
+import functools
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.http import HttpRequest, HttpResponse
+from django.utils.deprecation import MiddlewareMixin
+
+# Set while a view marked with read_replica is reading
+_use_replica = contextvars.ContextVar('use_replica', default=False)
+
+# Cookie used to pin clients to the primary after a write
+REPLICA_PIN_COOKIE = 'use_primary'
+
+
+def replica_configured() -> bool:
+    """ True if a read replica database is configured """
+    return settings.DATABASE_REPLICA in settings.DATABASES
+
+
+class ReadReplicaRouter:
+    """
+    Routes reads of views marked with read_replica to the replica database and everything else to the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        if _use_replica.get() and replica_configured():
+            return settings.DATABASE_REPLICA
+        return None
+
+    def db_for_write(self, model, **hints):
+        # read after write: the remainder of the request reads from the primary
+        _use_replica.set(False)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # the replica holds the same data as the primary
+        return True
+
+
+def _replica_content(content):
+    """ Iterates streamed content (which is generated after the view returns) reading from the replica """
+    content = iter(content)
+    while True:
+        token = _use_replica.set(True)
+        try:
+            chunk = next(content)
+        except StopIteration:
+            return
+        finally:
+            _use_replica.reset(token)
+        yield chunk
+
+
+def read_replica(view):
+    """
+    View decorator which routes the reads of GET and HEAD requests to the read replica (if configured).
+    Requests from clients which have recently written (see ReplicaPinningMiddleware) read from the primary.
+    """
+    @functools.wraps(view)
+    def wrapped_view(request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        if request.method not in ('GET', 'HEAD') or REPLICA_PIN_COOKIE in request.COOKIES or not replica_configured():
+            return view(request, *args, **kwargs)
+
+        token = _use_replica.set(True)
+        try:
+            response = view(request, *args, **kwargs)
+        finally:
+            _use_replica.reset(token)
+        if response.streaming:
+            response.streaming_content = _replica_content(response.streaming_content)
+        return response
+    return wrapped_view
+
+
+class ReplicaPinningMiddleware(MiddlewareMixin):
+    """
+    Sets a cookie on the responses to unsafe (i.e. writing) requests so that the client reads from the primary database
+    for DATABASE_REPLICA_PIN_SECONDS (the longest expected replication lag).
+    """
+
+    def process_response(self, request: HttpRequest, response: HttpResponse) -> HttpResponse:
+        if request.method not in ('GET', 'HEAD', 'OPTIONS', 'TRACE') and replica_configured():
+            response.set_cookie(REPLICA_PIN_COOKIE, '1', max_age=settings.DATABASE_REPLICA_PIN_SECONDS, httponly=True, samesite='Lax')
+        return response
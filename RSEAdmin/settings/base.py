@@ -48,6 +48,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'RSEAdmin.routers.ReplicaPinningMiddleware',
 ]
 
 ROOT_URLCONF = 'RSEAdmin.urls'
@@ -76,6 +77,8 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'RSEAdmin.wsgi.application'
 
+ASGI_APPLICATION = 'RSEAdmin.asgi.application'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/1.11/ref/settings/#auth-password-validators
@@ -123,9 +126,15 @@ USE_TZ = True
 # Working hours per day (37 hour work week)
 WORKING_HOURS_PER_DAY = 7.4
 
+# Maximum number of threads (and so database connections) per ASGI worker used by the async time sheet views
+ASYNC_DATABASE_THREADS = 16
+
 # 1.35 is 35% which is estimated (as 12% NI, 22.5% pension contribution and 0.5% appreticeship levy)
 ONCOSTS_SALARY_MULTIPLIER = 1.35
 
+# 1.03 is 3% inflation applied to the salaries of future financial years which have no salary data
+ESTIMATED_SALARY_INFLATION_MULTIPLIER = 1.03
+
 
 ###############################
 # RSEAdmin required setttings #
@@ -134,6 +143,32 @@ ONCOSTS_SALARY_MULTIPLIER = 1.35
 # Working days per year (TRAC Days)
 WORKING_DAYS_PER_YEAR = 220
 
+# Working days are counted from a calendar which excludes weekend days (0 is Monday) and institutional closures. Closures
+# are dates or (first date, last date) tuples, e.g. [date(2020, 12, 25), (date(2020, 12, 28), date(2021, 1, 1))]. Each
+# working day is weighted so that a calendar year has WORKING_DAYS_PER_YEAR. Dates outside of the calendar years use
+# the average rate of WORKING_DAYS_PER_YEAR per 365 days.
+WEEKEND_DAYS = (5, 6)
+INSTITUTIONAL_CLOSURES = []
+WORKING_DAY_CALENDAR_YEARS = (2000, 2060)
+
+# Month in which the financial year starts (1st August)
+FINANCIAL_YEAR_START_MONTH = 8
+
+# Number of months that the capacity forecast API covers by default
+CAPACITY_FORECAST_MONTHS = 18
+
+# Maximum number of months that can be requested from the capacity forecast API
+CAPACITY_FORECAST_MAX_MONTHS = 60
+
+# Seconds that RSE commitment summaries are cached for (summaries are versioned so are never stale)
+COMMITMENT_SUMMARY_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Seconds that RSE dashboards are cached for (dashboards are versioned by the RSEs allocations and the date)
+RSE_DASHBOARD_CACHE_TIMEOUT = 60 * 60
+
+# Maximum number of points plotted for each RSE on the team commitment graph (peaks are always kept)
+COMMITMENT_GRAPH_RESOLUTION = 300
+
 # Number of items to show in lists such as starting soon
 HOME_PAGE_NUMBER_ITEMS = 7
 
@@ -150,4 +185,18 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # When true allocations can only be made within the projects start and end date
 # When false allocations can be at any point in time against the project
-STRICT_ALLOCATIONS = False
\ No newline at end of file
+STRICT_ALLOCATIONS = False
+
+# Allocations which would take an RSE above this percentage FTE (on funded projects) are rejected
+# Set to None to allow over allocation
+MAX_ALLOCATION_PERCENTAGE = 100
+
+# Soft deleted allocations are moved to the archive table by the archive_allocations command after this many days
+ALLOCATION_ARCHIVE_DAYS = 365
+
+# Reads of reporting views are routed to this database if it is configured in DATABASES (see RSEAdmin/routers.py)
+DATABASE_ROUTERS = ['RSEAdmin.routers.ReadReplicaRouter']
+DATABASE_REPLICA = 'replica'
+
+# Seconds after a write (i.e. a POST request) that a client reads from the primary database rather than the replica
+DATABASE_REPLICA_PIN_SECONDS = 10
\ No newline at end of file
@@ -44,6 +44,12 @@ else:
             'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
         }
     }
+
+# Optional read replica (see RSEAdmin/routers.py). Replication can be tested locally with a copy of the SQLite database
+# e.g. DATABASE_REPLICA_NAME=db-replica.sqlite3 (the copy is not updated so writes will not be seen by reporting views)
+DATABASE_REPLICA_NAME = os.getenv('DATABASE_REPLICA_NAME')
+if DATABASE_REPLICA_NAME is not None:
+    DATABASES[DATABASE_REPLICA] = dict(DATABASES['default'], NAME=os.path.join(BASE_DIR, DATABASE_REPLICA_NAME), TEST={'MIRROR': 'default'})
     
 
 # Static files (CSS, JavaScript, Images)
@@ -0,0 +1,117 @@
+"""
+Django settings for a containerised PRODUCTION deployment.
+
+The app is served by gunicorn (see gunicorn.conf.py) with static files served
+compressed and content hashed by WhiteNoise. All secrets and deployment
+specific values are read from environment variables.
+"""
+
+from .base import *
+
+import os
+from django.core.exceptions import ImproperlyConfigured
+
+
+def get_env(setting, default=None):
+    """Get an environment setting or fail with ImproperlyConfigured if there is no default"""
+    value = os.getenv(setting, default)
+    if value is None:
+        raise ImproperlyConfigured("Set the {} environment variable".format(setting))
+    return value
+
+
+SECRET_KEY = get_env('SECRET_KEY')
+
+DEBUG = TEMPLATE_DEBUG = False
+
+# Comma separated list of host names
+ALLOWED_HOSTS = [host.strip() for host in get_env('ALLOWED_HOSTS').split(',') if host.strip()]
+
+
+# Database
+# Connections are kept open between requests (CONN_MAX_AGE) so each gunicorn
+# thread reuses a connection rather than reconnecting for every request.
+# CONN_HEALTH_CHECKS (Django 4.1+) checks a persistent connection is usable
+# before it is reused; it is ignored by older versions of Django.
+DATABASE_ENGINE = get_env('DATABASE_ENGINE', 'postgresql')
+DATABASE_NAME = get_env('DATABASE_NAME', 'django')
+
+DATABASES = {
+    'default': {
+        'ENGINE': f'django.db.backends.{DATABASE_ENGINE}',
+        'NAME': DATABASE_NAME,
+        'USER': get_env('DATABASE_USER', 'django'),
+        'PASSWORD': get_env('DATABASE_PASSWORD'),
+        'HOST': get_env('DATABASE_HOST', 'localhost'),
+        'PORT': int(get_env('DATABASE_PORT', '5432')),
+        'CONN_MAX_AGE': int(get_env('DATABASE_CONN_MAX_AGE', '600')),
+        'CONN_HEALTH_CHECKS': True,
+    }
+}
+
+if DATABASE_ENGINE == 'postgresql':
+    DATABASES['default']['OPTIONS'] = {'connect_timeout': 10}
+
+# Optional read replica of the default database (see RSEAdmin/routers.py).
+# Reporting views read from the replica if DATABASE_REPLICA_HOST is set.
+DATABASE_REPLICA_HOST = os.getenv('DATABASE_REPLICA_HOST')
+if DATABASE_REPLICA_HOST:
+    DATABASES[DATABASE_REPLICA] = dict(DATABASES['default'], HOST=DATABASE_REPLICA_HOST,
+                                       PORT=int(get_env('DATABASE_REPLICA_PORT', str(DATABASES['default']['PORT']))),
+                                       TEST={'MIRROR': 'default'})
+
+
+# Static files (CSS, JavaScript, Images)
+# WhiteNoise serves static files directly from gunicorn. Collected files are
+# given content hashed names and pre-compressed (gzip and, if the brotli
+# package is installed, brotli) by collectstatic. Hashed files are served with
+# far future, immutable cache headers so repeat page loads do not request them.
+# The async capable subclass of the WhiteNoise middleware is used so that ASGI
+# requests are not forced through Django's single thread sensitive thread.
+MIDDLEWARE.insert(MIDDLEWARE.index('django.middleware.security.SecurityMiddleware') + 1,
+                  'RSEAdmin.middleware.AsyncWhiteNoiseMiddleware')
+
+# ETags for pages so unchanged pages are answered with 304 Not Modified
+MIDDLEWARE.append('django.middleware.http.ConditionalGetMiddleware')
+
+STATIC_URL = '/static/'
+
+STATIC_ROOT = os.path.join(BASE_DIR, 'static-root')
+
+STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+
+# Only collect static files referenced by the templates (and their stylesheet dependencies)
+STATICFILES_FINDERS = ['RSEAdmin.staticfiles.ReferencedStaticFinder']
+
+# Files which are only referenced from javascript so are always collected (fnmatch patterns)
+STATICFILES_ALWAYS_COLLECT = [
+    'admin/img/*',
+    'admin/js/*',
+]
+
+# Templates only reference the hashed file names so the originals are not kept
+WHITENOISE_KEEP_ONLY_HASHED_FILES = True
+
+
+# Security
+# The app is expected to sit behind a TLS terminating proxy which sets X-Forwarded-Proto
+SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
+SECURE_SSL_REDIRECT = get_env('SECURE_SSL_REDIRECT', 'True') == 'True'
+SESSION_COOKIE_SECURE = SECURE_SSL_REDIRECT
+CSRF_COOKIE_SECURE = SECURE_SSL_REDIRECT
+
+
+# Logging (errors to the container log)
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'root': {
+        'handlers': ['console'],
+        'level': get_env('DJANGO_LOG_LEVEL', 'WARNING'),
+    },
+}
@@ -0,0 +1,111 @@
+"""
+Static file finder which only collects the static assets that are used by the site.
+
+Used by the production settings so that collectstatic (and the hashing and
+compression of the collected files) only processes files referenced with the
+{% static %} tag in a template, plus any files those stylesheets depend on
+(fonts and images referenced by url() or @import). Unused builds, themes and
+image sets shipped with the third party libraries are not collected.
+"""
+
+import fnmatch
+import os
+import posixpath
+import re
+from typing import Iterable, Set
+
+from django.conf import settings
+from django.contrib.staticfiles.finders import AppDirectoriesFinder, BaseFinder, FileSystemFinder
+from django.template import engines
+
+# {% static 'path' %} or {% static "path" %} (variable paths can not be resolved)
+STATIC_TAG_RE = re.compile(r"""\{%\s*static\s+(['"])(?P<path>[^'"]+)\1""")
+
+# CSS url(...) and @import "..." references
+CSS_URL_RE = re.compile(r"""url\(\s*(['"]?)(?P<path>[^'")]+)\1\s*\)""")
+CSS_IMPORT_RE = re.compile(r"""@import\s+(['"])(?P<path>[^'"]+)\1""")
+
+
+def template_static_paths() -> Set[str]:
+    """ Returns the set of static paths referenced with the static tag in any template (project and app templates) """
+    paths = set()
+    for engine in engines.all():
+        for template_dir in getattr(engine, 'template_dirs', ()):
+            for root, _, files in os.walk(template_dir):
+                for name in files:
+                    if not name.endswith(('.html', '.txt', '.js')):
+                        continue
+                    with open(os.path.join(root, name), encoding='utf-8', errors='ignore') as f:
+                        paths.update(m.group('path') for m in STATIC_TAG_RE.finditer(f.read()))
+    return paths
+
+
+def css_dependencies(path: str, content: str) -> Set[str]:
+    """ Returns the static paths of any (relative) files referenced by a stylesheet """
+    dependencies = set()
+    for regex in (CSS_URL_RE, CSS_IMPORT_RE):
+        for match in regex.finditer(content):
+            url = match.group('path').strip()
+            # ignore data uris, absolute urls and fragment only references
+            if url.startswith(('data:', 'http:', 'https:', '//', '/', '#')):
+                continue
+            url = url.split('#')[0].split('?')[0]
+            if url:
+                dependencies.add(posixpath.normpath(posixpath.join(posixpath.dirname(path), url)))
+    return dependencies
+
+
+class ReferencedStaticFinder(BaseFinder):
+    """
+    Finder which wraps the default file system and app directory finders.
+    find() behaves exactly as the default finders (so any file can still be served in development) but list(),
+    which is used by collectstatic, only returns files which are referenced by the site templates.
+    Additional paths (e.g. files referenced only from javascript) can be included using fnmatch patterns in the
+    STATICFILES_ALWAYS_COLLECT setting.
+    """
+
+    def __init__(self, app_names=None, *args, **kwargs):
+        self.finders = [FileSystemFinder(app_names, *args, **kwargs), AppDirectoriesFinder(app_names, *args, **kwargs)]
+
+    def check(self, **kwargs):
+        errors = []
+        for finder in self.finders:
+            errors.extend(finder.check(**kwargs))
+        return errors
+
+    def find(self, path, all=False):
+        matches = []
+        for finder in self.finders:
+            result = finder.find(path, all=all)
+            if not all and result:
+                return result
+            if result:
+                matches.extend(result if isinstance(result, (list, tuple)) else [result])
+        return matches
+
+    def referenced_paths(self) -> Set[str]:
+        """ Returns all template referenced paths and (recursively) the files they depend on """
+        referenced = set()
+        pending = list(template_static_paths())
+        while pending:
+            path = pending.pop()
+            if path in referenced:
+                continue
+            referenced.add(path)
+            if path.endswith('.css'):
+                absolute_path = self.find(path)
+                if absolute_path:
+                    with open(absolute_path, encoding='utf-8', errors='ignore') as f:
+                        pending.extend(css_dependencies(path, f.read()))
+        return referenced
+
+    def list(self, ignore_patterns) -> Iterable:
+        referenced = self.referenced_paths()
+        always_collect = getattr(settings, 'STATICFILES_ALWAYS_COLLECT', [])
+        for finder in self.finders:
+            for path, storage in finder.list(ignore_patterns):
+                prefix = getattr(storage, 'prefix', None)
+                static_path = posixpath.join(prefix, path) if prefix else path
+                static_path = static_path.replace(os.sep, '/')
+                if static_path in referenced or any(fnmatch.fnmatch(static_path, p) for p in always_collect):
+                    yield path, storage
@@ -0,0 +1,41 @@
+"""
+gunicorn configuration for the production deployment (see RSEAdmin/settings/production.py).
+
+gunicorn loads this file automatically when started from the repository root.
+All values can be overridden with environment variables of the same name (in
+upper case) prefixed with GUNICORN_.
+"""
+
+import multiprocessing
+import os
+
+# WSGI by default. For the ASGI app (async time sheet views) set
+# GUNICORN_APP=RSEAdmin.asgi:application and
+# GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker
+wsgi_app = os.getenv('GUNICORN_APP', 'RSEAdmin.wsgi:application')
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8080')
+
+# Pre-fork worker processes. Views are mostly waiting on the database so each
+# worker also runs a small pool of threads (gthread worker class). Threads are
+# ignored by the uvicorn (ASGI) worker which runs an event loop per worker.
+workers = int(os.getenv('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+
+# The app is not preloaded in the master as importing the forms queries the
+# database and the connection must not be shared between forked workers
+preload_app = False
+
+# Recycle workers periodically (jittered so they do not all restart together)
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '1000'))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', '100'))
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '60'))
+graceful_timeout = 30
+keepalive = 5
+
+# Log to the container output
+accesslog = '-'
+errorlog = '-'
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
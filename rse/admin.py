@@ -5,5 +5,10 @@ from .models import *
 
 admin.site.register(Client)
 admin.site.register(RSE)
+admin.site.register(FinancialYear)
+admin.site.register(SalaryBand)
+admin.site.register(SalaryGradeChange)
 admin.site.register(DirectlyIncurredProject)
 admin.site.register(RSEAllocation)
+admin.site.register(ArchivedRSEAllocation)
+admin.site.register(UtilisationRollup)
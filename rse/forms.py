@@ -1,8 +1,10 @@
 from django import forms
 from datetime import datetime, timedelta
+from dateutil.relativedelta import relativedelta
 from django.contrib.auth.forms import UserCreationForm, UserChangeForm
 from django.core.validators import RegexValidator
 from django.conf import settings
+from django.utils import timezone
 
 from .models import *
 
@@ -110,6 +112,86 @@ class FilterProjectForm(FilterDateRangeForm):
     # type = forms.ChoiceField(choices = (('A', 'All'), ('F', 'Allocated'), ('S', 'Service')), widget=forms.Select(attrs={'class': 'form-control pull-right'}))
 
 
+def project_statuses(status: str) -> List[str]:
+    """
+    Project statuses selected by the status choice of a FilterProjectForm: a single status (P, R, F or X), L (funded and
+    review), U (funded, review and preparation) or A (all).
+    """
+    if status and status in 'PRFX':
+        return [status]
+    elif status == 'L':
+        return [Project.FUNDED, Project.REVIEW]
+    elif status == 'U':
+        return [Project.FUNDED, Project.REVIEW, Project.PREPARATION]
+    return Project.status_choice_keys()
+
+
+class CommitmentFilterForm(FilterProjectForm):
+    """
+    Filter form for the team commitment view.
+    Extends the project filter form (date range and status) by adding the maximum number of points plotted for each RSE
+    on the commitment graph (the default is the COMMITMENT_GRAPH_RESOLUTION setting).
+    """
+    resolution = forms.IntegerField(required=False, min_value=10, max_value=5000,
+                                    widget=forms.NumberInput(attrs={'class': 'form-control', 'placeholder': settings.COMMITMENT_GRAPH_RESOLUTION}))
+
+
+class AvailableRSEsForm(FilterProjectForm):
+    """
+    Search form for finding RSEs with free capacity.
+    Extends the project filter form (date range and status) by adding the required FTE percentage.
+    """
+    percentage = forms.FloatField(min_value=0, max_value=100, initial=50,
+                                  widget=forms.NumberInput(attrs={'class': 'form-control'}))
+
+
+class UtilisationFilterForm(FilterDateRangeForm):
+    """
+    Filter form for the team utilisation report.
+    Extends the filter range form by adding a status field to select funded only or pipeline utilisation.
+    """
+    status = forms.ChoiceField(
+        choices=UtilisationRollup.STATUS_CHOICES,
+        widget=forms.Select(attrs={'class': 'form-control pull-right'}))
+
+
+class CapacityForecastForm(forms.Form):
+    """
+    Query parameters of the capacity forecast API (dates in the format YYYY-MM-DD).
+    The until date is not included in the forecast. Dates default to today and CAPACITY_FORECAST_MONTHS from the from
+    date and the forecast can cover at most CAPACITY_FORECAST_MAX_MONTHS (as a value is calculated per RSE per day).
+    """
+    from_date = forms.DateField(required=False)
+    until_date = forms.DateField(required=False)
+    granularity = forms.ChoiceField(choices=CapacityForecast.GRANULARITY_CHOICES, required=False)
+    status = forms.ChoiceField(
+        choices=(
+            ('U', 'Funded, Review and in Preparation'),
+            ('A', 'All'),
+            ('L', 'Funded and Review')) +
+            Project.STATUS_CHOICES,
+        required=False)
+
+    def clean(self):
+        cleaned_data = super(CapacityForecastForm, self).clean()
+        if 'from_date' not in cleaned_data or 'until_date' not in cleaned_data:
+            return cleaned_data # invalid dates
+
+        from_date = cleaned_data['from_date'] or timezone.now().date()
+        try:
+            until_date = cleaned_data['until_date'] or from_date + relativedelta(months=settings.CAPACITY_FORECAST_MONTHS)
+            max_until_date = from_date + relativedelta(months=settings.CAPACITY_FORECAST_MAX_MONTHS)
+        except (OverflowError, ValueError):
+            raise ValidationError({'from_date': 'Forecast from date is out of range'})
+        if until_date <= from_date:
+            raise ValidationError({'until_date': 'Forecast until date must be after the from date'})
+        if until_date > max_until_date:
+            raise ValidationError({'until_date': f'Forecast can not cover more than {settings.CAPACITY_FORECAST_MAX_MONTHS} months'})
+        cleaned_data['from_date'] = from_date
+        cleaned_data['until_date'] = until_date
+        return cleaned_data
+
+
 class ProjectsFilterForm(forms.Form):
     """
     Class represents a filter form for filtering by project type, funding status and schedule
@@ -164,6 +246,9 @@ class ProjectAllocationForm(forms.ModelForm):
         # call super
         super(ProjectAllocationForm, self).__init__(*args, **kwargs)
 
+        # RSE choices are displayed by name so load users in the same query
+        self.fields['rse'].queryset = RSE.objects.select_related('user')
+
         # do stuff with project to set the initial data
         self.fields['percentage'].initial = self.project.fte
         self.fields['start'].initial = datetime.strftime(self.project.start, "%d/%m/%Y")
@@ -215,6 +300,23 @@ class ProjectAllocationForm(forms.ModelForm):
             if cleaned_data['end'] < self.project.start:
                 errors['end'] = ('Allocation end date can not be before the start date of the project')
 
+        # Check that the allocation does not take the RSE over the maximum percentage FTE (considering funded projects and this project)
+        if not errors and settings.MAX_ALLOCATION_PERCENTAGE is not None and cleaned_data.get('rse') and cleaned_data.get('percentage') is not None:
+            rse = cleaned_data['rse']
+            start = cleaned_data['start']
+            end = cleaned_data['end']
+            existing = RSEAllocation.objects.filter(Q(project__status=Project.FUNDED) | Q(project=self.project), rse=rse, start__lt=end, end__gt=start)
+            if self.instance.pk:
+                existing = existing.exclude(pk=self.instance.pk)
+            # limit existing allocations to the dates of this allocation (over allocations outside of it are not caused by it)
+            allocations = [(rse.id, max(s, start), min(e, end), p) for _, s, e, p in existing.values_list('rse_id', 'start', 'end', 'percentage')]
+            allocations.append((rse.id, start, end, cleaned_data['percentage']))
+            over = RSEAllocation.over_allocations(allocations, settings.MAX_ALLOCATION_PERCENTAGE).get(rse.id)
+            if over:
+                peak = max(p for _, _, p in over)
+                periods = ', '.join(f"{f:%d/%m/%Y} until {u:%d/%m/%Y}" for f, u, _ in over)
+                errors['percentage'] = (f'Allocation would commit {rse} to a peak of {peak:g}% FTE (more than {settings.MAX_ALLOCATION_PERCENTAGE:g}%) from {periods}')
+
         if errors:
             raise ValidationError(errors)
 
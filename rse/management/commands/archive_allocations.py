@@ -0,0 +1,30 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from rse.models import ArchivedRSEAllocation
+
+
+class Command(BaseCommand):
+    """
+    Moves allocations which were soft deleted more than ALLOCATION_ARCHIVE_DAYS ago into the archive table so that the
+    live allocation table stays small. Intended to be run periodically from cron, e.g.
+
+        0 4 * * 0 python manage.py archive_allocations
+
+    Allocations are archived in batches (each in a single transaction) so the command is safe to run while the site is in use.
+    """
+    help = 'Archives allocations which were soft deleted more than ALLOCATION_ARCHIVE_DAYS ago'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.ALLOCATION_ARCHIVE_DAYS,
+                            help=f'Archive allocations deleted more than this many days ago. Defaults to {settings.ALLOCATION_ARCHIVE_DAYS}.')
+
+    def handle(self, *args, **options):
+        if options['days'] < 0:
+            raise CommandError('--days can not be negative')
+
+        count = ArchivedRSEAllocation.archive(timezone.now() - timedelta(days=options['days']))
+        self.stdout.write(self.style.SUCCESS(f'Archived {count} deleted allocations'))
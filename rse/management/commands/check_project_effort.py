@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from rse.models import Project
+
+
+class Command(BaseCommand):
+    """
+    Checks the stored project days and committed days of each project against its allocations.
+    Stored values are maintained when projects and allocations are saved but may become inconsistent if the database is
+    modified directly (e.g. loading fixtures or bulk updates). Intended to be run periodically from cron, e.g.
+
+        0 3 * * 0 python manage.py check_project_effort --fix
+
+    The command exits with an error if any project is inconsistent (and --fix is not given).
+    """
+    help = 'Checks (and optionally fixes) the stored project days and committed days of each project'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', help='Replace inconsistent stored values with the recomputed values.')
+
+    def handle(self, *args, **options):
+        inconsistent = Project.check_effort(fix=options['fix'])
+        for p, project_days, committed_days in inconsistent:
+            self.stdout.write(f"{p} (id {p.id}): stored project days {p.project_days:.2f} (expected {project_days:.2f}), "
+                              f"stored committed days {p.committed_days:.2f} (expected {committed_days:.2f})")
+
+        if not inconsistent:
+            self.stdout.write(self.style.SUCCESS('All projects are consistent'))
+        elif options['fix']:
+            self.stdout.write(self.style.SUCCESS(f'Fixed {len(inconsistent)} inconsistent projects'))
+        else:
+            raise CommandError(f'{len(inconsistent)} projects are inconsistent (use --fix to update them)')
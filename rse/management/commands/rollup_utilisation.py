@@ -0,0 +1,41 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from rse.models import UtilisationRollup
+
+
+class Command(BaseCommand):
+    """
+    Rebuilds the monthly utilisation rollups used by the team utilisation report.
+    Intended to be run nightly from cron, e.g.
+
+        0 2 * * * python manage.py rollup_utilisation
+
+    Rollups are replaced in a single transaction so the command is safe to re-run (or to run while the site is in use).
+    """
+    help = 'Recomputes the per RSE and team monthly utilisation rollups'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='from_month', help='First month to roll up (YYYY-MM). Defaults to the first allocation.')
+        parser.add_argument('--until', dest='until_month', help='Last month to roll up (YYYY-MM). Defaults to the last allocation.')
+
+    def handle(self, *args, **options):
+        from_month = self.parse_month(options['from_month'])
+        until_month = self.parse_month(options['until_month'])
+        if (from_month is None) != (until_month is None):
+            raise CommandError('Both --from and --until must be provided to roll up a range of months')
+        if from_month and until_month < from_month:
+            raise CommandError('--until can not be earlier than --from')
+
+        count = UtilisationRollup.rebuild(from_month, until_month)
+        self.stdout.write(self.style.SUCCESS(f'Saved {count} utilisation rollups'))
+
+    @staticmethod
+    def parse_month(value):
+        if value is None:
+            return None
+        try:
+            return datetime.strptime(value, '%Y-%m').date()
+        except ValueError:
+            raise CommandError(f"Month '{value}' is not in the format YYYY-MM")
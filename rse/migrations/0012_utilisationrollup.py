@@ -0,0 +1,31 @@
+# Generated by Django 3.2.17 on 2026-10-19 03:57
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rse', '0011_alter_rse_employed_until'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UtilisationRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('status', models.CharField(choices=[('F', 'Funded'), ('U', 'Funded, Review and in Preparation')], max_length=1)),
+                ('allocated_days', models.FloatField()),
+                ('available_days', models.FloatField()),
+                ('computed', models.DateTimeField(default=django.utils.timezone.now)),
+                ('rse', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='rse.rse')),
+            ],
+            options={
+                'ordering': ['month'],
+                'unique_together': {('rse', 'month', 'status')},
+            },
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 3.2.17 on 2026-10-19 04:20
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rse', '0012_utilisationrollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='modified',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
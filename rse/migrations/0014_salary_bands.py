@@ -0,0 +1,50 @@
+# Generated by Django 3.2.17 on 2026-10-19 04:06
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rse', '0013_project_modified'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FinancialYear',
+            fields=[
+                ('year', models.IntegerField(primary_key=True, serialize=False)),
+            ],
+            options={
+                'ordering': ['year'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SalaryBand',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('grade', models.IntegerField(default=1)),
+                ('grade_point', models.IntegerField(default=1)),
+                ('salary', models.DecimalField(decimal_places=2, max_digits=8)),
+                ('increments', models.BooleanField(default=True)),
+                ('year', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='rse.financialyear')),
+            ],
+            options={
+                'ordering': ['year', 'grade', 'grade_point'],
+                'unique_together': {('grade', 'grade_point', 'year')},
+            },
+        ),
+        migrations.CreateModel(
+            name='SalaryGradeChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('rse', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='rse.rse')),
+                ('salary_band', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='rse.salaryband')),
+            ],
+            options={
+                'ordering': ['date'],
+            },
+        ),
+    ]
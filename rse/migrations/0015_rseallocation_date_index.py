@@ -0,0 +1,17 @@
+# Generated by Django 3.2.17 on 2026-10-19 04:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rse', '0014_salary_bands'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='rseallocation',
+            index=models.Index(fields=['start', 'end'], name='rse_rseallo_start_5e3cc8_idx'),
+        ),
+    ]
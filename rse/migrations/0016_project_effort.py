@@ -0,0 +1,40 @@
+# Generated by Django 3.2.17 on 2026-10-19 04:17
+# Modified by hand to populate the stored effort of existing projects
+
+from collections import defaultdict
+from django.db import migrations, models
+
+def set_project_effort(apps, schema_editor):
+    Project = apps.get_model('rse', 'Project')
+    DirectlyIncurredProject = apps.get_model('rse', 'DirectlyIncurredProject')
+    RSEAllocation = apps.get_model('rse', 'RSEAllocation')
+    project_days = {p.id: (p.end - p.start).days * p.percentage / 100.0 for p in DirectlyIncurredProject.objects.all()}
+    committed_days = defaultdict(float)
+    for project_id, start, end, percentage in RSEAllocation.objects.filter(deleted_date__isnull=True).values_list('project_id', 'start', 'end', 'percentage'):
+        committed_days[project_id] += (end - start).days * percentage / 100.0
+    projects = list(Project.objects.all())
+    for p in projects:
+        p.project_days = project_days.get(p.id, 0)
+        p.committed_days = committed_days[p.id]
+    Project.objects.bulk_update(projects, ['project_days', 'committed_days'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rse', '0015_rseallocation_date_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='committed_days',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='project_days',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.RunPython(set_project_effort, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 3.2.17 on 2026-10-19 04:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rse', '0016_project_effort'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedRSEAllocation',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('percentage', models.FloatField()),
+                ('start', models.DateField()),
+                ('end', models.DateField()),
+                ('created_date', models.DateTimeField()),
+                ('deleted_date', models.DateTimeField()),
+                ('archived_date', models.DateTimeField(default=django.utils.timezone.now)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='rse.project')),
+                ('rse', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='rse.rse')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='archivedrseallocation',
+            index=models.Index(fields=['deleted_date'], name='rse_archive_deleted_abf3b3_idx'),
+        ),
+    ]
@@ -2,20 +2,26 @@ from __future__ import annotations
 from datetime import datetime, date, timedelta
 from django.utils import timezone
 from math import floor
-from typing import Optional, Dict
+from typing import Optional, Dict, List, Tuple
 from decimal import Decimal
 from django.contrib.auth.models import User
 from django.core.exceptions import ObjectDoesNotExist, ValidationError
 from django.db.utils import OperationalError, ProgrammingError
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
 from django.utils.translation import ugettext_lazy as _
 from polymorphic.models import PolymorphicModel
-from django.db.models import Max, Min, QuerySet
+from django.db.models import Count, Max, Min, Q, QuerySet, F, Case, When, Value, FloatField, Sum
 from typing import Iterator, Union, TypeVar, Generic
 import itertools as it
 from copy import deepcopy
+from collections import defaultdict
+from bisect import bisect_left, bisect_right
+from array import array
 from django.conf import settings
+from django.core.cache import cache
+import hashlib
+from rse.working_days import working_day_calendar
 
 # import the logging library for debugging
 import logging
@@ -71,6 +77,101 @@ class Client(models.Model):
         ordering = ["name"]
 
 
+class FinancialYear(models.Model):
+    """
+    FinancialYear groups the salary band data published for a financial year (1st August to 31st July).
+    The year is the calendar year in which the financial year starts.
+    """
+    year = models.IntegerField(primary_key=True)
+
+    @staticmethod
+    def year_of(d: date) -> int:
+        """ Returns the financial year containing the date d """
+        return d.year if d.month >= settings.FINANCIAL_YEAR_START_MONTH else d.year - 1
+
+    @staticmethod
+    def next_start_date(d: date) -> date:
+        """ Returns the start of the first financial year which starts after the date d """
+        return date(FinancialYear.year_of(d) + 1, settings.FINANCIAL_YEAR_START_MONTH, 1)
+
+    def start_date(self) -> date:
+        """ Returns the first day of the financial year """
+        return date(self.year, settings.FINANCIAL_YEAR_START_MONTH, 1)
+
+    def end_date(self) -> date:
+        """ Returns the last day of the financial year """
+        return date(self.year + 1, settings.FINANCIAL_YEAR_START_MONTH, 1) - timedelta(days=1)
+
+    def date_in_financial_year(self, d: date) -> bool:
+        """ Returns True if the date d is within this financial year """
+        return self.start_date() <= d <= self.end_date()
+
+    def __str__(self) -> str:
+        return f"{self.year}/{self.year + 1}"
+
+    class Meta:
+        """ Order financial years chronologically """
+        ordering = ["year"]
+
+
+class SalaryBand(models.Model):
+    """
+    SalaryBand is the salary of a grade point (grade and point within the grade) for a financial year.
+    Staff on an incremental grade point move to the next point within the grade on the 1st January each year.
+    """
+    grade = models.IntegerField(default=1)
+    grade_point = models.IntegerField(default=1)
+    salary = models.DecimalField(max_digits=8, decimal_places=2)
+    year = models.ForeignKey(FinancialYear, on_delete=models.PROTECT)
+    increments = models.BooleanField(default=True)
+
+    # Estimated salary bands are never saved. They are copies of the latest salary data for the grade point with
+    # inflation applied for each financial year (estimated_year) which has no published salary data.
+    estimated = False
+    estimated_year = None
+
+    @property
+    def financial_year(self) -> int:
+        """ The financial year which the salary applies to (later than year if the band is estimated) """
+        return self.estimated_year if self.estimated else self.year_id
+
+    @property
+    def short_str(self) -> str:
+        return f"{self.grade}.{self.grade_point}"
+
+    def __str__(self) -> str:
+        return f"Grade {self.grade}.{self.grade_point} ({self.year})"
+
+    @staticmethod
+    def spans_financial_year(from_date: date, until_date: date) -> bool:
+        """ Returns True if a financial year starts after the from date and on or before the until date """
+        return FinancialYear.next_start_date(from_date) <= until_date
+
+    @staticmethod
+    def spans_calendar_year(from_date: date, until_date: date) -> bool:
+        """ Returns True if a calendar year starts (i.e. an increment date) after the from date and on or before the until date """
+        return date(from_date.year + 1, 1, 1) <= until_date
+
+    def salary_band_after_increment(self) -> SalaryBand:
+        """
+        Returns the salary band following a 1st January increment. This is the next point within the grade for the
+        same financial year or the same salary band if the band does not increment (or is the last point of the grade).
+        """
+        return SalaryTable.load(rses=[]).salary_band_after_increment(self)
+
+    def salary_band_next_financial_year(self) -> SalaryBand:
+        """
+        Returns the salary band of the same grade point in the next financial year.
+        If there is no salary data for the next financial year then the salary is estimated from the latest data.
+        """
+        return SalaryTable.load(rses=[]).salary_band_next_financial_year(self)
+
+    class Meta:
+        """ A grade point has a single salary each financial year """
+        unique_together = ('grade', 'grade_point', 'year')
+        ordering = ["year", "grade", "grade_point"]
+
+
 class RSE(models.Model):
     """
     RSE represents a RSE staff member within the RSE team
@@ -112,6 +213,49 @@ class RSE(models.Model):
         else:
             return False
 
+    def lastSalaryGradeChange(self, date: date = None) -> Optional[SalaryGradeChange]:
+        """
+        Returns the most recent salary grade change on or before the date (today if not provided) or None if there are no salary grade changes
+        """
+        if date is None:
+            date = timezone.now().date()
+        return SalaryGradeChange.objects.filter(rse=self, date__lte=date).order_by('-date').first()
+
+    def futureSalaryBand(self, date: date) -> SalaryBand:
+        """
+        Returns the projected salary band of the RSE at a date accounting for salary grade changes, increments and financial year changes
+        """
+        return SalaryTable.load(rses=[self]).salary_band(self, date)
+
+    def staff_cost(self, from_date: date, until_date: date, percentage: float = 100) -> SalaryValue:
+        """
+        Returns the staff cost (including oncosts) of the RSE between the from and until dates at the percentage of their time
+        """
+        return SalaryTable.load(rses=[self]).staff_cost(self, from_date, until_date, percentage)
+
+    @staticmethod
+    def available(from_date: date, until_date: date, percentage: float, statuses: List[str] = None) -> List[Tuple[RSE, float, float]]:
+        """
+        Returns the RSEs employed for the whole date range with at least the percentage FTE free throughout it (considering
+        allocations on projects with the given statuses or funded projects by default). Uses one range query for RSEs and one for allocations which are
+        swept to find the peak commitment of each RSE.
+        Results are tuples of (RSE, minimum free percentage, average free percentage) ranked by fit. I.e. the RSEs whose
+        free capacity most closely matches the percentage first (leaving larger capacity for other projects).
+        """
+        if statuses is None:
+            statuses = [Project.FUNDED]
+        rses = RSE.objects.select_related('user').filter(employed_from__lte=from_date, employed_until__gte=until_date).in_bulk()
+        allocations = RSEAllocation.objects.filter(start__lt=until_date, end__gt=from_date, project__status__in=statuses,
+                                                   rse__in=rses.keys()).values_list('rse_id', 'start', 'end', 'percentage')
+        peaks = RSEAllocation.commitment_peaks(allocations, from_date, until_date)
+
+        available = []
+        for rse_id, rse in rses.items():
+            peak, average = peaks.get(rse_id, (0, 0))
+            if 100 - peak >= percentage:
+                available.append((rse, 100 - peak, 100 - average))
+        return sorted(available, key=lambda a: (a[1], -a[2], str(a[0])))
+
     @property
     def colour_rbg(self) -> Dict[str, int]:
         r = hash(self.user.first_name) % 255
@@ -120,6 +264,248 @@ class RSE(models.Model):
         return {"r": r, "g": g, "b": b}
 
 
+class SalaryGradeChange(models.Model):
+    """
+    SalaryGradeChange sets the salary band of an RSE from a date. The first salary grade change of an RSE is their
+    starting salary. Later changes are non incremental changes (e.g. promotion or an exceptional contribution).
+    """
+    rse = models.ForeignKey(RSE, on_delete=models.CASCADE)
+    salary_band = models.ForeignKey(SalaryBand, on_delete=models.PROTECT)
+    date = models.DateField()
+
+    def is_starting_salary(self) -> bool:
+        """ Returns True if this is the first salary grade change of the RSE """
+        return not SalaryGradeChange.objects.filter(rse=self.rse, date__lt=self.date).exists()
+
+    def salary_band_at_future_date(self, future_date: date) -> SalaryBand:
+        """
+        Returns the salary band of the RSE at a future date. Salary bands are incremented on the 1st January and
+        use the next financial years salary data from the 1st August. Any later salary grade change (on or before the
+        future date) takes precedence over this one.
+        """
+        return SalaryTable.load(rses=[self.rse_id]).salary_band(self.rse, future_date)
+
+    def __str__(self) -> str:
+        return f"{self.rse} {self.salary_band} from {self.date}"
+
+    class Meta:
+        """ Order salary grade changes chronologically """
+        ordering = ["date"]
+
+
+class SalaryValue():
+    """
+    SalaryValue is the result of a staff cost calculation. It is the total staff cost and a breakdown of the salary
+    bands, periods and percentages that the cost is made up from (optionally grouped by allocation).
+    """
+
+    def __init__(self):
+        self.staff_cost = 0.0
+        self.cost_breakdown = []
+        self.allocation_breakdown = {}
+
+    def add_staff_salary(self, salary_band: SalaryBand, from_date: date, until_date: date, percentage: float, staff_cost: float):
+        """ Adds the cost of a period on a single salary band """
+        self.staff_cost += staff_cost
+        self.cost_breakdown.append({'salary_band': salary_band, 'from_date': from_date, 'until_date': until_date,
+                                    'percentage': percentage, 'staff_cost': staff_cost})
+
+    def add_salary_value(self, salary_value: SalaryValue):
+        """ Combines another salary calculation with this one """
+        self.staff_cost += salary_value.staff_cost
+        self.cost_breakdown += salary_value.cost_breakdown
+
+    def add_salary_value_with_allocation(self, allocation: RSEAllocation, salary_value: SalaryValue):
+        """ Combines the salary calculation of an allocation with this one keeping a breakdown of the allocations costs """
+        self.add_salary_value(salary_value)
+        self.allocation_breakdown[allocation] = salary_value.cost_breakdown
+
+
+class SalaryTable():
+    """
+    In memory table of salary data and salary grade changes used to project salary bands and calculate staff costs
+    without any further database queries. The salaries of each grade point are held as a list sorted by financial year
+    and grade changes as a list per RSE sorted by date so that the band in effect at any year or date is found by bisection.
+    Load a single table to cost many allocations (see staff_costs).
+    """
+
+    def __init__(self, salary_bands: List[SalaryBand], salary_grade_changes: List[SalaryGradeChange]):
+        # grade point (grade, grade_point) -> financial years with salary data and the salary band of each year
+        self.years = {}  # type: Dict[Tuple[int, int], List[int]]
+        self.bands = {}  # type: Dict[Tuple[int, int], List[SalaryBand]]
+        for sb in sorted(salary_bands, key=lambda sb: sb.year_id):
+            self.years.setdefault((sb.grade, sb.grade_point), []).append(sb.year_id)
+            self.bands.setdefault((sb.grade, sb.grade_point), []).append(sb)
+
+        # rse id -> dates and grade changes (grade, grade point, financial year, date, is starting salary)
+        self.change_dates = {}  # type: Dict[int, List[date]]
+        self.changes = {}  # type: Dict[int, List[Tuple[int, int, int, date, bool]]]
+        for sgc in sorted(salary_grade_changes, key=lambda sgc: sgc.date):
+            sb = sgc.salary_band
+            changes = self.changes.setdefault(sgc.rse_id, [])
+            # a band from an earlier financial year than the change date is adjusted to the year of the change
+            changes.append((sb.grade, sb.grade_point, max(sb.year_id, FinancialYear.year_of(sgc.date)), sgc.date, not changes))
+            self.change_dates.setdefault(sgc.rse_id, []).append(sgc.date)
+
+        # memoised timelines of grade changes (see _timeline)
+        self._timelines = {}  # type: Dict[Tuple[int, int, int, date, bool], Tuple[List[date], List[Tuple[int, int, int]], Iterator]]
+        # memoised salaries and (estimated) salary bands by (grade, grade point, financial year)
+        self._salaries = {}  # type: Dict[Tuple[int, int, int], float]
+        self._salary_bands = {}  # type: Dict[Tuple[int, int, int], SalaryBand]
+
+    @staticmethod
+    def load(rses: List[RSE] = None) -> SalaryTable:
+        """
+        Loads all salary bands and the salary grade changes of the RSEs (or of all RSEs if rses is None) in two queries
+        """
+        salary_grade_changes = SalaryGradeChange.objects.select_related('salary_band')
+        if rses is not None:
+            salary_grade_changes = salary_grade_changes.filter(rse__in=rses)
+        return SalaryTable(list(SalaryBand.objects.select_related('year')), list(salary_grade_changes))
+
+    def _base_index(self, grade: int, grade_point: int, year: int) -> Optional[int]:
+        """ Index of the latest salary data for the grade point on or before the financial year """
+        years = self.years.get((grade, grade_point))
+        if not years:
+            return None
+        i = bisect_right(years, year) - 1
+        return i if i >= 0 else None
+
+    def _salary(self, grade: int, grade_point: int, year: int) -> float:
+        """ Salary of the grade point in the financial year (with estimated inflation for years without salary data) """
+        key = (grade, grade_point, year)
+        salary = self._salaries.get(key)
+        if salary is None:
+            i = self._base_index(grade, grade_point, year)
+            base_year = self.years[(grade, grade_point)][i]
+            salary = float(self.bands[(grade, grade_point)][i].salary) * settings.ESTIMATED_SALARY_INFLATION_MULTIPLIER ** (year - base_year)
+            self._salaries[key] = salary
+        return salary
+
+    def _increment(self, grade: int, grade_point: int, year: int) -> int:
+        """ Returns the grade point following a 1st January increment in the financial year """
+        i = self._base_index(grade, grade_point, year)
+        if self.bands[(grade, grade_point)][i].increments and self._base_index(grade, grade_point + 1, year) is not None:
+            return grade_point + 1
+        return grade_point
+
+    def _salary_band(self, grade: int, grade_point: int, year: int) -> SalaryBand:
+        """ Returns the salary band of a grade point for a financial year (estimating the salary if there is no salary data) """
+        key = (grade, grade_point, year)
+        sb = self._salary_bands.get(key)
+        if sb is None:
+            i = self._base_index(grade, grade_point, year)
+            sb = self.bands[(grade, grade_point)][i]
+            if sb.year_id != year:
+                sb = deepcopy(sb)
+                sb.salary = sb.salary * Decimal(str(settings.ESTIMATED_SALARY_INFLATION_MULTIPLIER)) ** (year - sb.year_id)
+                sb.estimated = True
+                sb.estimated_year = year
+            self._salary_bands[key] = sb
+        return sb
+
+    def salary_band_after_increment(self, sb: SalaryBand) -> SalaryBand:
+        return self._salary_band(sb.grade, self._increment(sb.grade, sb.grade_point, sb.financial_year), sb.financial_year)
+
+    def salary_band_next_financial_year(self, sb: SalaryBand) -> SalaryBand:
+        return self._salary_band(sb.grade, sb.grade_point, sb.financial_year + 1)
+
+    def _change(self, rse_id: int, d: date) -> Optional[Tuple[int, int, int, date, bool]]:
+        """ Returns the last salary grade change of the RSE on or before the date d """
+        dates = self.change_dates.get(rse_id)
+        if not dates:
+            return None
+        i = bisect_right(dates, d) - 1
+        return self.changes[rse_id][i] if i >= 0 else None
+
+    def _bands(self, change: Tuple[int, int, int, date, bool]) -> Iterator[Tuple[date, Tuple[int, int, int]]]:
+        """
+        Yields the date and band (grade, grade point, financial year) of a salary grade change followed by each
+        increment (1st January) and financial year change (1st August) after the change.
+        A starting salary in the last six months of a calendar year is not incremented on the following 1st January.
+        """
+        grade, grade_point, year, d, starting = change
+        yield d, (grade, grade_point, year)
+        skip_increment = starting and d.month >= 7
+        next_increment = date(d.year + 1, 1, 1)
+        next_year = FinancialYear.next_start_date(d)
+        while True:
+            d = min(next_increment, next_year)
+            if d == next_year:
+                year += 1
+                next_year = date(next_year.year + 1, next_year.month, 1)
+            if d == next_increment:
+                if not skip_increment:
+                    grade_point = self._increment(grade, grade_point, year)
+                skip_increment = False
+                next_increment = date(next_increment.year + 1, 1, 1)
+            yield d, (grade, grade_point, year)
+
+    def _timeline(self, change: Tuple[int, int, int, date, bool], until_date: date) -> Tuple[List[date], List[Tuple[int, int, int]]]:
+        """
+        Returns the dates and bands of a salary grade change (see _bands) up to at least the until date.
+        Timelines are memoised and extended as required so that costing many allocations only projects each grade change once.
+        """
+        timeline = self._timelines.get(change)
+        if timeline is None:
+            timeline = self._timelines[change] = ([], [], self._bands(change))
+        dates, bands, events = timeline
+        while not dates or dates[-1] < until_date:
+            d, band = next(events)
+            dates.append(d)
+            bands.append(band)
+        return dates, bands
+
+    def salary_band(self, rse: RSE, d: date) -> SalaryBand:
+        """
+        Returns the projected salary band of the RSE at the date d from their last salary grade change
+        Raises a ValueError if the RSE has no salary grade change on or before the date.
+        """
+        change = self._change(rse.id, d)
+        if change is None:
+            raise ValueError(f"{rse} has no salary grade change on or before {d}")
+        dates, bands = self._timeline(change, d)
+        return self._salary_band(*bands[bisect_right(dates, d) - 1])
+
+    def staff_cost(self, rse: RSE, from_date: date, until_date: date, percentage: float = 100) -> SalaryValue:
+        """
+        Returns the staff cost (including oncosts) of the RSE between the from and until dates at the percentage of their time.
+        Costs are limited to the RSEs employment (from their starting salary until employed until) and are calculated from the salary
+        band at the from date using the proportion (of 365 days) of each period between increments and financial year changes.
+        """
+        value = SalaryValue()
+        change_dates = self.change_dates.get(rse.id)
+        if not change_dates:
+            return value
+        from_date = max(from_date, change_dates[0])
+        until_date = min(until_date, rse.employed_until)
+        if from_date >= until_date:
+            return value
+
+        multiplier = percentage / 100.0 * settings.ONCOSTS_SALARY_MULTIPLIER / 365.0
+        dates, bands = self._timeline(self._change(rse.id, from_date), until_date)
+        first = bisect_right(dates, from_date) - 1
+        last = bisect_left(dates, until_date)
+        for i in range(first, last):
+            start = max(dates[i], from_date)
+            end = dates[i + 1] if i + 1 < last else until_date
+            cost = self._salary(*bands[i]) * (end - start).days * multiplier
+            value.add_staff_salary(self._salary_band(*bands[i]), start, end, percentage, cost)
+        return value
+
+    def staff_costs(self, allocations: List[RSEAllocation], from_date: date = None, until_date: date = None) -> SalaryValue:
+        """
+        Returns the combined staff cost of many allocations (limited to the from and until dates if provided) with a
+        breakdown by allocation. The allocations should be loaded with their RSE (i.e. select_related('rse')).
+        """
+        value = SalaryValue()
+        for a in allocations:
+            start = a.start if from_date is None else max(a.start, from_date)
+            end = a.end if until_date is None else min(a.end, until_date)
+            value.add_salary_value_with_allocation(a, self.staff_cost(a.rse, start, end, a.percentage))
+        return value
+
+
 class Project(PolymorphicModel):
     """
     Project represents a project undertaken by RSE team.
@@ -138,6 +524,12 @@ class Project(PolymorphicModel):
     start = models.DateField()
     end = models.DateField()
 
+    modified = models.DateTimeField(auto_now=True)                  # last edit (used to version cached allocation data)
+
+    # Denormalised effort (see check_effort). Stored so that percent allocated can be sorted and filtered in SQL.
+    project_days = models.FloatField(default=0, editable=False)    # duration times fte (maintained on save)
+    committed_days = models.FloatField(default=0, editable=False)  # effort of non deleted allocations (maintained by RSEAllocation)
+
     PREPARATION = 'P'
     REVIEW = 'R'
     FUNDED = 'F'
@@ -196,10 +588,11 @@ class Project(PolymorphicModel):
             active = RSEAllocation.objects.filter(project=self, start__lte=now)
         else:
             active = RSEAllocation.objects.filter(project=self, rse=rse, start__lte=now)
-        for a in active:
-            # allocated day need to be converted into equivalent working days
-            allocated_days_sum += a.working_days(self.start, now)
-        
+        # allocated days are converted into equivalent working days (as in RSEAllocation.working_days)
+        calendar = working_day_calendar()
+        for start, end, percentage in active.values_list('start', 'end', 'percentage'):
+            allocated_days_sum += calendar.working_days(max(start, self.start), min(end, now)) * percentage / 100.0
+
         return allocated_days_sum
 
     def value(self) -> Optional[int]:
@@ -229,15 +622,25 @@ class Project(PolymorphicModel):
         """ Implemented by concrete classes """
         pass
 
-    @property
-    def project_days(self) -> float:
-        """ Duration times by fte """
-        return self.duration * (self.fte / 100.0)
+    def calculate_project_days(self) -> float:
+        """ Duration times by fte (0 if either is unknown) """
+        duration, fte = self.duration, self.fte
+        if duration is None or fte is None:
+            return 0
+        return duration * (fte / 100.0)
 
-    @property
-    def committed_days(self) -> float:
-        """ Returns the committed effort in days from any allocation on this project """
-        return sum(a.effort for a in RSEAllocation.objects.filter(project=self))
+    def save(self, *args, **kwargs):
+        """
+        Stores the project days and preserves the committed days (which are only ever updated by allocations) as the
+        in memory value may be stale if allocations have changed since the project was loaded.
+        """
+        self.project_days = self.calculate_project_days()
+        with transaction.atomic():
+            if self.pk is not None:
+                committed_days = Project.objects.non_polymorphic().select_for_update().filter(pk=self.pk).values_list('committed_days', flat=True).first()
+                if committed_days is not None:
+                    self.committed_days = committed_days
+            super(Project, self).save(*args, **kwargs)
 
     @property
     def remaining_days(self) -> float:
@@ -260,6 +663,42 @@ class Project(PolymorphicModel):
         """
         return round(self.committed_days / self.project_days * 100, 2) if self.project_days != 0 else 100
 
+    @staticmethod
+    def annotate_percent_allocated(projects: 'QuerySet[Project]') -> 'QuerySet[Project]':
+        """
+        Annotates a query set of projects with the percent allocated (as `allocated_percent`) calculated in SQL from the
+        stored effort so that projects can be ordered or filtered by it. If project days is 0 then percent is 100.
+        """
+        return projects.annotate(allocated_percent=Case(
+            When(project_days=0, then=Value(100.0)),
+            default=F('committed_days') * 100.0 / F('project_days'),
+            output_field=FloatField()))
+
+    @staticmethod
+    def check_effort(fix: bool = False) -> List[Tuple[Project, float, float]]:
+        """
+        Recomputes the project days and committed days of every project from its allocations and returns a list of
+        (project, project days, committed days) for any project where the stored values are inconsistent.
+        If fix is True then the stored values of the inconsistent projects are replaced with the recomputed values (the
+        returned project objects retain the previously stored values).
+        Projects are locked before allocations are read so that allocations saved concurrently are not lost.
+        """
+        inconsistent = []
+        with transaction.atomic():
+            projects = list(Project.objects.select_for_update().order_by('id'))
+            committed = defaultdict(float)
+            for project_id, start, end, percentage in RSEAllocation.objects.values_list('project_id', 'start', 'end', 'percentage'):
+                committed[project_id] += (end - start).days * percentage / 100.0
+            for p in projects:
+                project_days = p.calculate_project_days()
+                committed_days = committed[p.id]
+                if abs(p.project_days - project_days) > 1e-6 or abs(p.committed_days - committed_days) > 1e-6:
+                    inconsistent.append((p, project_days, committed_days))
+            if fix and inconsistent:
+                fixed = [Project(id=p.id, project_days=project_days, committed_days=committed_days) for p, project_days, committed_days in inconsistent]
+                Project.objects.non_polymorphic().bulk_update(fixed, ['project_days', 'committed_days'])
+        return inconsistent
+
     @property
     def get_schedule_display(self) -> str:
         now = timezone.now().date()
@@ -279,6 +718,16 @@ class Project(PolymorphicModel):
         if self.start and self.end and self.end < self.start:
             raise ValidationError(_('Project end cannot be earlier than project start.'))
 
+    @staticmethod
+    def list_objects() -> 'QuerySet[DirectlyIncurredProject]':
+        """
+        Non polymorphic query set for project lists. Polymorphic Project queries require a further query (per chunk of
+        rows) to upcast each project to its concrete type. DirectlyIncurredProject is the only concrete project type so
+        querying it directly joins the base project table and returns typed projects (including subclass fields such as
+        percentage) in a single query. This must be revisited if another concrete project type is added.
+        """
+        return DirectlyIncurredProject.objects.non_polymorphic()
+
     @staticmethod
     def min_start_date() -> date:
         """
@@ -335,24 +784,21 @@ class Project(PolymorphicModel):
             allocations = RSEAllocation.objects.filter(project=self, end__gt=from_date, start__lt=until_date, rse=rse)
         else:
             allocations = RSEAllocation.objects.filter(project=self, end__gt=from_date, start__lt=until_date)
+        allocations = list(allocations.select_related('rse__user'))
 
-        # Iterate allocations and calculate staff costs
-        salary_cost = SalaryValue()
-        for a in allocations:
-
-            # calculate the staff cost of the RSE between the date range given the salary band at the start of the cost query
-            sc = a.staff_cost(from_date, until_date)
-
-            # append the salary costs logging costs by allocations5
-            salary_cost.add_salary_value_with_allocation(allocation=a, salary_value=sc)
-
-        return salary_cost
+        # Calculate the staff costs of all allocations from a single salary table (logging costs by allocation)
+        return SalaryTable.load(rses={a.rse_id for a in allocations}).staff_costs(allocations, from_date, until_date)
 
     @property
     def colour_rbg(self) -> Dict[str, int]:
-        r = hash(self.name) % 255
-        g = hash(self.start) % 255
-        b = hash(self.end) % 255
+        return Project.colour(self.name, self.start, self.end)
+
+    @staticmethod
+    def colour(name: str, start: date, end: date) -> Dict[str, int]:
+        """ Colour of a project from its name and dates (so that it can be calculated from values() rows) """
+        r = hash(name) % 255
+        g = hash(start) % 255
+        b = hash(end) % 255
         return {"r": r, "g": g, "b": b}
 
 
@@ -383,8 +829,10 @@ class DirectlyIncurredProject(Project):
     @property
     def working_days(self) -> Optional[int]:
         """ Number of workings days in the project """
-        """ Calculated by adjusting duration by TRAC """
-        return Project.fte_days_to_working_days(self.duration)* self.fte / 100.0
+        """ Calculated from the working day calendar (weighted to TRAC days) times by fte """
+        if self.start is None or self.end is None:
+            return None
+        return working_day_calendar().working_days(self.start, self.end) * self.fte / 100.0
 
     @property
     def type_str(self) -> str:
@@ -404,7 +852,37 @@ class DirectlyIncurredProject(Project):
         return self.percentage
 
 
-class RSEAllocationManager(models.Manager):
+class RSEAllocationQuerySet(QuerySet):
+    """
+    Query set providing named loading profiles for allocations which are displayed in templates. Each profile joins
+    (or prefetches) the related objects that the template accesses so that displaying a list of allocations does not
+    require a query per allocation. Projects are prefetched using the non polymorphic Project.list_objects so that
+    typed projects are loaded in a single query.
+    """
+    # Fields used to display an allocation as a string (i.e. "RSE on project at percentage")
+    DISPLAY_FIELDS = ('id', 'rse', 'project', 'percentage', 'start', 'end',
+                      'rse__user__username', 'rse__user__first_name', 'rse__user__last_name')
+
+    def for_gantt(self) -> RSEAllocationQuerySet:
+        """ Allocations for gantt charts and commitment graphs (which display the RSE, project and dates only) """
+        return (self.select_related('rse__user').only(*RSEAllocationQuerySet.DISPLAY_FIELDS)
+                .prefetch_related(models.Prefetch('project', queryset=Project.list_objects()))
+                .order_by('start', 'id'))
+
+    def for_table(self) -> RSEAllocationQuerySet:
+        """ Allocations for tables of project allocations (which display the RSE and project effort) """
+        return (self.select_related('rse__user')
+                .prefetch_related(models.Prefetch('project', queryset=Project.list_objects()))
+                .order_by('start', 'id'))
+
+    def for_dashboard(self) -> RSEAllocationQuerySet:
+        """ Allocations of a single RSE for the RSE dashboard (which displays project details and progress) """
+        return (self.only('id', 'rse', 'project', 'percentage', 'start', 'end')
+                .prefetch_related(models.Prefetch('project', queryset=Project.list_objects()))
+                .order_by('start', 'id'))
+
+
+class RSEAllocationManager(models.Manager.from_queryset(RSEAllocationQuerySet)):
     """
     RSEAllocation objects are transactional in that they are never actually deleted they are just flagged as deleted
     This custom manager allows all() to return on objects which have not been flagged as deleted 
@@ -412,9 +890,17 @@ class RSEAllocationManager(models.Manager):
     def get_queryset(self):
         return super(RSEAllocationManager, self).get_queryset().filter(deleted_date__isnull=True)
 
-    def all(self, deleted=False):
+    def all(self, deleted=False, archived=False):
+        """
+        Returns non deleted allocations or (if deleted is True) all allocations in the live table. Deleted allocations
+        which have been archived (see ArchivedRSEAllocation) are included if archived is also True. The archived query
+        set is a union so can only be ordered, sliced or counted (filter the live and archived query sets separately).
+        """
         if deleted:
-            return super(RSEAllocationManager, self).get_queryset()
+            allocations = super(RSEAllocationManager, self).get_queryset()
+            if archived:
+                allocations = allocations.union(ArchivedRSEAllocation.objects.values_list(*ArchivedRSEAllocation.ALLOCATION_FIELDS), all=True)
+            return allocations
         else:
             # default is to return only non deleted items
             return self.get_queryset()
@@ -437,9 +923,49 @@ class RSEAllocation(models.Model):
 
     objects = RSEAllocationManager()
 
+    class Meta:
+        """ Index allocation dates for date range queries (i.e. allocations overlapping a date range) """
+        indexes = [models.Index(fields=['start', 'end'])]
+
     def __str__(self) -> str:
         return f"{self.rse} on {self.project} at {self.percentage}%"
 
+    def save(self, *args, **kwargs):
+        """
+        Saves the allocation and transactionally updates the committed days of its project. The effort of the previously
+        saved version of the allocation (if not deleted) is removed and the new effort added unless the allocation is
+        being flagged as deleted. Updates are relative (F expressions) so concurrent allocation changes are not lost.
+        """
+        with transaction.atomic():
+            changes = defaultdict(float)
+            if self.pk is not None:
+                previous = RSEAllocation.objects.all(deleted=True).select_for_update().filter(pk=self.pk).values_list(
+                    'project_id', 'start', 'end', 'percentage', 'deleted_date').first()
+                if previous is not None and previous[4] is None:
+                    changes[previous[0]] -= (previous[2] - previous[1]).days * previous[3] / 100.0
+            super(RSEAllocation, self).save(*args, **kwargs)
+            if self.deleted_date is None:
+                changes[self.project_id] += self.effort
+            self.update_committed_days(changes)
+
+    def delete(self, *args, **kwargs):
+        """ Hard deletes (i.e. via the admin interface) remove any committed effort from the project """
+        with transaction.atomic():
+            previous = RSEAllocation.objects.all(deleted=True).select_for_update().filter(pk=self.pk).values_list('deleted_date').first()
+            result = super(RSEAllocation, self).delete(*args, **kwargs)
+            if previous is not None and previous[0] is None:
+                self.update_committed_days({self.project_id: -self.effort})
+        return result
+
+    def update_committed_days(self, changes: Dict[int, float]):
+        """ Applies changes in committed days to projects (and to this allocations project if already loaded) """
+        for project_id, days in changes.items():
+            if days == 0:
+                continue
+            Project.objects.non_polymorphic().filter(pk=project_id).update(committed_days=F('committed_days') + days)
+            if RSEAllocation.project.is_cached(self) and self.project.id == project_id:
+                self.project.committed_days += days
+
     @property
     def duration(self):
         return (self.end - self.start).days
@@ -474,6 +1000,18 @@ class RSEAllocation(models.Model):
 
         return float(current_days) / float(total_days) * 100 if total_days != 0 else 100
 
+    def staff_cost(self, start: date = None, end: date = None) -> SalaryValue:
+        """
+        Returns the staff cost of the allocation (limited to the start and end dates if provided)
+        """
+        # limit specified time period to allocation
+        if start is None or start < self.start:
+            start = self.start
+        if end is None or end > self.end:
+            end = self.end
+
+        return self.rse.staff_cost(start, end, self.percentage)
+
     def working_days(self, start: None, end: None) -> Optional[int]:
         """ Number of workings days in the allocation """
 
@@ -484,10 +1022,8 @@ class RSEAllocation(models.Model):
         if end is None or end > self.end:
             end = self.end
 
-        # calculate timedelta in days
-        duration = (end - start).days
-
-        return Project.fte_days_to_working_days(duration) * self.percentage / 100.0
+        # working days from the working day calendar (excludes weekends and closures)
+        return working_day_calendar().working_days(start, end) * self.percentage / 100.0
 
     @staticmethod
     def min_allocation_start() -> date:
@@ -511,6 +1047,131 @@ class RSEAllocation(models.Model):
         except OperationalError:
             return timezone.now().date()
 
+    @staticmethod
+    def allocation_version(rse: RSE) -> tuple:
+        """
+        Returns a version of an RSEs allocations derived from the latest created and deleted dates of their allocations.
+        The allocation count (which changes if a project and its allocations are deleted) and the latest modification of
+        their projects (which may change the project status) are also included.
+        """
+        return RSEAllocation.allocations_version(Q(rse=rse))
+
+    @staticmethod
+    def allocations_version(q: Q) -> tuple:
+        """ Version (see allocation_version) of any allocations (including deleted allocations) matching the Q query """
+        version = RSEAllocation.objects.all(deleted=True).filter(q).aggregate(
+            count=Count('id'), created=Max('created_date'), deleted=Max('deleted_date'), modified=Max('project__modified'))
+        return tuple(version.values())
+
+    @staticmethod
+    def gantt_columns(allocations: 'QuerySet[RSEAllocation]', group_by: str, group_ids: List[int] = None) -> Dict[str, object]:
+        """
+        Returns gantt chart data for a query set of allocations in a columnar (JSON serialisable) form. Allocations are
+        grouped either by 'rse' or by 'project' (any additional group_ids are included even if they have no allocations)
+        and labelled by the other. Groups, labels and tasks (allocations) are each a dict of parallel lists. Tasks refer
+        to their group and label by index and dates are day offsets from the origin date so that names and dates are not
+        repeated for every allocation. Project groups include their dates and FTE percentage.
+        """
+        label_by = 'project' if group_by == 'rse' else 'rse'
+        rows = list(allocations.order_by(f'{group_by}_id', 'start', 'id').values_list(
+            'id', f'{group_by}_id', f'{label_by}_id', 'start', 'end', 'percentage'))
+
+        group_ids = sorted(set(r[1] for r in rows) | set(group_ids or []))
+        label_ids = sorted(set(r[2] for r in rows))
+        entities = {}
+        for entity, ids in ((group_by, group_ids), (label_by, label_ids)):
+            if entity == 'rse':
+                values = RSE.objects.filter(id__in=ids).values_list('id', 'user__first_name', 'user__last_name')
+                entities[entity] = {i: {'name': f"{first} {last}"} for i, first, last in values}
+            else:
+                values = Project.list_objects().filter(id__in=ids).values_list('id', 'name', 'start', 'end', 'percentage')
+                entities[entity] = {i: {'name': name, 'start': start, 'end': end, 'percentage': percentage}
+                                    for i, name, start, end, percentage in values}
+
+        # origin is the earliest date of any task or project group
+        dates = [r[3] for r in rows] + [e['start'] for e in entities[group_by].values() if 'start' in e]
+        origin = min(dates) if dates else timezone.now().date()
+        offset = lambda d: (d - origin).days if d is not None else None
+
+        groups = {'id': group_ids, 'name': [], 'start': [], 'end': [], 'percentage': []}
+        for i in group_ids:
+            group = entities[group_by].get(i, {})
+            groups['name'].append(group.get('name'))
+            groups['start'].append(offset(group.get('start')))
+            groups['end'].append(offset(group.get('end')))
+            groups['percentage'].append(group.get('percentage'))
+        labels = {'id': label_ids, 'name': [entities[label_by].get(i, {}).get('name') for i in label_ids]}
+
+        group_index = {i: n for n, i in enumerate(group_ids)}
+        label_index = {i: n for n, i in enumerate(label_ids)}
+        tasks = {'id': [r[0] for r in rows],
+                 'group': [group_index[r[1]] for r in rows],
+                 'label': [label_index[r[2]] for r in rows],
+                 'start': [offset(r[3]) for r in rows],
+                 'end': [offset(r[4]) for r in rows],
+                 'percentage': [r[5] for r in rows]}
+
+        return {'origin': origin.isoformat(), 'group_by': group_by, 'groups': groups, 'labels': labels, 'tasks': tasks}
+
+    @staticmethod
+    def cached_commitment_summary(rse: RSE, allocations: 'RSEAllocation', from_date: date = None, until_date: date = None):
+        """
+        Memoised version of commitment_summary for a query set of allocations of a single RSE.
+        The summary is stored in the Django cache keyed on the RSE, the allocation query (i.e. any date window and status
+        filter), the summary date window and the RSEs allocation version. Any change to the RSEs allocations changes the
+        version so a stale summary is never returned.
+        """
+        key_data = (str(rse), str(allocations.query), from_date, until_date, RSEAllocation.allocation_version(rse))
+        key = f"commitment_summary:{rse.id}:{hashlib.md5(repr(key_data).encode()).hexdigest()}"
+        summary = cache.get(key)
+        if summary is None:
+            # related objects are loaded so that they are stored with the summary (used to describe the allocations)
+            summary = RSEAllocation.commitment_summary(allocations.select_related('rse__user', 'project'), from_date, until_date)
+            cache.set(key, summary, settings.COMMITMENT_SUMMARY_CACHE_TIMEOUT)
+        return summary
+
+    @staticmethod
+    def rse_dashboard(rse: RSE, now: date) -> Dict[str, object]:
+        """
+        Returns the allocation highlights (current capacity, active and possible allocation counts) and the active and
+        first future allocations of an RSE on a date for the RSE dashboard. The highlights are counted in a single
+        conditional aggregate query and the allocations loaded in a single query (with their projects prefetched).
+        """
+        funded = Q(project__status=Project.FUNDED)
+        possible = Q(project__status__in=(Project.REVIEW, Project.PREPARATION, Project.FUNDED))
+        active = Q(start__lte=now, end__gte=now) & funded
+        future = Q(start__gte=now) & possible
+
+        allocations = RSEAllocation.objects.filter(rse=rse)
+        dashboard = allocations.aggregate(
+            current_capacity=Sum('percentage', filter=Q(start__lte=now, end__gt=now) & funded),
+            active_allocation_count=Count('id', filter=active),
+            possible_allocation_count=Count('id', filter=Q(end__gte=now) & possible))
+        dashboard['current_capacity'] = dashboard['current_capacity'] or 0
+
+        active_allocations, future_allocations = [], []
+        for a in allocations.filter(active | future).for_dashboard():
+            if a.start <= now <= a.end and a.project.status == Project.FUNDED:
+                active_allocations.append(a)
+            if a.start >= now:
+                future_allocations.append(a)
+        dashboard['active_allocations'] = active_allocations
+        dashboard['future_allocations'] = future_allocations[:settings.HOME_PAGE_NUMBER_ITEMS]
+        return dashboard
+
+    @staticmethod
+    def cached_rse_dashboard(rse: RSE, now: date) -> Dict[str, object]:
+        """
+        Memoised version of rse_dashboard keyed on the RSE, the date and the RSEs allocation version (see
+        cached_commitment_summary) so that the dashboard is only recomputed when the RSEs allocations change.
+        """
+        key = f"rse_dashboard:{rse.id}:{now.isoformat()}:{hashlib.md5(repr(RSEAllocation.allocation_version(rse)).encode()).hexdigest()}"
+        dashboard = cache.get(key)
+        if dashboard is None:
+            dashboard = RSEAllocation.rse_dashboard(rse, now)
+            cache.set(key, dashboard, settings.RSE_DASHBOARD_CACHE_TIMEOUT)
+        return dashboard
+
     @staticmethod
     def commitment_summary(allocations: 'RSEAllocation', from_date: date = None, until_date: date = None):
 
@@ -556,3 +1217,381 @@ class RSEAllocation(models.Model):
 
         # Return list of unique (date, effort, [RSEAllocation])
         return list(zip(unique_dates, unique_effort, unique_cumulative_allocations))
+
+    @staticmethod
+    def downsample_commitment(commitments: List[Tuple[date, float, list]], max_points: int) -> List[Tuple[date, float, list]]:
+        """
+        Reduces a commitment summary (a step series of date, effort and allocations) to at most max_points points.
+        The date range is divided into equal width buckets and from each bucket the point with the peak effort and the
+        last point (the effort carried into the next bucket) are kept. Peaks are therefore never lost and the first and
+        last points of the series are always kept. max_points should be at least 3.
+        """
+        if not max_points or len(commitments) <= max_points:
+            return commitments
+
+        # two points per bucket plus the first point of the series
+        buckets = max((max_points - 1) // 2, 1)
+        first = commitments[0][0]
+        span = (commitments[-1][0] - first).days + 1
+
+        kept = {0}
+        for _, points in it.groupby(range(len(commitments)), lambda i: (commitments[i][0] - first).days * buckets // span):
+            points = list(points)
+            kept.add(max(points, key=lambda i: commitments[i][1]))
+            kept.add(points[-1])
+
+        return [commitments[i] for i in sorted(kept)]
+
+    @staticmethod
+    def commitment_peaks(allocations: List[Tuple[int, date, date, float]], from_date: date, until_date: date) -> Dict[int, Tuple[float, float]]:
+        """
+        Sweeps the start and end dates of allocations (tuples of RSE id, start, end and percentage) limited to the from and
+        until dates in a single pass. Returns a dict of RSE id to the (peak, average) percentage FTE committed in the date range.
+        RSEs without allocations are not included.
+        """
+        days = (until_date - from_date).days
+        # start and end events (within the date range) sorted by RSE and date
+        allocations = [(rse_id, max(start, from_date), min(end, until_date), percentage) for rse_id, start, end, percentage in allocations]
+        events = sorted(it.chain(((rse_id, start, percentage) for rse_id, start, end, percentage in allocations if start < end),
+                                 ((rse_id, end, -percentage) for rse_id, start, end, percentage in allocations if start < end)))
+
+        peaks = {}  # type: Dict[int, Tuple[float, float]]
+        for rse_id, rse_events in it.groupby(events, lambda e: e[0]):
+            effort = 0
+            peak = 0
+            total = 0   # sum of percentage * days
+            last = from_date
+            for d, day_events in it.groupby(rse_events, lambda e: e[1]):
+                total += effort * (d - last).days
+                last = d
+                effort += sum(e[2] for e in day_events)
+                peak = max(peak, effort)
+            peaks[rse_id] = (round(peak, 6), total / days if days > 0 else 0)
+        return peaks
+
+    @staticmethod
+    def over_allocations(allocations: List[Tuple[int, date, date, float]], limit: float = 100) -> Dict[int, List[Tuple[date, date, float]]]:
+        """
+        Sweeps the start and end dates of allocations (tuples of RSE id, start, end and percentage) in date order to find
+        when each RSE is allocated more than the limit (percentage FTE) in a single pass.
+        Returns a dict of RSE id to list of (from date, until date, peak percentage) for each period over the limit.
+        """
+        # start and end events sorted by RSE and date
+        events = sorted(it.chain(((rse_id, start, percentage) for rse_id, start, end, percentage in allocations),
+                                 ((rse_id, end, -percentage) for rse_id, start, end, percentage in allocations)))
+
+        over = {}  # type: Dict[int, List[Tuple[date, date, float]]]
+        for rse_id, rse_events in it.groupby(events, lambda e: e[0]):
+            effort = 0
+            over_from = None
+            peak = 0
+            for d, day_events in it.groupby(rse_events, lambda e: e[1]):
+                effort += sum(e[2] for e in day_events)
+                # compare rounded effort to ignore floating point error in sums of percentages
+                if round(effort, 6) > limit:
+                    if over_from is None:
+                        over_from = d
+                        peak = effort
+                    peak = max(peak, effort)
+                elif over_from is not None:
+                    over.setdefault(rse_id, []).append((over_from, d, round(peak, 6)))
+                    over_from = None
+        return over
+
+
+
+class ArchivedRSEAllocation(models.Model):
+    """
+    Soft deleted allocations which were deleted more than ALLOCATION_ARCHIVE_DAYS ago are moved (with their original id)
+    into this table by the archive_allocations management command so that the live RSEAllocation table only contains
+    current and recently deleted allocations. Archived allocations are read only and can be queried alongside deleted
+    allocations using RSEAllocation.objects.all(deleted=True, archived=True).
+    """
+    # Fields in the same order as RSEAllocation so that archived rows can be unioned with live allocations
+    ALLOCATION_FIELDS = ('id', 'rse_id', 'project_id', 'percentage', 'start', 'end', 'created_date', 'deleted_date')
+
+    id = models.BigIntegerField(primary_key=True)   # id of the original allocation
+    rse = models.ForeignKey(RSE, on_delete=models.CASCADE)
+    project = models.ForeignKey(Project, on_delete=models.CASCADE)
+    percentage = models.FloatField()
+    start = models.DateField()
+    end = models.DateField()
+    created_date = models.DateTimeField()
+    deleted_date = models.DateTimeField()
+    archived_date = models.DateTimeField(default=timezone.now)
+
+    def __str__(self) -> str:
+        return f"{self.rse} on {self.project} at {self.percentage}% (archived)"
+
+    @staticmethod
+    def archive(deleted_before: datetime, batch_size: int = 1000) -> int:
+        """
+        Moves allocations which were soft deleted before the deleted_before date into the archive and returns the number
+        archived. Each batch is copied and removed from the live table in a single transaction.
+        """
+        count = 0
+        while True:
+            with transaction.atomic():
+                allocations = list(RSEAllocation.objects.all(deleted=True).select_for_update()
+                                   .filter(deleted_date__lt=deleted_before).order_by('id')
+                                   .values_list(*ArchivedRSEAllocation.ALLOCATION_FIELDS)[:batch_size])
+                if not allocations:
+                    return count
+                archived_date = timezone.now()
+                ArchivedRSEAllocation.objects.bulk_create(
+                    [ArchivedRSEAllocation(**dict(zip(ArchivedRSEAllocation.ALLOCATION_FIELDS, a)), archived_date=archived_date) for a in allocations])
+                # queryset delete does not call RSEAllocation.delete so committed project effort is unaffected
+                RSEAllocation.objects.all(deleted=True).filter(id__in=[a[0] for a in allocations]).delete()
+                count += len(allocations)
+
+    class Meta:
+        """ Archived allocations are looked up by deletion date for auditing """
+        indexes = [models.Index(fields=['deleted_date'])]
+
+
+def month_start(d: date) -> date:
+    """ Returns the first day of the month containing d """
+    return d.replace(day=1)
+
+
+def next_month(d: date) -> date:
+    """ Returns the first day of the month following the month containing d """
+    return (d.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+
+def months_in_range(from_date: date, until_date: date) -> Iterator[date]:
+    """ Generator for the first day of every month from the month of from_date to the month of until_date (inclusive) """
+    month = month_start(from_date)
+    while month <= until_date:
+        yield month
+        month = next_month(month)
+
+
+def overlap_days(start: date, end: date, from_date: date, until_date: date) -> int:
+    """ Number of days that the period start to end (end exclusive) overlaps the period from_date to until_date """
+    return max(0, (min(end, until_date) - max(start, from_date)).days)
+
+
+class UtilisationRollup(models.Model):
+    """
+    Precomputed monthly utilisation of an RSE (or of the whole team if rse is null) for funded projects or for the full
+    pipeline of funded, review and in preparation projects.
+    Rollups are rebuilt by the rollup_utilisation management command (e.g. nightly from cron) so that reports do not
+    have to recompute utilisation from every allocation. Reports always compute the current month live.
+    """
+    FUNDED = 'F'
+    PIPELINE = 'U'
+    STATUS_CHOICES = (
+        (FUNDED, 'Funded'),
+        (PIPELINE, 'Funded, Review and in Preparation'),
+    )
+    STATUS_PROJECT_STATUSES = {
+        FUNDED: (Project.FUNDED,),
+        PIPELINE: (Project.FUNDED, Project.REVIEW, Project.PREPARATION),
+    }
+
+    rse = models.ForeignKey(RSE, on_delete=models.CASCADE, null=True, blank=True)    # null for the team rollup
+    month = models.DateField()                                                          # first day of the month
+    status = models.CharField(max_length=1, choices=STATUS_CHOICES)
+    allocated_days = models.FloatField()    # allocated effort (days multiplied by allocation FTE) within the month
+    available_days = models.FloatField()    # days within the month which the RSE (or team) is employed
+    computed = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        unique_together = ('rse', 'month', 'status')
+        ordering = ['month']
+
+    def __str__(self) -> str:
+        return f"{self.rse if self.rse_id else 'Team'} {self.month:%m/%Y} ({self.get_status_display()}): {self.utilisation:.1f}%"
+
+    @property
+    def utilisation(self) -> float:
+        """ Allocated effort as a percentage of the available (employed) effort """
+        return self.allocated_days / self.available_days * 100.0 if self.available_days != 0 else 0
+
+    @staticmethod
+    def financial_year(month: date) -> int:
+        """ Returns the (starting calendar) year of the financial year containing month """
+        return FinancialYear.year_of(month)
+
+    @staticmethod
+    def compute(from_month: date, until_month: date, status: str) -> List[UtilisationRollup]:
+        """
+        Computes (unsaved) per RSE and team rollups for every month in the range from the allocations.
+        A single query is made for allocations and RSEs, each allocation only contributes to the months it overlaps.
+        """
+        months = list(months_in_range(from_month, until_month))
+        if not months:
+            return []
+        range_start = months[0]
+        range_end = next_month(months[-1])
+
+        allocated = {}  # type: Dict[tuple, float]
+        allocations = RSEAllocation.objects.filter(project__status__in=UtilisationRollup.STATUS_PROJECT_STATUSES[status],
+                                                   start__lt=range_end, end__gt=range_start)
+        for rse_id, start, end, percentage in allocations.values_list('rse_id', 'start', 'end', 'percentage'):
+            for month in months_in_range(max(start, range_start), min(end, range_end) - timedelta(days=1)):
+                days = overlap_days(start, end, month, next_month(month))
+                allocated[rse_id, month] = allocated.get((rse_id, month), 0) + days * percentage / 100.0
+
+        computed = timezone.now()
+        rollups = []
+        # RSEs employed in the range (or with allocations in the range)
+        rses = RSE.objects.filter(Q(employed_from__lt=range_end, employed_until__gt=range_start) |
+                                  Q(id__in={rse_id for rse_id, _ in allocated}))
+        employment = {rse_id: (employed_from, employed_until) for rse_id, employed_from, employed_until in
+                      rses.values_list('id', 'employed_from', 'employed_until')}
+        for month in months:
+            team_allocated = team_available = 0
+            for rse_id, (employed_from, employed_until) in employment.items():
+                rse_allocated = allocated.get((rse_id, month), 0)
+                rse_available = overlap_days(employed_from, employed_until, month, next_month(month))
+                if rse_allocated == 0 and rse_available == 0:
+                    continue
+                rollups.append(UtilisationRollup(rse_id=rse_id, month=month, status=status, allocated_days=rse_allocated,
+                                                 available_days=rse_available, computed=computed))
+                team_allocated += rse_allocated
+                team_available += rse_available
+            rollups.append(UtilisationRollup(rse=None, month=month, status=status, allocated_days=team_allocated,
+                                             available_days=team_available, computed=computed))
+        return rollups
+
+    @staticmethod
+    def rebuild(from_month: date = None, until_month: date = None) -> int:
+        """
+        Recomputes and saves the rollups for all statuses in a single transaction (replacing any existing rollups in the
+        range) and returns the number of rollups saved. If no range is provided then the range of all allocations is used
+        and the full table is replaced.
+        """
+        if from_month is None or until_month is None:
+            from_month = RSEAllocation.min_allocation_start()
+            until_month = RSEAllocation.max_allocation_end()
+            existing = UtilisationRollup.objects.all()
+        else:
+            existing = UtilisationRollup.objects.filter(month__gte=month_start(from_month), month__lte=until_month)
+
+        rollups = []
+        if from_month and until_month:
+            for status, _ in UtilisationRollup.STATUS_CHOICES:
+                rollups.extend(UtilisationRollup.compute(from_month, until_month, status))
+        with transaction.atomic():
+            existing.delete()
+            UtilisationRollup.objects.bulk_create(rollups)
+        return len(rollups)
+
+    @staticmethod
+    def report(from_month: date, until_month: date, status: str) -> List[UtilisationRollup]:
+        """
+        Returns the per RSE and team rollups for every month in the range.
+        Saved rollups are used for all months except the current month (and any months which have not been rolled up)
+        which are computed live from the allocations.
+        """
+        current = month_start(timezone.now().date())
+        rollups = list(UtilisationRollup.objects.filter(month__gte=month_start(from_month), month__lte=until_month,
+                                                        status=status).exclude(month=current).select_related('rse__user'))
+        rolled_up = {r.month for r in rollups if r.rse_id is None}
+        live = [m for m in months_in_range(from_month, until_month) if m not in rolled_up]
+        if live:
+            computed = [r for r in UtilisationRollup.compute(live[0], live[-1], status) if r.month in live]
+            rses = RSE.objects.select_related('user').in_bulk({r.rse_id for r in computed if r.rse_id is not None})
+            for r in computed:
+                r.rse = rses.get(r.rse_id)
+            rollups = [r for r in rollups if r.month not in live] + computed
+        return sorted(rollups, key=lambda r: r.month)
+
+
+class CapacityForecast():
+    """
+    Dense per day arrays of committed FTE (as a percentage) for each RSE (i.e. RSE x day) between two dates.
+    Arrays are built from allocations in a single pass by accumulating the changes in commitment at the start and
+    end of each allocation. Free capacity honours the employment of each RSE and can be aggregated to any granularity.
+    """
+    DAY = 'day'
+    WEEK = 'week'
+    MONTH = 'month'
+    GRANULARITY_CHOICES = (
+        (DAY, 'Day'),
+        (WEEK, 'Week'),
+        (MONTH, 'Month'),
+    )
+
+    def __init__(self, from_date: date, until_date: date, rses: List[RSE], allocations: List[Tuple[int, date, date, float]]):
+        """
+        Builds the forecast from the from date until (but not including) the until date.
+        Allocations are tuples of RSE id, start, end and percentage (see build).
+        """
+        self.from_date = from_date
+        self.until_date = until_date
+        self.days = max((until_date - from_date).days, 0)
+        self.rses = rses
+
+        # changes in commitment on each day (with a day after the range for allocations which end after it)
+        index = {rse.id: i for i, rse in enumerate(rses)}
+        changes = [array('d', bytes(8 * (self.days + 1))) for _ in rses]
+        for rse_id, start, end, percentage in allocations:
+            i = index.get(rse_id)
+            if i is None:
+                continue
+            changes[i][min(max((start - from_date).days, 0), self.days)] += percentage
+            changes[i][min(max((end - from_date).days, 0), self.days)] -= percentage
+
+        # committed percentage on each day of the range
+        self.committed = [array('d', it.islice(it.accumulate(c), self.days)) for c in changes]
+
+        # employed days (from employed from until employed until) as a range of day indices
+        self.employed = [(min(max((rse.employed_from - from_date).days, 0), self.days),
+                          min(max((rse.employed_until - from_date).days, 0), self.days)) for rse in rses]
+
+    @staticmethod
+    def build(from_date: date, until_date: date, statuses: List[str] = (Project.FUNDED,)) -> CapacityForecast:
+        """
+        Builds a forecast of all RSEs employed within the date range from the allocations on projects with the given statuses.
+        Uses one query for the RSEs and a second for the allocations (which are loaded as tuples rather than model instances).
+        """
+        rses = list(RSE.objects.select_related('user').filter(employed_from__lt=until_date, employed_until__gt=from_date).order_by('user__last_name', 'user__first_name'))
+        allocations = RSEAllocation.objects.filter(start__lt=until_date, end__gt=from_date, project__status__in=statuses,
+                                                   rse__in=rses).values_list('rse_id', 'start', 'end', 'percentage')
+        return CapacityForecast(from_date, until_date, rses, list(allocations))
+
+    def periods(self, granularity: str) -> List[int]:
+        """
+        Returns the day index of the start of each period. The first period starts on the from date and subsequent
+        periods on each day, Monday or first of the month (depending on the granularity).
+        """
+        if self.days == 0:
+            return []
+        if granularity == CapacityForecast.DAY:
+            return list(range(self.days))
+        if granularity == CapacityForecast.WEEK:
+            return [0] + list(range((7 - self.from_date.weekday()) % 7 or 7, self.days, 7))
+        if granularity == CapacityForecast.MONTH:
+            return [0] + [(m - self.from_date).days for m in months_in_range(next_month(self.from_date), self.until_date - timedelta(days=1))]
+        raise ValueError(f"Unknown granularity '{granularity}'")
+
+    def free(self, granularity: str = WEEK) -> Tuple[List[date], List[List[float]]]:
+        """
+        Returns the start date of each period and the free FTE (as a percentage) of each RSE averaged over each period.
+        Days that an RSE is not employed have no free capacity and days that an RSE is over allocated have no free capacity (rather than negative).
+        """
+        starts = self.periods(granularity)
+        ends = starts[1:] + [self.days]
+        free = []
+        for committed, (employed_from, employed_until) in zip(self.committed, self.employed):
+            # cumulative free capacity so that each period is a difference of two values
+            cumulative = [0.0]
+            cumulative.extend(it.accumulate(max(100.0 - c, 0.0) if employed_from <= d < employed_until else 0.0
+                                            for d, c in enumerate(committed)))
+            free.append([(cumulative[e] - cumulative[s]) / (e - s) for s, e in zip(starts, ends)])
+        return [self.from_date + timedelta(days=s) for s in starts], free
+
+    def to_json(self, granularity: str = WEEK) -> Dict[str, object]:
+        """
+        Returns the free capacity as compact (column) JSON data. I.e. a single list of period start dates and a list of free FTE per RSE
+        """
+        periods, free = self.free(granularity)
+        return {
+            'granularity': granularity,
+            'periods': [p.isoformat() for p in periods],
+            'rses': [{'id': rse.id, 'name': str(rse), 'free': [round(f, 1) for f in rse_free]} for rse, rse_free in zip(self.rses, free)],
+            'team': [round(sum(f), 1) for f in zip(*free)] if free else [0.0] * len(periods),
+        }
@@ -0,0 +1,59 @@
+from datetime import date
+from django.utils import timezone
+from django.urls import reverse_lazy
+from django.test import TestCase
+
+from rse.models import *
+
+
+class AllocationQuerySetTests(TestCase):
+    """
+    Tests for the allocation query set loading profiles
+    """
+
+    def setUp(self):
+        c = Client(name="test_client", department="COM")
+        c.save()
+        self.rses = []
+        for i in range(3):
+            user = User.objects.create_user(username=f'rse{i}', password='12345', first_name='RSE', last_name=str(i))
+            rse = RSE(user=user, employed_from=date(2017, 1, 1), employed_until=date(2025, 1, 1))
+            rse.save()
+            self.rses.append(rse)
+        self.projects = []
+        for i in range(2):
+            p = DirectlyIncurredProject(percentage=50, creator=user, created=timezone.now(), proj_costing_id=str(i),
+                                        name=f"project_{i}", client=c, start=date(2018, 1, 1), end=date(2019, 1, 1), status='F')
+            p.save()
+            self.projects.append(p)
+        for i, rse in enumerate(self.rses):
+            for p in self.projects:
+                RSEAllocation(rse=rse, project=p, percentage=10, start=date(2018, 1 + i, 1), end=date(2018, 6, 1)).save()
+
+    def test_profiles(self):
+        """ Related objects displayed in templates are loaded with a fixed number of queries """
+        with self.assertNumQueries(2):
+            allocations = list(RSEAllocation.objects.for_gantt())
+            self.assertEqual(len(allocations), 6)
+            self.assertEqual([a.start for a in allocations], sorted(a.start for a in allocations))
+            self.assertEqual(str(allocations[0]), "RSE 0 on project_0 at 10.0%")
+            self.assertEqual(allocations[0].rse.user.username, 'rse0')
+
+        with self.assertNumQueries(2):
+            allocations = list(RSEAllocation.objects.filter(project=self.projects[0]).for_table())
+            self.assertEqual([round(a.project_allocation_percentage, 2) for a in allocations], [round(a.effort / 182.5 * 100, 2) for a in allocations])
+            self.assertEqual(allocations[0].rse.user.username, 'rse0')
+
+        with self.assertNumQueries(2):
+            allocations = list(RSEAllocation.objects.filter(rse=self.rses[0]).for_dashboard())
+            self.assertEqual([a.project.type_str for a in allocations], ["Directly Incurred"] * 2)
+            self.assertEqual([a.project.name for a in allocations], ["project_0", "project_1"])
+
+    def test_views(self):
+        """ Allocation views use the loading profiles """
+        self.client.login(username='rse0', password='12345')
+        response = self.client.get(reverse_lazy('project', kwargs={'project_id': self.projects[0].id}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([rse for rse, _ in response.context['commitment_data']], self.rses)
+        response = self.client.get(reverse_lazy('commitment'))
+        self.assertEqual([rse for rse, _ in response.context['commitment_data']], self.rses)
@@ -0,0 +1,66 @@
+from datetime import date, datetime, timedelta
+from io import StringIO
+from django.utils import timezone
+from django.core.management import call_command
+from django.test import TestCase
+
+from rse.models import *
+
+
+class ArchivedAllocationTests(TestCase):
+    """
+    Tests for moving old soft deleted allocations into the archive table
+    """
+
+    def setUp(self):
+        user = User.objects.create_user(username='testuser', password='12345', first_name='Test', last_name='User')
+        self.rse = RSE(user=user, employed_from=date(2017, 1, 1), employed_until=date(2025, 1, 1))
+        self.rse.save()
+        c = Client(name="test_client", department="COM")
+        c.save()
+        self.project = DirectlyIncurredProject(percentage=50, creator=user, created=timezone.now(), proj_costing_id="12345",
+                                               name="test_project", client=c, start=date(2018, 1, 1), end=date(2019, 1, 1), status='F')
+        self.project.save()
+        now = timezone.now()
+        self.live = RSEAllocation(rse=self.rse, project=self.project, percentage=50, start=date(2018, 1, 1), end=date(2018, 2, 1))
+        self.live.save()
+        self.recent = RSEAllocation(rse=self.rse, project=self.project, percentage=20, start=date(2018, 1, 1), end=date(2018, 2, 1))
+        self.recent.save()
+        self.recent.deleted_date = now - timedelta(days=10)
+        self.recent.save()
+        self.old = []
+        for days in (400, 500):
+            a = RSEAllocation(rse=self.rse, project=self.project, percentage=10, start=date(2018, 1, 1), end=date(2018, 2, 1))
+            a.save()
+            a.deleted_date = now - timedelta(days=days)
+            a.save()
+            self.old.append(a)
+
+    def test_archive(self):
+        """ Old deleted allocations are moved with their ids and remain available for auditing """
+        out = StringIO()
+        call_command('archive_allocations', stdout=out)
+        self.assertIn('Archived 2 deleted allocations', out.getvalue())
+
+        self.assertEqual(set(RSEAllocation.objects.all(deleted=True)), {self.live, self.recent})
+        archived = ArchivedRSEAllocation.objects.get(id=self.old[0].id)
+        self.assertEqual((archived.rse, archived.project, archived.percentage), (self.rse, self.project, 10))
+        self.assertEqual(archived.deleted_date, self.old[0].deleted_date)
+
+        # committed effort is unchanged (only the live allocation)
+        self.assertAlmostEqual(Project.objects.get(id=self.project.id).committed_days, 15.5)
+
+        # archived allocations are included for auditing
+        allocations = list(RSEAllocation.objects.all(deleted=True, archived=True).order_by('id'))
+        self.assertEqual([a.id for a in allocations], [self.live.id, self.recent.id] + [a.id for a in self.old])
+        self.assertEqual(allocations[2].deleted_date, self.old[0].deleted_date)
+        self.assertEqual(allocations[2].rse, self.rse)
+
+        # running again archives nothing
+        self.assertEqual(ArchivedRSEAllocation.archive(timezone.now() - timedelta(days=365)), 0)
+
+    def test_archive_batches(self):
+        """ All allocations deleted before the date are archived in batches """
+        self.assertEqual(ArchivedRSEAllocation.archive(timezone.now(), batch_size=1), 3)
+        self.assertEqual(list(RSEAllocation.objects.all(deleted=True)), [self.live])
+        self.assertEqual(RSEAllocation.objects.all(deleted=True, archived=True).count(), 4)
@@ -0,0 +1,71 @@
+from datetime import date
+from django.utils import timezone
+from django.urls import reverse_lazy
+from django.test import TestCase
+
+from rse.models import *
+
+
+class AvailableRSEsTests(TestCase):
+    """
+    Tests for searching for RSEs with free capacity
+    """
+
+    def setUp(self):
+        c = Client(name="test_client", department="COM")
+        c.save()
+        self.rses = {}
+        for name, employed_until in (('busy', date(2025, 1, 1)), ('half', date(2025, 1, 1)), ('free', date(2025, 1, 1)), ('leaving', date(2018, 5, 15))):
+            user = User.objects.create_user(username=name, password='12345', first_name=name, last_name='User')
+            self.rses[name] = RSE(user=user, employed_from=date(2017, 1, 1), employed_until=employed_until)
+            self.rses[name].save()
+        funded = DirectlyIncurredProject(percentage=50, creator=user, created=timezone.now(), proj_costing_id="12345",
+                                         name="funded_project", client=c, start=date(2018, 1, 1), end=date(2019, 1, 1), status='F')
+        funded.save()
+        review = DirectlyIncurredProject(percentage=50, creator=user, created=timezone.now(), proj_costing_id="12346",
+                                         name="review_project", client=c, start=date(2018, 1, 1), end=date(2019, 1, 1), status='R')
+        review.save()
+
+        # busy is 80% allocated for part of the range
+        RSEAllocation(rse=self.rses['busy'], project=funded, percentage=80, start=date(2018, 3, 1), end=date(2018, 4, 1)).save()
+        # half is 50% allocated for the whole range (and a pipeline project)
+        RSEAllocation(rse=self.rses['half'], project=funded, percentage=50, start=date(2017, 1, 1), end=date(2019, 1, 1)).save()
+        RSEAllocation(rse=self.rses['half'], project=review, percentage=30, start=date(2018, 1, 1), end=date(2019, 1, 1)).save()
+
+    def test_commitment_peaks(self):
+        """ Peak and average commitment are limited to the date range """
+        allocations = [(1, date(2017, 1, 1), date(2018, 2, 1), 50),
+                       (1, date(2018, 1, 11), date(2018, 1, 21), 30)]
+        peaks = RSEAllocation.commitment_peaks(allocations, date(2018, 1, 1), date(2018, 1, 31))
+        self.assertEqual(peaks[1][0], 80)
+        self.assertAlmostEqual(peaks[1][1], 50 + 30 * 10 / 30)
+
+    def test_available(self):
+        """ RSEs with enough free capacity throughout the range are ranked by fit """
+        available = RSE.available(date(2018, 1, 1), date(2018, 6, 1), 40)
+        self.assertEqual([(a[0].user.username, a[1]) for a in available], [('half', 50), ('free', 100)])
+
+        # busy only has 20% free for part of the range
+        available = RSE.available(date(2018, 1, 1), date(2018, 6, 1), 20)
+        self.assertEqual([a[0].user.username for a in available], ['busy', 'half', 'free'])
+        self.assertAlmostEqual(available[0][2], 100 - 80 * 31 / 151)
+
+        # review projects
+        available = RSE.available(date(2018, 1, 1), date(2018, 6, 1), 40, ['F', 'R'])
+        self.assertEqual([a[0].user.username for a in available], ['free'])
+
+        # leaving is employed for the whole range
+        available = RSE.available(date(2018, 1, 1), date(2018, 5, 1), 40)
+        self.assertIn(self.rses['leaving'], [a[0] for a in available])
+
+    def test_view(self):
+        """ Search view returns available RSEs """
+        self.client.login(username='free', password='12345')
+        # defaults to the next 6 months
+        response = self.client.get(reverse_lazy('available_rses'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['from_date'], timezone.now().date())
+
+        response = self.client.get(reverse_lazy('available_rses'), {'filter_range': '01/01/2018 - 01/06/2018', 'percentage': 40, 'status': 'L'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([a[0] for a in response.context['available_rses']], [self.rses['free']])
@@ -0,0 +1,90 @@
+from datetime import date
+from django.utils import timezone
+from django.urls import reverse_lazy
+from django.test import TestCase
+
+from rse.models import *
+
+
+class CapacityForecastTests(TestCase):
+    """
+    Tests for the per day capacity forecast arrays and JSON API
+    """
+
+    def setUp(self):
+        user = User.objects.create_user(username='testuser', password='12345', first_name='Test', last_name='User')
+        self.rse = RSE(user=user, employed_from=date(2017, 1, 1), employed_until=date(2025, 1, 1))
+        self.rse.save()
+        user2 = User.objects.create_user(username='testuser2', password='12345', first_name='Other', last_name='User')
+        # employed from the 15th January 2018
+        self.rse2 = RSE(user=user2, employed_from=date(2018, 1, 15), employed_until=date(2025, 1, 1))
+        self.rse2.save()
+        c = Client(name="test_client", department="COM")
+        c.save()
+        funded = DirectlyIncurredProject(percentage=50, creator=user, created=timezone.now(), proj_costing_id="12345",
+                                         name="funded_project", client=c, start=date(2018, 1, 1), end=date(2019, 1, 1), status='F')
+        funded.save()
+        review = DirectlyIncurredProject(percentage=50, creator=user, created=timezone.now(), proj_costing_id="12346",
+                                         name="review_project", client=c, start=date(2018, 1, 1), end=date(2019, 1, 1), status='R')
+        review.save()
+
+        # 50% and 70% (over allocated) from Wednesday 10th January 2018
+        RSEAllocation(rse=self.rse, project=funded, percentage=50, start=date(2018, 1, 10), end=date(2019, 1, 1)).save()
+        RSEAllocation(rse=self.rse, project=funded, percentage=70, start=date(2018, 1, 10), end=date(2018, 1, 12)).save()
+        RSEAllocation(rse=self.rse2, project=review, percentage=20, start=date(2017, 1, 1), end=date(2019, 1, 1)).save()
+
+    def test_committed(self):
+        """ Committed FTE is accumulated per day and allocations outside of the range are clipped """
+        forecast = CapacityForecast.build(date(2018, 1, 1), date(2018, 3, 1), ['F', 'R'])
+        committed = dict(zip(forecast.rses, forecast.committed))
+        self.assertEqual(len(committed[self.rse]), 59)
+        self.assertEqual(committed[self.rse][8], 0)
+        self.assertEqual(committed[self.rse][9], 120)
+        self.assertEqual(committed[self.rse][11], 50)
+        self.assertEqual(committed[self.rse2][0], 20)
+        self.assertEqual(committed[self.rse2][58], 20)
+
+    def test_free(self):
+        """ Free capacity is averaged over periods and is zero when over allocated or not employed """
+        forecast = CapacityForecast.build(date(2018, 1, 1), date(2018, 3, 1))
+        # Monday 1st January 2018 so weeks are whole weeks
+        periods, free = forecast.free(CapacityForecast.WEEK)
+        self.assertEqual(periods[1], date(2018, 1, 8))
+        rse_free = dict(zip(forecast.rses, free))
+        # Monday and Tuesday free, two days over allocated then three at 50%
+        self.assertAlmostEqual(rse_free[self.rse][1], (2 * 100 + 3 * 50) / 7)
+        # review projects are not included by default and not employed until Monday 15th January
+        self.assertEqual(rse_free[self.rse2][1], 0)
+        self.assertEqual(rse_free[self.rse2][2], 100)
+
+        periods, free = forecast.free(CapacityForecast.MONTH)
+        self.assertEqual(periods, [date(2018, 1, 1), date(2018, 2, 1)])
+        self.assertAlmostEqual(dict(zip(forecast.rses, free))[self.rse2][0], 17 / 31 * 100)
+
+    def test_api(self):
+        """ Forecast API returns compact columns and validates parameters """
+        self.client.login(username='testuser', password='12345')
+        response = self.client.get(reverse_lazy('capacity_forecast'), {'from_date': '2018-01-03', 'until_date': '2018-06-01', 'granularity': 'month', 'status': 'L'})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['periods'][:2], ['2018-01-03', '2018-02-01'])
+        self.assertEqual(len(data['rses']), 2)
+        self.assertEqual(len(data['team']), 5)
+        free = {r['name']: r['free'] for r in data['rses']}
+        self.assertEqual(free['Other User'][1], 80)
+        self.assertEqual(free['Test User'][1], 50)
+
+        response = self.client.get(reverse_lazy('capacity_forecast'), {'from_date': '2018-06-01', 'until_date': '2018-01-01'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Error', response.json())
+
+        # the forecast period is limited (including when one date is a default)
+        for params in ({'from_date': '0001-01-01', 'until_date': '9999-12-31', 'granularity': 'day'}, {'until_date': '9999-12-31'}, {'from_date': '9999-12-01'}):
+            response = self.client.get(reverse_lazy('capacity_forecast'), params)
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('Error', response.json())
+
+        # defaults to 18 months of weeks from today
+        response = self.client.get(reverse_lazy('capacity_forecast'))
+        self.assertEqual(response.json()['granularity'], 'week')
+        self.assertTrue(77 <= len(response.json()['periods']) <= 80)
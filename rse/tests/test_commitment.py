@@ -0,0 +1,64 @@
+from datetime import date
+from django.utils import timezone
+from django.core.cache import cache
+from django.test import TestCase
+
+from rse.models import *
+
+
+class CommitmentSummaryCacheTests(TestCase):
+    """
+    Tests for the memoised (version keyed) RSE commitment summaries
+    """
+
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create_user(username='testuser', password='12345', first_name='Test', last_name='User')
+        self.rse = RSE(user=user, employed_from=date(2017, 1, 1), employed_until=date(2025, 1, 1))
+        self.rse.save()
+        c = Client(name="test_client", department="COM")
+        c.save()
+        self.project = DirectlyIncurredProject(percentage=50, creator=user, created=timezone.now(), proj_costing_id="12345",
+                                               name="test_project", client=c, start=date(2018, 1, 1), end=date(2019, 1, 1), status='F')
+        self.project.save()
+        self.allocation = RSEAllocation(rse=self.rse, project=self.project, percentage=50, start=date(2018, 1, 1), end=date(2019, 1, 1))
+        self.allocation.save()
+
+    def funded_allocations(self):
+        return RSEAllocation.objects.filter(rse=self.rse, project__status='F')
+
+    def test_cached(self):
+        """ Repeat summaries only query the allocation version """
+        summary = RSEAllocation.cached_commitment_summary(self.rse, self.funded_allocations())
+        self.assertEqual(summary, RSEAllocation.commitment_summary(self.funded_allocations()))
+        with self.assertNumQueries(1):
+            cached = RSEAllocation.cached_commitment_summary(self.rse, self.funded_allocations())
+            # related objects are cached with the summary
+            str(cached[0][2][0])
+        self.assertEqual(cached, summary)
+
+    def test_keyed_on_window(self):
+        """ Summaries of different date windows are cached separately """
+        full = RSEAllocation.cached_commitment_summary(self.rse, self.funded_allocations())
+        window = RSEAllocation.cached_commitment_summary(self.rse, self.funded_allocations(), date(2018, 6, 1), date(2018, 7, 1))
+        self.assertEqual(full[0][0], date(2018, 1, 1))
+        self.assertEqual(window[0][0], date(2018, 6, 1))
+
+    def test_version_changes(self):
+        """ Created and deleted allocations and changes to project status all invalidate the cached summary """
+        RSEAllocation.cached_commitment_summary(self.rse, self.funded_allocations())
+
+        a = RSEAllocation(rse=self.rse, project=self.project, percentage=20, start=date(2018, 1, 1), end=date(2019, 1, 1))
+        a.save()
+        summary = RSEAllocation.cached_commitment_summary(self.rse, self.funded_allocations())
+        self.assertEqual(summary[0][1], 70)
+
+        a.deleted_date = timezone.now()
+        a.save()
+        summary = RSEAllocation.cached_commitment_summary(self.rse, self.funded_allocations())
+        self.assertEqual(summary[0][1], 50)
+
+        self.project.status = 'R'
+        self.project.save()
+        summary = RSEAllocation.cached_commitment_summary(self.rse, self.funded_allocations())
+        self.assertEqual(summary, [])
@@ -0,0 +1,65 @@
+from datetime import date, timedelta
+from django.utils import timezone
+from django.core.cache import cache
+from django.test import TestCase
+
+from rse.models import *
+
+
+class RSEDashboardTests(TestCase):
+    """
+    Tests for the (cached) RSE dashboard
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.now = timezone.now().date()
+        self.user = User.objects.create_user(username='testuser', password='12345', first_name='Test', last_name='User')
+        self.rse = RSE(user=self.user, employed_from=date(2017, 1, 1), employed_until=date(2035, 1, 1))
+        self.rse.save()
+        c = Client(name="test_client", department="COM")
+        c.save()
+        self.projects = {}
+        for status in ('F', 'R', 'N'):
+            self.projects[status] = DirectlyIncurredProject(percentage=50, creator=self.user, created=timezone.now(), proj_costing_id="12345",
+                                                            name=f"project_{status}", client=c, start=self.now - timedelta(days=100),
+                                                            end=self.now + timedelta(days=100), status=status)
+            self.projects[status].save()
+        day = timedelta(days=1)
+        self.active = RSEAllocation(rse=self.rse, project=self.projects['F'], percentage=40, start=self.now - 10*day, end=self.now + 10*day)
+        self.active.save()
+        self.future = RSEAllocation(rse=self.rse, project=self.projects['R'], percentage=20, start=self.now + 5*day, end=self.now + 50*day)
+        self.future.save()
+        # past, rejected and other RSE allocations are not included
+        RSEAllocation(rse=self.rse, project=self.projects['F'], percentage=30, start=self.now - 50*day, end=self.now - 20*day).save()
+        RSEAllocation(rse=self.rse, project=self.projects['N'], percentage=30, start=self.now - 10*day, end=self.now + 10*day).save()
+        other = RSE(user=User.objects.create_user(username='otheruser', password='12345'))
+        other.save()
+        RSEAllocation(rse=other, project=self.projects['F'], percentage=10, start=self.now - 10*day, end=self.now + 10*day).save()
+
+    def test_dashboard(self):
+        """ Highlights are counted in an aggregate query and allocations loaded in a single query (with a project prefetch) """
+        with self.assertNumQueries(3):
+            dashboard = RSEAllocation.rse_dashboard(self.rse, self.now)
+            [a.project.name for a in dashboard['active_allocations'] + dashboard['future_allocations']]
+        self.assertEqual(dashboard['current_capacity'], self.rse.current_capacity)
+        self.assertEqual((dashboard['active_allocation_count'], dashboard['possible_allocation_count']), (1, 2))
+        self.assertEqual((dashboard['active_allocations'], dashboard['future_allocations']), ([self.active], [self.future]))
+
+    def test_cached(self):
+        """ The dashboard is cached until the RSEs allocations change """
+        RSEAllocation.cached_rse_dashboard(self.rse, self.now)
+        with self.assertNumQueries(1):
+            dashboard = RSEAllocation.cached_rse_dashboard(self.rse, self.now)
+            self.assertEqual(dashboard['active_allocations'][0].project.name, 'project_F')
+
+        RSEAllocation(rse=self.rse, project=self.projects['F'], percentage=10, start=self.now, end=self.now + timedelta(days=5)).save()
+        dashboard = RSEAllocation.cached_rse_dashboard(self.rse, self.now)
+        self.assertEqual(dashboard['current_capacity'], 50)
+
+        self.client.login(username='testuser', password='12345')
+        response = self.client.get('/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['highlight_current_capacity'], 50)
+        self.assertEqual(response.context['highlight_active_funded_projects'], 1)
+        self.assertEqual(response.context['MIN_START_DATE_FILTER_RANGE'], self.now - timedelta(days=100))
@@ -0,0 +1,62 @@
+from datetime import date, timedelta
+from django.utils import timezone
+from django.core.cache import cache
+from django.test import TestCase, Client as TestClient
+
+from rse.models import *
+
+
+class CommitmentDownsampleTests(TestCase):
+    """
+    Tests for the downsampling of commitment graph series
+    """
+
+    def series(self, days: int):
+        """ A daily step series with a single one day peak of 100 """
+        start = date(2018, 1, 1)
+        return [(start + timedelta(days=i), 100 if i == 123 else i % 7 * 10, []) for i in range(days)]
+
+    def test_short_series(self):
+        """ Series within the resolution are unchanged """
+        series = self.series(20)
+        self.assertIs(RSEAllocation.downsample_commitment(series, 20), series)
+        self.assertIs(RSEAllocation.downsample_commitment(series, None), series)
+
+    def test_downsample(self):
+        """ Series are reduced to at most the resolution keeping the peak, first and last points in date order """
+        series = self.series(1000)
+        for resolution in (10, 11, 50, 300):
+            downsampled = RSEAllocation.downsample_commitment(series, resolution)
+            self.assertLessEqual(len(downsampled), resolution)
+            self.assertIn(series[123], downsampled)
+            self.assertEqual((downsampled[0], downsampled[-1]), (series[0], series[-1]))
+            self.assertEqual(downsampled, sorted(downsampled, key=lambda p: p[0]))
+
+        # at a higher resolution the weekly peaks are kept (other than the week of the single peak)
+        downsampled = RSEAllocation.downsample_commitment(series, 300)
+        self.assertGreaterEqual(sum(p[1] == 60 for p in downsampled), sum(p[1] == 60 for p in series) - 1)
+
+    def test_view(self):
+        """ The commitment view plots at most the requested resolution points for each RSE """
+        cache.clear()
+        user = User.objects.create_user(username='testuser', password='12345', first_name='Test', last_name='User')
+        rse = RSE(user=user, employed_from=date(2017, 1, 1), employed_until=date(2025, 1, 1))
+        rse.save()
+        c = Client(name="test_client", department="COM")
+        c.save()
+        project = DirectlyIncurredProject(percentage=50, creator=user, created=timezone.now(), proj_costing_id="12345",
+                                          name="test_project", client=c, start=date(2018, 1, 1), end=date(2020, 1, 1), status='F')
+        project.save()
+        for i in range(30):
+            start = date(2018, 1, 1) + timedelta(days=i * 20)
+            RSEAllocation(rse=rse, project=project, percentage=10 + i, start=start, end=start + timedelta(days=10)).save()
+
+        client = TestClient()
+        client.login(username='testuser', password='12345')
+        response = client.get('/commitment', {'filter_range': '01/01/2018 - 01/01/2020', 'status': 'A'})
+        self.assertEqual(len(response.context['commitment_data'][0][1]), 60)
+
+        response = client.get('/commitment', {'filter_range': '01/01/2018 - 01/01/2020', 'status': 'A', 'resolution': 10})
+        summary = response.context['commitment_data'][0][1]
+        self.assertLessEqual(len(summary), 10)
+        self.assertEqual(max(value for _, value, _ in summary), 39)
@@ -0,0 +1,74 @@
+from datetime import date
+from django.utils import timezone
+from django.urls import reverse_lazy
+from django.test import TestCase
+
+from rse.models import *
+from rse.forms import project_statuses
+
+
+class AllocationExportTests(TestCase):
+    """
+    Tests for the streamed CSV export of allocations
+    """
+
+    def setUp(self):
+        self.admin_user = User.objects.create_superuser(username='admin', password='12345')
+        user = User.objects.create_user(username='testuser', password='12345', first_name='Test', last_name='User')
+        self.rse = RSE(user=user, employed_from=date(2017, 1, 1), employed_until=date(2025, 1, 1))
+        self.rse.save()
+        c = Client(name="test_client", department="COM")
+        c.save()
+
+        self.funded = DirectlyIncurredProject(percentage=50, creator=user, created=timezone.now(), proj_costing_id="12345",
+                                              name="funded_project", client=c, start=date(2018, 1, 1), end=date(2019, 1, 1), status='F')
+        self.funded.save()
+        self.review = DirectlyIncurredProject(percentage=50, creator=user, created=timezone.now(), proj_costing_id="12346",
+                                              name="review_project", client=c, start=date(2020, 1, 1), end=date(2021, 1, 1), status='R')
+        self.review.save()
+
+        RSEAllocation(rse=self.rse, project=self.funded, percentage=50, start=date(2018, 1, 1), end=date(2019, 1, 1)).save()
+        RSEAllocation(rse=self.rse, project=self.review, percentage=20, start=date(2020, 1, 1), end=date(2021, 1, 1)).save()
+        RSEAllocation(rse=self.rse, project=self.review, percentage=30, start=date(2020, 1, 1), end=date(2021, 1, 1), deleted_date=timezone.now()).save()
+
+    def export_rows(self, params):
+        """ Returns the CSV rows of the streamed export as lists of strings """
+        response = self.client.get(reverse_lazy('export_allocations'), params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        content = b''.join(response.streaming_content).decode()
+        return [line.split(',') for line in content.splitlines()]
+
+    def test_export_requires_superuser(self):
+        """ RSE users are redirected to login """
+        self.client.login(username='testuser', password='12345')
+        response = self.client.get(reverse_lazy('export_allocations'))
+        self.assertEqual(response.status_code, 302)
+
+    def test_export_filters(self):
+        """ Export honours the date range and status filters and excludes deleted allocations """
+        self.client.login(username='admin', password='12345')
+
+        # All statuses over the full range (header plus two non deleted allocations)
+        rows = self.export_rows({'filter_range': '01/01/2017 - 01/01/2022', 'status': 'A'})
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0][0], 'Allocation ID')
+        self.assertEqual(rows[1][6], 'funded_project')
+
+        # Funded only
+        rows = self.export_rows({'filter_range': '01/01/2017 - 01/01/2022', 'status': 'F'})
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][7], 'F')
+
+        # Date range only covering the review project
+        rows = self.export_rows({'filter_range': '01/06/2020 - 01/07/2020', 'status': 'A'})
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][6], 'review_project')
+
+    def test_project_statuses(self):
+        """ Status filter choices select the same project statuses in every view """
+        self.assertEqual(project_statuses('R'), ['R'])
+        self.assertEqual(project_statuses('L'), ['F', 'R'])
+        self.assertEqual(project_statuses('U'), ['F', 'R', 'P'])
+        self.assertEqual(sorted(project_statuses('A')), ['F', 'P', 'R', 'X'])
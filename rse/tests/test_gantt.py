@@ -0,0 +1,81 @@
+from datetime import date
+from django.utils import timezone
+from django.urls import reverse_lazy
+from django.test import TestCase
+
+from rse.models import *
+
+
+class GanttTests(TestCase):
+    """
+    Tests for the columnar gantt data endpoints
+    """
+
+    def setUp(self):
+        c = Client(name="test_client", department="COM")
+        c.save()
+        self.rses = []
+        for name in ('alice', 'bob'):
+            user = User.objects.create_user(username=name, password='12345', first_name=name.title(), last_name='User')
+            rse = RSE(user=user, employed_from=date(2017, 1, 1), employed_until=date(2025, 1, 1))
+            rse.save()
+            self.rses.append(rse)
+        self.funded = DirectlyIncurredProject(percentage=50, creator=user, created=timezone.now(), proj_costing_id="12345",
+                                              name="funded_project", client=c, start=date(2018, 1, 1), end=date(2019, 1, 1), status='F')
+        self.funded.save()
+        self.review = DirectlyIncurredProject(percentage=20, creator=user, created=timezone.now(), proj_costing_id="12346",
+                                              name="review_project", client=c, start=date(2017, 12, 1), end=date(2019, 1, 1), status='R')
+        self.review.save()
+        self.allocations = [
+            RSEAllocation(rse=self.rses[0], project=self.funded, percentage=50, start=date(2018, 1, 1), end=date(2018, 7, 1)),
+            RSEAllocation(rse=self.rses[1], project=self.funded, percentage=25, start=date(2018, 3, 1), end=date(2019, 1, 1)),
+            RSEAllocation(rse=self.rses[0], project=self.review, percentage=20, start=date(2018, 6, 1), end=date(2018, 9, 1))]
+        for a in self.allocations:
+            a.save()
+        self.client.login(username='alice', password='12345')
+
+    def test_gantt_columns(self):
+        """ Allocations are returned as parallel lists referring to groups and labels by index """
+        data = RSEAllocation.gantt_columns(RSEAllocation.objects.all(), 'rse')
+        self.assertEqual(data['origin'], '2018-01-01')
+        self.assertEqual(data['groups']['id'], [r.id for r in self.rses])
+        self.assertEqual(data['groups']['name'], ['Alice User', 'Bob User'])
+        self.assertEqual(data['labels']['name'], ['funded_project', 'review_project'])
+        tasks = data['tasks']
+        self.assertEqual(tasks['id'], [a.id for a in (self.allocations[0], self.allocations[2], self.allocations[1])])
+        self.assertEqual(tasks['group'], [0, 0, 1])
+        self.assertEqual(tasks['label'], [0, 1, 0])
+        self.assertEqual(tasks['start'], [0, 151, 59])
+        self.assertEqual(tasks['end'], [181, 243, 365])
+        self.assertEqual(tasks['percentage'], [50, 20, 25])
+
+        # project groups have dates (the origin includes the project start)
+        data = RSEAllocation.gantt_columns(RSEAllocation.objects.filter(project=self.review), 'project', group_ids=[self.review.id])
+        self.assertEqual(data['origin'], '2017-12-01')
+        self.assertEqual((data['groups']['start'], data['groups']['end'], data['groups']['percentage']), ([0], [396], [20]))
+
+    def test_views(self):
+        """ Gantt data is filtered like the pages and can be revalidated with an ETag """
+        response = self.client.get(reverse_lazy('project_gantt', kwargs={'project_id': self.funded.id}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['labels']['name'], ['Alice User', 'Bob User'])
+        self.assertIn('private', response['Cache-Control'])
+
+        # not modified until an allocation changes
+        etag = response['ETag']
+        response = self.client.get(reverse_lazy('project_gantt', kwargs={'project_id': self.funded.id}), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.allocations[1].deleted_date = timezone.now()
+        self.allocations[1].save()
+        response = self.client.get(reverse_lazy('project_gantt', kwargs={'project_id': self.funded.id}), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['labels']['name'], ['Alice User'])
+
+        response = self.client.get(reverse_lazy('rse_gantt', kwargs={'rse_username': 'alice'}), {'filter_range': '01/01/2018 - 01/01/2019', 'status': 'F'})
+        self.assertEqual(response.json()['tasks']['id'], [self.allocations[0].id])
+        response = self.client.get(reverse_lazy('commitment_gantt'))
+        self.assertEqual(response.json()['tasks']['id'], [self.allocations[0].id, self.allocations[2].id])
+
+        # pages request the gantt data
+        response = self.client.get(reverse_lazy('rse', kwargs={'rse_username': 'alice'}), {'status': 'F'})
+        self.assertContains(response, f"{reverse_lazy('rse_gantt', kwargs={'rse_username': 'alice'})}?status\\u003DF")
@@ -0,0 +1,77 @@
+from datetime import date
+from django.utils import timezone
+from django.urls import reverse_lazy
+from django.test import TestCase, override_settings
+
+from rse.models import *
+from rse.forms import ProjectAllocationForm
+
+
+class OverAllocationTests(TestCase):
+    """
+    Tests for detecting RSEs allocated more than 100% FTE
+    """
+
+    def setUp(self):
+        self.admin_user = User.objects.create_superuser(username='admin', password='12345')
+        user = User.objects.create_user(username='testuser', password='12345', first_name='Test', last_name='User')
+        self.rse = RSE(user=user, employed_from=date(2017, 1, 1), employed_until=date(2025, 1, 1))
+        self.rse.save()
+        c = Client(name="test_client", department="COM")
+        c.save()
+        self.funded = DirectlyIncurredProject(percentage=50, creator=user, created=timezone.now(), proj_costing_id="12345",
+                                              name="funded_project", client=c, start=date(2018, 1, 1), end=date(2019, 1, 1), status='F')
+        self.funded.save()
+        self.review = DirectlyIncurredProject(percentage=50, creator=user, created=timezone.now(), proj_costing_id="12346",
+                                              name="review_project", client=c, start=date(2018, 1, 1), end=date(2019, 1, 1), status='R')
+        self.review.save()
+        RSEAllocation(rse=self.rse, project=self.funded, percentage=60, start=date(2018, 1, 1), end=date(2018, 7, 1)).save()
+        RSEAllocation(rse=self.rse, project=self.funded, percentage=30, start=date(2018, 3, 1), end=date(2019, 1, 1)).save()
+        # review projects are not considered commitments
+        RSEAllocation(rse=self.rse, project=self.review, percentage=50, start=date(2018, 1, 1), end=date(2019, 1, 1)).save()
+
+    def test_sweep(self):
+        """ Periods over the limit are merged and report their peak """
+        allocations = [(1, date(2018, 1, 1), date(2018, 7, 1), 60),
+                       (1, date(2018, 3, 1), date(2019, 1, 1), 30),
+                       (1, date(2018, 4, 1), date(2018, 5, 1), 20),
+                       (1, date(2018, 4, 15), date(2018, 6, 1), 10),
+                       # back to back allocations are not over allocated
+                       (2, date(2018, 1, 1), date(2018, 2, 1), 100),
+                       (2, date(2018, 2, 1), date(2018, 3, 1), 100),
+                       # percentages which sum to 100 with floating point error
+                       (3, date(2018, 1, 1), date(2018, 2, 1), 70.1),
+                       (3, date(2018, 1, 1), date(2018, 2, 1), 29.9)]
+        over = RSEAllocation.over_allocations(allocations)
+        self.assertEqual(over, {1: [(date(2018, 4, 1), date(2018, 5, 1), 120)]})
+        self.assertEqual(RSEAllocation.over_allocations(allocations, limit=110), {1: [(date(2018, 4, 15), date(2018, 5, 1), 120)]})
+
+    def test_form(self):
+        """ Allocations which would take the RSE over 100% on funded projects are rejected """
+        data = {'rse': self.rse.id, 'percentage': 20, 'start': '01/02/2018', 'end': '01/05/2018'}
+        form = ProjectAllocationForm(data, project=self.funded)
+        self.assertFalse(form.is_valid())
+        self.assertIn('110% FTE', form.errors['percentage'][0])
+        self.assertIn('01/03/2018 until 01/05/2018', form.errors['percentage'][0])
+
+        # allowed before the second funded allocation starts
+        data['end'] = '01/03/2018'
+        self.assertTrue(ProjectAllocationForm(data, project=self.funded).is_valid())
+
+        # allocations of the review project are considered when allocating to the review project
+        data['percentage'] = 50
+        self.assertFalse(ProjectAllocationForm(data, project=self.review).is_valid())
+
+        with override_settings(MAX_ALLOCATION_PERCENTAGE=None):
+            data['end'] = '01/05/2018'
+            self.assertTrue(ProjectAllocationForm(data, project=self.funded).is_valid())
+
+    def test_report(self):
+        """ Report lists over allocations for the selected status """
+        self.client.login(username='admin', password='12345')
+        response = self.client.get(reverse_lazy('over_allocations'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['over_allocations'], [])
+
+        response = self.client.get(reverse_lazy('over_allocations'), {'filter_range': '01/01/2018 - 01/02/2019', 'status': 'L'})
+        self.assertEqual(response.context['over_allocations'], [(self.rse, date(2018, 1, 1), date(2018, 7, 1), 140)])
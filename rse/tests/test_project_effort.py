@@ -0,0 +1,92 @@
+from datetime import date
+from io import StringIO
+from django.utils import timezone
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from rse.models import *
+
+
+class ProjectEffortTests(TestCase):
+    """
+    Tests for the stored project and committed days of projects
+    """
+
+    def setUp(self):
+        user = User.objects.create_user(username='testuser', password='12345', first_name='Test', last_name='User')
+        self.rse = RSE(user=user, employed_from=date(2017, 1, 1), employed_until=date(2025, 1, 1))
+        self.rse.save()
+        c = Client(name="test_client", department="COM")
+        c.save()
+        # 365 days at 50% is 182.5 project days
+        self.project = DirectlyIncurredProject(percentage=50, creator=user, created=timezone.now(), proj_costing_id="12345",
+                                               name="test_project", client=c, start=date(2018, 1, 1), end=date(2019, 1, 1), status='F')
+        self.project.save()
+        self.other = DirectlyIncurredProject(percentage=100, creator=user, created=timezone.now(), proj_costing_id="12346",
+                                             name="other_project", client=c, start=date(2018, 1, 1), end=date(2018, 1, 11), status='F')
+        self.other.save()
+
+    def test_maintained(self):
+        """ Committed days follow allocations as they are created, changed and deleted """
+        self.assertEqual(self.project.project_days, 182.5)
+        self.assertEqual(self.project.committed_days, 0)
+
+        a = RSEAllocation(rse=self.rse, project=self.project, percentage=50, start=date(2018, 1, 1), end=date(2018, 7, 2))
+        a.save()
+        # cached project is updated
+        self.assertEqual(self.project.committed_days, 91)
+        self.assertEqual(self.project.percent_allocated, round(91 / 182.5 * 100, 2))
+
+        # change the allocation (and move it to another project)
+        a = RSEAllocation.objects.get(id=a.id)
+        a.percentage = 100
+        a.save()
+        self.assertEqual(Project.objects.get(id=self.project.id).committed_days, 182)
+        a.project = self.other
+        a.save()
+        self.assertEqual(Project.objects.get(id=self.project.id).committed_days, 0)
+        self.assertEqual(Project.objects.get(id=self.other.id).committed_days, 182)
+
+        # soft delete then hard delete
+        a.deleted_date = timezone.now()
+        a.save()
+        self.assertEqual(Project.objects.get(id=self.other.id).committed_days, 0)
+        a.save()
+        a.delete()
+        self.assertEqual(Project.objects.get(id=self.other.id).committed_days, 0)
+
+        # stale project instances do not overwrite committed days and changes to fte update project days
+        RSEAllocation(rse=self.rse, project=self.project, percentage=50, start=date(2018, 1, 1), end=date(2018, 1, 11)).save()
+        stale = DirectlyIncurredProject.objects.get(id=self.other.id)
+        RSEAllocation(rse=self.rse, project=self.other, percentage=50, start=date(2018, 1, 1), end=date(2018, 1, 11)).save()
+        stale.percentage = 10
+        stale.save()
+        other = Project.objects.get(id=self.other.id)
+        self.assertEqual((other.project_days, other.committed_days), (1, 5))
+
+    def test_annotate_percent_allocated(self):
+        """ Projects can be ordered and filtered by percent allocated in SQL """
+        RSEAllocation(rse=self.rse, project=self.other, percentage=100, start=date(2018, 1, 1), end=date(2018, 1, 11)).save()
+        RSEAllocation(rse=self.rse, project=self.project, percentage=50, start=date(2018, 1, 1), end=date(2018, 2, 1)).save()
+        projects = Project.annotate_percent_allocated(Project.objects.all()).order_by('allocated_percent')
+        self.assertEqual([p.id for p in projects], [self.project.id, self.other.id])
+        self.assertEqual(list(projects.filter(allocated_percent__gte=100)), [self.other])
+        self.assertAlmostEqual(projects[0].allocated_percent, self.project.percent_allocated, places=2)
+
+    def test_check_effort(self):
+        """ Inconsistent stored values are reported and fixed by the management command """
+        RSEAllocation(rse=self.rse, project=self.project, percentage=50, start=date(2018, 1, 1), end=date(2018, 2, 1)).save()
+        out = StringIO()
+        call_command('check_project_effort', stdout=out)
+        self.assertIn('All projects are consistent', out.getvalue())
+
+        Project.objects.filter(id=self.project.id).update(committed_days=0, project_days=0)
+        with self.assertRaises(CommandError):
+            call_command('check_project_effort', stdout=StringIO())
+        out = StringIO()
+        call_command('check_project_effort', '--fix', stdout=out)
+        self.assertIn('Fixed 1 inconsistent projects', out.getvalue())
+        p = Project.objects.get(id=self.project.id)
+        self.assertEqual((p.project_days, p.committed_days), (182.5, 15.5))
+        self.assertEqual(Project.check_effort(), [])
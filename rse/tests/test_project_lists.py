@@ -0,0 +1,51 @@
+from datetime import date
+from django.utils import timezone
+from django.urls import reverse_lazy
+from django.test import TestCase
+
+from rse.models import *
+
+
+class ProjectListTests(TestCase):
+    """
+    Tests for the non polymorphic project list query set
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='12345', first_name='Test', last_name='User')
+        self.client_model = Client(name="test_client", department="COM")
+        self.client_model.save()
+        for i in range(3):
+            DirectlyIncurredProject(percentage=50 + i, creator=self.user, created=timezone.now(), proj_costing_id=str(i),
+                                    name=f"project_{i}", client=self.client_model, start=date(2018, 1, 1), end=date(2019, 1, 1), status='F').save()
+
+    def test_list_objects(self):
+        """ Typed projects with subclass fields and joins are returned by a single query """
+        with self.assertNumQueries(1):
+            projects = list(Project.list_objects().select_related('client').order_by('id'))
+            self.assertTrue(all(isinstance(p, DirectlyIncurredProject) for p in projects))
+            self.assertEqual([p.fte for p in projects], [50, 51, 52])
+            self.assertEqual([p.type_str for p in projects], ["Directly Incurred"] * 3)
+            self.assertEqual(projects[0].client.name, "test_client")
+
+    def test_views(self):
+        """ Project list views show all projects """
+        self.client.login(username='testuser', password='12345')
+        response = self.client.get(reverse_lazy('projects'))
+        self.assertEqual(len(response.context['projects']), 3)
+        response = self.client.get(reverse_lazy('client', kwargs={'client_id': self.client_model.id}))
+        self.assertEqual(len(response.context['projects']), 3)
+
+    def test_views_percent_allocated(self):
+        """ Project list views are ordered by the percent allocated annotated in SQL (least allocated first) """
+        rse = RSE(user=self.user, employed_from=date(2017, 1, 1), employed_until=date(2025, 1, 1))
+        rse.save()
+        first = Project.objects.order_by('id').first()
+        RSEAllocation(rse=rse, project=first, percentage=50, start=date(2018, 1, 1), end=date(2019, 1, 1)).save()
+        self.client.login(username='testuser', password='12345')
+        for response in (self.client.get(reverse_lazy('projects')),
+                         self.client.get(reverse_lazy('client', kwargs={'client_id': self.client_model.id}))):
+            projects = list(response.context['projects'])
+            self.assertEqual(projects[-1].id, first.id)
+            self.assertEqual([p.allocated_percent for p in projects], [p.percent_allocated for p in projects])
+            self.assertContains(response, 'data-order="100.00"')
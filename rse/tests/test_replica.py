@@ -0,0 +1,61 @@
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import TestCase, RequestFactory, override_settings
+
+from RSEAdmin.routers import ReadReplicaRouter, ReplicaPinningMiddleware, read_replica, REPLICA_PIN_COOKIE
+from rse.models import *
+
+
+# The replica is the default database in tests (so that views can run) but routing decisions are still observable
+@override_settings(DATABASE_REPLICA='default')
+class ReadReplicaRouterTests(TestCase):
+    """
+    Tests for routing the reads of reporting views to a read replica
+    """
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.router = ReadReplicaRouter()
+        self.routed = []
+
+    def view(self, request):
+        """ Records where reads are routed before and after any write """
+        self.routed.append(self.router.db_for_read(Project))
+        if request.method == 'POST':
+            self.router.db_for_write(Project)
+            self.routed.append(self.router.db_for_read(Project))
+        return HttpResponse()
+
+    def test_routing(self):
+        """ Reads of GET requests use the replica, writes and reads after writes use the primary """
+        view = read_replica(self.view)
+        view(self.factory.get('/'))
+        view(self.factory.post('/'))
+        self.assertEqual(self.routed, ['default', None, None])
+        # reads outside of the view use the primary
+        self.assertIsNone(self.router.db_for_read(Project))
+        self.assertEqual(self.router.db_for_write(Project), 'default')
+
+    def test_pinned(self):
+        """ Clients which have recently written read from the primary """
+        response = ReplicaPinningMiddleware(lambda request: HttpResponse())(self.factory.post('/'))
+        self.assertIn(REPLICA_PIN_COOKIE, response.cookies)
+        response = ReplicaPinningMiddleware(lambda request: HttpResponse())(self.factory.get('/'))
+        self.assertNotIn(REPLICA_PIN_COOKIE, response.cookies)
+
+        request = self.factory.get('/')
+        request.COOKIES[REPLICA_PIN_COOKIE] = '1'
+        read_replica(self.view)(request)
+        self.assertEqual(self.routed, [None])
+
+    def test_streaming(self):
+        """ Streamed content (generated after the view returns) is read from the replica """
+        def content():
+            yield str(self.router.db_for_read(Project))
+        response = read_replica(lambda request: StreamingHttpResponse(content()))(self.factory.get('/'))
+        self.assertEqual(b''.join(response.streaming_content), b'default')
+
+    @override_settings(DATABASE_REPLICA='replica')
+    def test_not_configured(self):
+        """ Reads use the primary if no replica is configured """
+        read_replica(self.view)(self.factory.get('/'))
+        self.assertEqual(self.routed, [None])
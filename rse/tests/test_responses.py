@@ -0,0 +1,32 @@
+import json
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from unittest import mock
+from django.test import SimpleTestCase
+
+from rse.views import responses
+from rse.views.responses import json_dumps, json_response
+
+
+class JsonResponseTests(SimpleTestCase):
+    """
+    Tests for the JSON responses of the AJAX views
+    """
+
+    data = {'date': date(2018, 2, 1), 'time': time(9, 30), 'datetime': datetime(2018, 2, 1, 9, 30), 'duration': timedelta(hours=1),
+            'decimal': Decimal('1.50'), 1: [1, 2.5, None, True, 'a']}
+
+    def test_encoding(self):
+        """ Dates, times and other types are encoded the same with or without orjson """
+        expected = {'date': '2018-02-01', 'time': '09:30:00', 'datetime': '2018-02-01T09:30:00', 'duration': 'P0DT01H00M00S',
+                    'decimal': '1.50', '1': [1, 2.5, None, True, 'a']}
+        self.assertEqual(json.loads(json_dumps(self.data)), expected)
+        with mock.patch.object(responses, 'orjson', None):
+            self.assertEqual(json.loads(json_dumps(self.data)), expected)
+
+    def test_response(self):
+        """ Iterables (e.g. values() query sets) are encoded as lists """
+        response = json_response({'id': i} for i in range(3))
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(json.loads(response.content), [{'id': 0}, {'id': 1}, {'id': 2}])
+        self.assertEqual(json_response({'Error': 'message'}, status=400).status_code, 400)
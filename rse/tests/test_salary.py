@@ -0,0 +1,76 @@
+from datetime import date
+from django.utils import timezone
+from django.urls import reverse_lazy
+from django.test import TestCase, override_settings
+
+from rse.models import *
+from rse.tests.test_models import setup_salary_and_banding_data
+
+
+@override_settings(ONCOSTS_SALARY_MULTIPLIER=1.0)
+class SalaryTableTests(TestCase):
+    """
+    Tests for the in memory salary table used to batch staff cost calculations
+    """
+
+    def setUp(self):
+        setup_salary_and_banding_data()
+        self.rse = RSE.objects.get(user__username='testuser')
+        self.rse2 = RSE.objects.get(user__username='testuser2')
+        c = Client(name="test_client", department="COM")
+        c.save()
+        self.project = DirectlyIncurredProject(percentage=50, creator=self.rse.user, created=timezone.now(), proj_costing_id="12345",
+                                               name="test_project", client=c, start=date(2017, 8, 1), end=date(2019, 8, 1), status='F')
+        self.project.save()
+        RSEAllocation(rse=self.rse, project=self.project, percentage=50, start=date(2017, 8, 1), end=date(2019, 8, 1)).save()
+        RSEAllocation(rse=self.rse2, project=self.project, percentage=20, start=date(2018, 1, 1), end=date(2019, 1, 1)).save()
+
+    def test_batched_costs_match_allocations(self):
+        """ Batched costs of many allocations are the same as costing each allocation individually """
+        allocations = list(RSEAllocation.objects.select_related('rse'))
+        table = SalaryTable.load()
+        with self.assertNumQueries(0):
+            costs = table.staff_costs(allocations, date(2018, 1, 1), date(2019, 6, 1))
+        for a in allocations:
+            expected = a.staff_cost(date(2018, 1, 1), date(2019, 6, 1)).staff_cost
+            self.assertAlmostEqual(sum(item['staff_cost'] for item in costs.allocation_breakdown[a]), expected)
+        self.assertAlmostEqual(costs.staff_cost, sum(a.staff_cost(date(2018, 1, 1), date(2019, 6, 1)).staff_cost for a in allocations))
+
+    def test_project_staff_cost(self):
+        """ Project staff costs use a fixed number of queries and are limited to employment """
+        with self.assertNumQueries(3):
+            costs = self.project.staff_cost()
+        # testuser2 is employed until 1st October 2018 (1000 * 212/365 + 1001 * 61/365 at 20%)
+        rse2_cost = sum(item['staff_cost'] for a, items in costs.allocation_breakdown.items() if a.rse == self.rse2 for item in items)
+        self.assertAlmostEqual(rse2_cost, (1000 * 212 / 365 + 1001 * 61 / 365) * 0.2)
+        self.assertAlmostEqual(self.project.staff_cost(rse=self.rse).staff_cost, self.rse.staff_cost(date(2017, 8, 1), date(2019, 8, 1), 50).staff_cost)
+
+    @override_settings(ONCOSTS_SALARY_MULTIPLIER=1.35)
+    def test_oncosts(self):
+        """ Staff costs include oncosts """
+        self.assertAlmostEqual(self.rse.staff_cost(date(2017, 8, 1), date(2017, 9, 1)).staff_cost, 1000 * 31 / 365 * 1.35)
+
+    def test_estimated_breakdown(self):
+        """ Periods without salary data are costed from estimated salary bands """
+        costs = self.rse.staff_cost(date(2020, 8, 1), date(2020, 9, 1))
+        item = costs.cost_breakdown[0]
+        self.assertTrue(item['salary_band'].estimated)
+        self.assertEqual(item['salary_band'].financial_year, 2020)
+        self.assertAlmostEqual(item['staff_cost'], 4002 * 1.03 * 31 / 365, places=4)
+
+    def test_no_salary_data(self):
+        """ RSEs without a starting salary have no staff cost or salary band """
+        user = User.objects.create_user(username='nosalary', password='12345')
+        rse = RSE(user=user, employed_from=date(2017, 1, 1), employed_until=date(2025, 1, 1))
+        rse.save()
+        self.assertEqual(rse.staff_cost(date(2018, 1, 1), date(2019, 1, 1)).staff_cost, 0)
+        with self.assertRaises(ValueError):
+            rse.futureSalaryBand(date=date(2018, 1, 1))
+
+    def test_rses_view(self):
+        """ Team view calculates current grade points """
+        User.objects.create_superuser(username='admin', password='12345')
+        self.client.login(username='admin', password='12345')
+        response = self.client.get(reverse_lazy('rses'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['rses'][0].grade, '1.4')
@@ -0,0 +1,41 @@
+from django.test import SimpleTestCase
+
+from RSEAdmin.staticfiles import ReferencedStaticFinder, css_dependencies
+
+
+class ReferencedStaticFinderTests(SimpleTestCase):
+    """
+    Tests for the production static file finder which only collects referenced assets
+    """
+
+    def test_css_dependencies(self):
+        """ Relative url() and @import references are resolved, data and absolute urls are ignored """
+        css = """
+            @import "theme.css";
+            .a { background: url('../images/sort_asc.png'); }
+            .b { src: url("../fonts/icons.eot?v=2.0.0#iefix"); }
+            .c { background: url(data:image/png;base64,AAAA); }
+            .d { background: url(https://example.com/image.png); }
+        """
+        self.assertEqual(css_dependencies('lib/css/style.css', css),
+                         {'lib/css/theme.css', 'lib/images/sort_asc.png', 'lib/fonts/icons.eot'})
+
+    def test_referenced_files_listed(self):
+        """ Template referenced files and their stylesheet dependencies are collected but unused builds are not """
+        finder = ReferencedStaticFinder()
+        listed = {path for path, storage in finder.list([])}
+
+        # referenced in templates
+        self.assertIn('DataTables/datatables.min.css', listed)
+        self.assertIn('chartjs/Chart.min.js', listed)
+        # referenced from a stylesheet
+        self.assertIn('Ionicons/fonts/ionicons.woff', listed)
+        # unused builds and image sets
+        self.assertNotIn('DataTables/datatables.css', listed)
+        self.assertNotIn('chartjs/Chart.js', listed)
+        self.assertNotIn('Ionicons/png/512/alert-circled.png', listed)
+
+    def test_find_unrestricted(self):
+        """ Finding a file is not restricted so that unreferenced files can still be served in development """
+        finder = ReferencedStaticFinder()
+        self.assertTrue(finder.find('DataTables/datatables.css'))
@@ -0,0 +1,99 @@
+from datetime import date
+from unittest import mock
+from django.utils import timezone
+from django.urls import reverse_lazy
+from django.core.management import call_command
+from django.test import TestCase
+
+from rse.models import *
+
+
+class UtilisationRollupTests(TestCase):
+    """
+    Tests for the precomputed monthly utilisation rollups
+    """
+
+    def setUp(self):
+        self.admin_user = User.objects.create_superuser(username='admin', password='12345')
+        user = User.objects.create_user(username='testuser', password='12345', first_name='Test', last_name='User')
+        self.rse = RSE(user=user, employed_from=date(2017, 1, 1), employed_until=date(2025, 1, 1))
+        self.rse.save()
+        user2 = User.objects.create_user(username='testuser2', password='12345', first_name='Other', last_name='User')
+        # employed for half of June 2018
+        self.rse2 = RSE(user=user2, employed_from=date(2017, 1, 1), employed_until=date(2018, 6, 16))
+        self.rse2.save()
+        c = Client(name="test_client", department="COM")
+        c.save()
+
+        funded = DirectlyIncurredProject(percentage=50, creator=user, created=timezone.now(), proj_costing_id="12345",
+                                         name="funded_project", client=c, start=date(2018, 1, 1), end=date(2019, 1, 1), status='F')
+        funded.save()
+        review = DirectlyIncurredProject(percentage=50, creator=user, created=timezone.now(), proj_costing_id="12346",
+                                         name="review_project", client=c, start=date(2018, 1, 1), end=date(2019, 1, 1), status='R')
+        review.save()
+
+        # 50% from the middle of May 2018 (16th) for the rest of the year
+        RSEAllocation(rse=self.rse, project=funded, percentage=50, start=date(2018, 5, 16), end=date(2019, 1, 1)).save()
+        # 20% pipeline allocation on both RSEs
+        RSEAllocation(rse=self.rse, project=review, percentage=20, start=date(2018, 1, 1), end=date(2019, 1, 1)).save()
+        RSEAllocation(rse=self.rse2, project=review, percentage=20, start=date(2018, 1, 1), end=date(2019, 1, 1)).save()
+        # deleted allocations are not included
+        RSEAllocation(rse=self.rse, project=funded, percentage=30, start=date(2018, 1, 1), end=date(2019, 1, 1), deleted_date=timezone.now()).save()
+
+    def rollups_by_rse(self, rollups, month):
+        return {r.rse_id: r for r in rollups if r.month == month}
+
+    def test_compute(self):
+        """ Allocated effort is split across the months an allocation overlaps and available days follow employment """
+        funded = UtilisationRollup.compute(date(2018, 5, 1), date(2018, 6, 30), UtilisationRollup.FUNDED)
+        may = self.rollups_by_rse(funded, date(2018, 5, 1))
+        self.assertAlmostEqual(may[self.rse.id].allocated_days, 16 * 0.5)
+        self.assertEqual(may[self.rse.id].available_days, 31)
+        # second RSE has no funded allocations but is employed
+        self.assertEqual(may[self.rse2.id].allocated_days, 0)
+        self.assertAlmostEqual(may[None].utilisation, 8 / 62 * 100)
+
+        pipeline = UtilisationRollup.compute(date(2018, 5, 1), date(2018, 6, 30), UtilisationRollup.PIPELINE)
+        june = self.rollups_by_rse(pipeline, date(2018, 6, 1))
+        self.assertAlmostEqual(june[self.rse.id].utilisation, 70)
+        self.assertEqual(june[self.rse2.id].available_days, 15)
+        self.assertAlmostEqual(june[None].allocated_days, 30 * 0.7 + 30 * 0.2)
+
+    def test_report_uses_rollups(self):
+        """ Reports read the saved rollups for past months but compute the current month live """
+        UtilisationRollup.rebuild(date(2018, 1, 1), date(2018, 12, 31))
+        self.assertEqual(UtilisationRollup.objects.filter(rse=None).count(), 24)
+
+        # change a saved rollup to check that it is used by the report
+        UtilisationRollup.objects.filter(rse=None, month=date(2018, 5, 1), status='F').update(allocated_days=31)
+        with mock.patch('django.utils.timezone.now', return_value=timezone.make_aware(timezone.datetime(2018, 6, 10))):
+            UtilisationRollup.objects.filter(rse=None, month=date(2018, 6, 1), status='F').update(allocated_days=0)
+            report = UtilisationRollup.report(date(2018, 5, 1), date(2018, 6, 30), UtilisationRollup.FUNDED)
+        team = {r.month: r for r in report if r.rse_id is None}
+        self.assertAlmostEqual(team[date(2018, 5, 1)].allocated_days, 31)
+        # current month is live
+        self.assertAlmostEqual(team[date(2018, 6, 1)].allocated_days, 15)
+
+    def test_rollup_command(self):
+        """ The management command replaces the rollups so can be safely re-run """
+        call_command('rollup_utilisation', stdout=mock.MagicMock())
+        count = UtilisationRollup.objects.count()
+        self.assertTrue(count > 0)
+        call_command('rollup_utilisation', stdout=mock.MagicMock())
+        self.assertEqual(UtilisationRollup.objects.count(), count)
+
+    def test_utilisation_view(self):
+        """ Utilisation report is available to admin users """
+        UtilisationRollup.rebuild()
+        self.client.login(username='admin', password='12345')
+        response = self.client.get(reverse_lazy('utilisation'), {'filter_range': '01/08/2017 - 31/07/2019', 'status': 'U'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['team_years']), 2)
+        self.assertEqual(len(response.context['rse_years']), 2)
+
+    def test_utilisation_view_default(self):
+        """ Utilisation report defaults to the current financial year without any rollups """
+        self.client.login(username='admin', password='12345')
+        response = self.client.get(reverse_lazy('utilisation'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['team_months']), 12)
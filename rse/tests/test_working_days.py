@@ -0,0 +1,48 @@
+from datetime import date
+from django.utils import timezone
+from django.test import TestCase, override_settings
+
+from rse.models import *
+from rse.working_days import WorkingDayCalendar, working_day_calendar
+
+
+class WorkingDayCalendarTests(TestCase):
+    """
+    Tests for the working day calendar
+    """
+
+    def test_calendar(self):
+        """ Weekends and closures are not working days and each calendar year has the TRAC working days """
+        calendar = WorkingDayCalendar(2018, 2019, 220, closures=[date(2018, 1, 1), (date(2018, 12, 24), date(2018, 12, 31))])
+        self.assertAlmostEqual(calendar.working_days(date(2018, 1, 1), date(2019, 1, 1)), 220)
+        self.assertAlmostEqual(calendar.working_days(date(2019, 1, 1), date(2020, 1, 1)), 220)
+        # 2018 has 261 weekdays less 7 weekday closures
+        self.assertAlmostEqual(calendar.working_days(date(2018, 1, 2), date(2018, 1, 3)), 220 / 254)
+        # closures, weekends (2018-01-06 is a Saturday) and empty ranges
+        self.assertEqual(calendar.working_days(date(2018, 1, 1), date(2018, 1, 2)), 0)
+        self.assertEqual(calendar.working_days(date(2018, 1, 6), date(2018, 1, 8)), 0)
+        self.assertEqual(calendar.working_days(date(2018, 12, 24), date(2019, 1, 1)), 0)
+        self.assertEqual(calendar.working_days(date(2018, 3, 1), date(2018, 3, 1)), 0)
+        # dates outside of the calendar use the average rate
+        self.assertAlmostEqual(calendar.working_days(date(2017, 1, 1), date(2018, 1, 1)), 220)
+        self.assertAlmostEqual(calendar.working_days(date(2019, 12, 31), date(2020, 1, 2)), 220 / 261 + 220 / 365)
+
+    @override_settings(INSTITUTIONAL_CLOSURES=[(date(2018, 1, 1), date(2018, 1, 5))])
+    def test_allocations(self):
+        """ Allocations and projects count working days from the calendar settings """
+        self.assertEqual(working_day_calendar().working_days(date(2018, 1, 1), date(2018, 1, 8)), 0)
+
+        user = User.objects.create_user(username='testuser', password='12345', first_name='Test', last_name='User')
+        rse = RSE(user=user, employed_from=date(2017, 1, 1), employed_until=date(2025, 1, 1))
+        rse.save()
+        c = Client(name="test_client", department="COM")
+        c.save()
+        project = DirectlyIncurredProject(percentage=50, creator=user, created=timezone.now(), proj_costing_id="12345",
+                                          name="test_project", client=c, start=date(2018, 1, 1), end=date(2019, 1, 1), status='F')
+        project.save()
+        a = RSEAllocation(rse=rse, project=project, percentage=50, start=date(2018, 1, 1), end=date(2019, 1, 1))
+        a.save()
+        self.assertAlmostEqual(project.working_days, 110)
+        self.assertAlmostEqual(a.working_days(None, None), 110)
+        self.assertEqual(a.working_days(None, date(2018, 1, 8)), 0)
+        self.assertAlmostEqual(project.scheduled_working_days_to_today(), 110)
@@ -59,6 +59,10 @@ urlpatterns = [
 
     # Project view
     re_path(r'^project/(?P<project_id>[0-9]+)$', projects.project, name='project'),
+    re_path(r'^project/$', projects.project, name='project_noid'),  # without id parameter for dynamically constructed urls
+
+    # Project gantt data (JSON)
+    re_path(r'^project/(?P<project_id>[0-9]+)/gantt$', gantt.project_gantt, name='project_gantt'),
 
     # Edit Project view
     re_path(r'^project/edit/(?P<project_id>[0-9]+)$', projects.project_edit, name='project_edit'),
@@ -106,9 +110,15 @@ urlpatterns = [
     # View a single RSE
     re_path(r'^rse/(?P<rse_username>[\w.@+-]+)$', rses.rse, name='rse'),
 
+    # RSE gantt data (JSON)
+    re_path(r'^rse/(?P<rse_username>[\w.@+-]+)/gantt$', gantt.rse_gantt, name='rse_gantt'),
+
     # RSE view list
     re_path(r'^rses$', rses.rses, name='rses'),
 
+    # Search for RSEs with free capacity
+    re_path(r'^rses/available$', rses.available_rses, name='available_rses'),
+
     # RSE allocation view by rse id
     re_path(r'^rse/id/(?P<rse_id>[0-9]+)$', rses.rseid, name='rseid'),
     re_path(r'^rse/id/$', rses.rseid, name='rseid'),  # without id parameter for dynamically constructed queries
@@ -116,4 +126,24 @@ urlpatterns = [
     # RSE team commitment view all
     re_path(r'^commitment$', rses.commitment, name='commitment'),
 
+    # RSE team commitment gantt data (JSON)
+    re_path(r'^commitment/gantt$', gantt.commitment_gantt, name='commitment_gantt'),
+
+    # Team utilisation report (monthly and by financial year)
+    re_path(r'^utilisation$', rses.utilisation, name='utilisation'),
+
+    # Periods where RSEs are allocated more than 100% FTE
+    re_path(r'^overallocations$', rses.over_allocations, name='over_allocations'),
+
+    # Free capacity forecast of each RSE (JSON)
+    re_path(r'^capacity/forecast$', rses.capacity_forecast, name='capacity_forecast'),
+
+
+    ###############
+    ### Exports ###
+    ###############
+
+    # Streamed CSV export of allocations (filtered by date range and project status)
+    re_path(r'^export/allocations$', exports.export_allocations, name='export_allocations'),
+
 ]
@@ -1 +1 @@
-__all__ = ["index", "authentication", "clients", "projects", "rses"]
\ No newline at end of file
+__all__ = ["index", "authentication", "clients", "projects", "rses", "exports", "gantt"]
\ No newline at end of file
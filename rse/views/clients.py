@@ -14,12 +14,12 @@ from django.contrib.auth.decorators import user_passes_test
 from django.contrib.auth.mixins import UserPassesTestMixin
 from django.contrib import messages
 from django.contrib.auth.forms import AdminPasswordChangeForm
-from django.http import JsonResponse
 from django.conf import settings
 
 
 from rse.models import *
 from rse.forms import *
+from rse.views.responses import json_response
 
 ###############
 ### Clients ###
@@ -47,7 +47,7 @@ def client(request: HttpRequest, client_id) -> HttpResponse:
     view_dict['client'] = client
 
     # Get allocations for project
-    projects = Project.objects.filter(client=client)
+    projects = Project.annotate_percent_allocated(Project.list_objects().filter(client=client)).order_by('allocated_percent', 'id')
     view_dict['projects'] = projects
 
     return render(request, 'client.html', view_dict)
@@ -107,11 +107,7 @@ def client_edit(request: HttpRequest, client_id) -> HttpResponse:
 @login_required
 def ajax_get_all_clients(request):
     """ A helper method to allow AJAX requests to retrieve all clients details for autocomplete. """
-    clients = Client.objects.all().values()
-    clients = list(clients)
-    
-    # Setting safe to False to allow array/list response
-    return JsonResponse(clients, safe=False)
+    return json_response(Client.objects.all().values())
  
  
 class client_delete(UserPassesTestMixin, DeleteView):
@@ -0,0 +1,91 @@
+import csv
+from typing import Iterable, Sequence
+
+from django.contrib.auth.decorators import user_passes_test
+from django.db.models import Q
+from django.http import HttpRequest, HttpResponse, StreamingHttpResponse
+
+from RSEAdmin.routers import read_replica
+from rse.models import *
+from rse.forms import *
+
+###############
+### Exports ###
+###############
+
+# Number of rows fetched from the database cursor at a time when streaming an export
+EXPORT_CHUNK_SIZE = 2000
+
+
+class Echo:
+    """
+    Pseudo buffer which returns written values rather than storing them.
+    Allows the csv writer to format a single row at a time for a streaming response.
+    See: https://docs.djangoproject.com/en/3.2/howto/outputting-csv/#streaming-large-csv-files
+    """
+    def write(self, value):
+        return value
+
+
+def csv_streaming_response(filename: str, header: Sequence[str], rows: Iterable[Sequence]) -> StreamingHttpResponse:
+    """
+    Helper function to create a streamed CSV response from a header and a (lazy) iterable of rows.
+    Rows are formatted and sent one at a time so memory use is independent of the number of rows.
+    """
+    writer = csv.writer(Echo())
+
+    def content():
+        yield writer.writerow(header)
+        for row in rows:
+            yield writer.writerow(row)
+
+    response = StreamingHttpResponse(content(), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def filter_project_form_query(request: HttpRequest, start_field: str, end_field: str, status_field: str = 'project__status') -> Q:
+    """
+    Builds a Q query from a FilterProjectForm in the GET request.
+    Date range filters any object with time overlapping the range (using start_field and end_field) and status filters by the project status field.
+    Returns an empty Q query if the form is not valid.
+    """
+    q = Q()
+    form = FilterProjectForm(request.GET)
+    if form.is_valid():
+        q &= Q(**{f'{end_field}__gte': form.from_date})
+        q &= Q(**{f'{start_field}__lte': form.until_date})
+
+        # apply status type query
+        q &= Q(**{f'{status_field}__in': project_statuses(form.cleaned_data["status"])})
+    return q
+
+
+@user_passes_test(lambda u: u.is_superuser)
+@read_replica
+def export_allocations(request: HttpRequest) -> HttpResponse:
+    """
+    Streams a CSV export of all (non deleted) allocations filtered by a FilterProjectForm date range and status.
+    Uses a values_list projection and a chunked iterator so that no model instances are created.
+    """
+    q = filter_project_form_query(request, start_field='start', end_field='end')
+
+    rows = RSEAllocation.objects.filter(q).order_by('start', 'id').values_list(
+        'id',
+        'rse__user__username',
+        'rse__user__first_name',
+        'rse__user__last_name',
+        'project_id',
+        'project__proj_costing_id',
+        'project__name',
+        'project__status',
+        'percentage',
+        'start',
+        'end',
+        'created_date',
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+    header = ['Allocation ID', 'Username', 'First Name', 'Last Name', 'Project ID', 'Project Costing ID',
+              'Project Name', 'Project Status', 'FTE (%)', 'Start', 'End', 'Created']
+
+    return csv_streaming_response('allocations.csv', header, rows)
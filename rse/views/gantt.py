@@ -0,0 +1,64 @@
+import hashlib
+
+from django.contrib.auth.decorators import login_required
+from django.db.models import Q
+from django.http import HttpRequest, HttpResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+
+from rse.models import *
+from rse.views.exports import filter_project_form_query
+from rse.views.responses import json_response
+
+#############
+### Gantt ###
+#############
+
+# Gantt data is requested by the gantt charts once they are visible (see includes/gantt.html). Responses are
+# versioned with an ETag derived from the allocations (and their projects) so browsers always revalidate but only
+# download the data again if an allocation has been added, deleted or a project changed.
+
+
+def gantt_etag(request: HttpRequest, q: Q, *versions) -> str:
+    """
+    Returns an ETag for gantt data from the version of the allocations matching the Q query, the request query and any
+    other versions of the data (e.g. the modification date of a project which may have no allocations)
+    """
+    version = (RSEAllocation.allocations_version(q), request.GET.urlencode()) + versions
+    return hashlib.md5(repr(version).encode()).hexdigest()
+
+
+@login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=lambda request, project_id: gantt_etag(request, Q(project_id=project_id),
+                                                            Project.objects.filter(pk=project_id).values_list('modified').first()))
+def project_gantt(request: HttpRequest, project_id: int) -> HttpResponse:
+    """ Columnar gantt data of a projects allocations (grouped by project and labelled by RSE) """
+    project = get_object_or_404(Project, pk=project_id)
+    allocations = RSEAllocation.objects.filter(project=project)
+
+    return json_response(RSEAllocation.gantt_columns(allocations, 'project', group_ids=[project.id]))
+
+
+@login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=lambda request, rse_username: gantt_etag(request, Q(rse__user__username=rse_username)))
+def rse_gantt(request: HttpRequest, rse_username: str) -> HttpResponse:
+    """ Columnar gantt data of an RSEs allocations (filtered by a FilterProjectForm date range and status) """
+    rse = get_object_or_404(RSE, user__username=rse_username)
+    q = filter_project_form_query(request, start_field='start', end_field='end')
+    allocations = RSEAllocation.objects.filter(q, rse=rse)
+
+    return json_response(RSEAllocation.gantt_columns(allocations, 'rse', group_ids=[rse.id]))
+
+
+@login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=lambda request: gantt_etag(request, filter_project_form_query(request, start_field='start', end_field='end')))
+def commitment_gantt(request: HttpRequest) -> HttpResponse:
+    """ Columnar gantt data of all RSEs allocations (filtered by a FilterProjectForm date range and status) """
+    q = filter_project_form_query(request, start_field='start', end_field='end')
+    allocations = RSEAllocation.objects.filter(q)
+
+    return json_response(RSEAllocation.gantt_columns(allocations, 'rse'))
@@ -8,7 +8,7 @@ from django.urls import reverse_lazy
 from django.db.models import Q
 from django.http import HttpRequest, HttpResponse, HttpResponseRedirect, Http404, HttpResponseServerError
 from django.shortcuts import get_object_or_404, render
-from django.db.models import Max, Min, ProtectedError 
+from django.db.models import Count, Max, Min, ProtectedError 
 from django.db import IntegrityError
 from django.contrib.auth.decorators import user_passes_test
 from django.contrib.auth.mixins import UserPassesTestMixin
@@ -63,11 +63,11 @@ def index_admin(request: HttpRequest) -> HttpResponse:
     view_dict['review_projects'] = review_projects
 
     # Latest projects added 
-    lastest_projects = Project.objects.all().order_by('-created')[0:settings.HOME_PAGE_NUMBER_ITEMS]
+    lastest_projects = Project.list_objects().select_related('creator').order_by('-created')[0:settings.HOME_PAGE_NUMBER_ITEMS]
     view_dict['lastest_projects'] = lastest_projects
 
     # Projects starting 
-    starting_projects = Project.objects.filter(start__gt=now).order_by('start')[0:settings.HOME_PAGE_NUMBER_ITEMS]
+    starting_projects = Project.list_objects().filter(start__gt=now).order_by('start')[0:settings.HOME_PAGE_NUMBER_ITEMS]
     view_dict['starting_projects'] = starting_projects
 
     # WARNINGS
@@ -95,36 +95,26 @@ def index_rse(request: HttpRequest) -> HttpResponse:
     soon = now + timedelta(days=settings.HOME_PAGE_DAYS_SOON)
     view_dict['now'] = now
 
-    # HIGHLIGHT: Current Capacity
-    highlight_current_capacity = rse.current_capacity
-    view_dict['highlight_current_capacity'] = highlight_current_capacity
-    view_dict['available_capacity'] = 100.0-highlight_current_capacity
-
-    # HIGHLIGHT: Active allocations
-    highlight_active_allocations = RSEAllocation.objects.filter(rse=rse, start__lte=now, end__gte=now, project__status=Project.FUNDED).count()
-    view_dict['highlight_active_allocations'] = highlight_active_allocations
-
-    # HIGHLIGHT: funded and possible projects (anything not rejected that has not completed)
-    highlight_possible_allocations = RSEAllocation.objects.filter(rse=rse, end__gte=now).filter(Q(project__status=Project.REVIEW)|Q(project__status=Project.PREPARATION)|Q(project__status=Project.FUNDED)).count()
-    view_dict['highlight_possible_allocations'] = highlight_possible_allocations
-
-    # HIGHTLIGHT: active projects
-    highlight_active_funded_projects = Project.objects.filter(start__lte=now, end__gt=now, status=Project.FUNDED).count()
-    view_dict['highlight_active_funded_projects'] = highlight_active_funded_projects
-
-    # active allocation progress
-    active_allocations = RSEAllocation.objects.filter(rse=rse, start__lte=now, end__gte=now, project__status=Project.FUNDED)
-    view_dict['active_allocations'] = active_allocations
-
-    # first X non active projects due
-    future_allocations = RSEAllocation.objects.filter(rse=rse, start__gte=now).filter(Q(project__status=Project.REVIEW)|Q(project__status=Project.PREPARATION)|Q(project__status=Project.FUNDED)).order_by('start')[0:settings.HOME_PAGE_NUMBER_ITEMS]
-    view_dict['future_allocations'] = future_allocations
+    # HIGHLIGHTS: current capacity, active and possible (anything not rejected that has not completed) allocations
+    # and the active allocation progress and first X non active projects due (cached until the RSEs allocations change)
+    dashboard = RSEAllocation.cached_rse_dashboard(rse, now)
+    view_dict['highlight_current_capacity'] = dashboard['current_capacity']
+    view_dict['available_capacity'] = 100.0-dashboard['current_capacity']
+    view_dict['highlight_active_allocations'] = dashboard['active_allocation_count']
+    view_dict['highlight_possible_allocations'] = dashboard['possible_allocation_count']
+    view_dict['active_allocations'] = dashboard['active_allocations']
+    view_dict['future_allocations'] = dashboard['future_allocations']
+
+    # HIGHTLIGHT: active projects (and the project date range for filter links) in a single query
+    projects = Project.objects.non_polymorphic().aggregate(
+        active_funded=Count('id', filter=Q(start__lte=now, end__gt=now, status=Project.FUNDED)), min_start=Min('start'), max_end=Max('end'))
+    view_dict['highlight_active_funded_projects'] = projects['active_funded']
 
     # settings
     view_dict['HOME_PAGE_RSE_MIN_CAPACITY_WARNING_LEVEL'] = settings.HOME_PAGE_RSE_MIN_CAPACITY_WARNING_LEVEL
     view_dict['HOME_PAGE_DAYS_SOON'] = settings.HOME_PAGE_DAYS_SOON
-    view_dict['MAX_END_DATE_FILTER_RANGE'] = Project.max_end_date()
-    view_dict['MIN_START_DATE_FILTER_RANGE'] = Project.min_start_date()
+    view_dict['MAX_END_DATE_FILTER_RANGE'] = projects['max_end'] or now
+    view_dict['MIN_START_DATE_FILTER_RANGE'] = projects['min_start'] or now
 
     return render(request, 'index_rse.html', view_dict)
 
@@ -38,7 +38,8 @@ def projects(request: HttpRequest) -> HttpResponse:
         form = ProjectsFilterForm(request.GET)
     view_dict['form'] = form
        
-    projects = Project.objects.all()
+    # percent allocated is calculated in SQL from the stored effort (least allocated first) so only the client needs to be joined
+    projects = Project.annotate_percent_allocated(Project.list_objects().select_related('client')).order_by('allocated_percent', 'id')
     view_dict['projects'] = projects
     
     return render(request, 'projects.html', view_dict)
@@ -55,16 +56,14 @@ def project(request: HttpRequest, project_id) -> HttpResponse:
     view_dict['project'] = proj
         
     # Get allocations for project
-    allocations = RSEAllocation.objects.filter(project=proj)
+    allocations = RSEAllocation.objects.filter(project=proj).for_gantt()
     view_dict['allocations'] = allocations
         
-    # Get unique RSE ids allocated to project and build list of (RSE, [RSEAllocation]) objects for commitment graph
-    allocation_unique_rses = allocations.values('rse').distinct()
+    # Get unique RSEs allocated to project and build list of (RSE, [RSEAllocation]) objects for commitment graph
     commitment_data = []
-    for a in allocation_unique_rses:
-        rse_allocations = allocations.filter(rse__id=a['rse'])
-        rse = RSE.objects.get(id=a['rse'])
-        commitment_data.append((rse, RSEAllocation.commitment_summary(rse_allocations)))
+    for rse in RSE.objects.filter(id__in=allocations.values('rse')).select_related('user'):
+        rse_allocations = allocations.filter(rse=rse)
+        commitment_data.append((rse, RSEAllocation.cached_commitment_summary(rse, rse_allocations)))
     view_dict['commitment_data'] = commitment_data
 
     return render(request, 'project.html', view_dict)
@@ -167,7 +166,7 @@ def project_allocations_edit(request: HttpRequest, project_id) -> HttpResponse:
         form = ProjectAllocationForm(project=proj)
     
     # Get allocations for project
-    allocations = RSEAllocation.objects.filter(project=proj)
+    allocations = RSEAllocation.objects.filter(project=proj).for_table()
     view_dict['allocations'] = allocations
 
     view_dict['form'] = form
@@ -185,7 +184,7 @@ def project_allocations(request: HttpRequest, project_id) -> HttpResponse:
     view_dict['project'] = proj
 
     # Get allocations for project
-    allocations = RSEAllocation.objects.filter(project=proj)
+    allocations = RSEAllocation.objects.filter(project=proj).for_table()
     view_dict['allocations'] = allocations
 
     return render(request, 'project_allocations.html', view_dict)
@@ -0,0 +1,46 @@
+"""
+JSON responses for the AJAX views.
+
+Responses are encoded with orjson (installed by the production and asgi extras) which serialises dates, times and
+datetimes natively and is considerably faster than the standard library for large feeds (e.g. time sheet events or
+gantt data). If orjson is not installed (e.g. a development install) the standard library is used with Django's JSON
+encoder, which formats dates, times and naive datetimes the same way but without the speed up. Query sets (e.g. of values() rows) and other iterables are
+serialised as lists so views do not need to build dicts row by row.
+"""
+
+import json
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+from django.utils.duration import duration_iso_string
+from django.utils.functional import Promise
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(obj):
+    """ Encodes types which orjson does not serialise natively (as DjangoJSONEncoder does) """
+    if isinstance(obj, (Decimal, Promise)):
+        return str(obj)
+    if isinstance(obj, timedelta):
+        return duration_iso_string(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def json_dumps(data) -> bytes:
+    """ Encodes data as JSON bytes (dict keys which are not strings are converted to strings) """
+    if orjson is not None:
+        return orjson.dumps(data, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, cls=DjangoJSONEncoder).encode()
+
+
+def json_response(data, status: int = 200) -> HttpResponse:
+    """ JSON response of a dict, list or iterable (e.g. a values() query set) """
+    if not isinstance(data, (dict, list, tuple)):
+        data = list(data)
+    return HttpResponse(json_dumps(data), content_type='application/json', status=status)
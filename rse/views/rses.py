@@ -1,4 +1,5 @@
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from dateutil.relativedelta import relativedelta
 from typing import Dict
 
 from django.utils import timezone
@@ -14,12 +15,13 @@ from django.contrib.auth.decorators import user_passes_test
 from django.contrib.auth.mixins import UserPassesTestMixin
 from django.contrib import messages
 from django.contrib.auth.forms import AdminPasswordChangeForm
-from django.http import JsonResponse
 from django.conf import settings
 
 
+from RSEAdmin.routers import read_replica
 from rse.models import *
 from rse.forms import *
+from rse.views.responses import json_response
 
 ############
 ### RSEs ###
@@ -52,31 +54,20 @@ def rse(request: HttpRequest, rse_username: str) -> HttpResponse:
             q &= Q(start__lte=until_date)
 
             # apply status type query
-            status = form.cleaned_data["status"]
-            if status in 'PRFX':
-                q &= Q(project__status=status)
-            elif status == 'L':
-                q &= Q(project__status='F')|Q(project__status='R')
-            elif status == 'U':
-                q &= Q(project__status='F')|Q(project__status='R')|Q(project__status='P')
+            q &= Q(project__status__in=project_statuses(form.cleaned_data["status"]))
     else:
         form = FilterProjectForm()
     
 
     # Get RSE allocations grouped by RSE based off Q filter and save the form
     q &= Q(rse=rse)
-    allocations = RSEAllocation.objects.filter(q)
+    allocations = RSEAllocation.objects.filter(q).for_gantt()
     view_dict['allocations'] = allocations
     view_dict['form'] = form
-    
-    # RSE in dictinary with allocations
-    rses = {}
-    rses[rse] = allocations
-    view_dict['rses'] = rses
 
     # Get the commitment summary (date, effort, RSEAllocation)
     if allocations:
-        view_dict['commitment_data'] = [(rse, RSEAllocation.commitment_summary(allocations, from_date, until_date))]
+        view_dict['commitment_data'] = [(rse, RSEAllocation.cached_commitment_summary(rse, allocations, from_date, until_date))]
 	
     return render(request, 'rse.html', view_dict)
 
@@ -92,19 +83,22 @@ def rses(request: HttpRequest) -> HttpResponse:
     Filters to be handled client side with DataTables
     """
     
-    rses = RSE.objects.all()
+    rses = RSE.objects.select_related('user')
 
-    # calculate grade point (only displayed for superusers)
+    # calculate grade point (only displayed for superusers) from a single salary table
+    salary_table = SalaryTable.load()
+    today = timezone.now().date()
     for rse in rses:
         try:
-            rse.grade = rse.futureSalaryBand(date=timezone.now().date()).short_str
-        except:
+            rse.grade = salary_table.salary_band(rse, today).short_str
+        except ValueError:
             rse.grade = "No Data"
     
     return render(request, 'rses.html', { "rses": rses })
 
 
 @login_required
+@read_replica
 def commitment(request: HttpRequest) -> HttpResponse:
 
     # Dict for view
@@ -114,9 +108,11 @@ def commitment(request: HttpRequest) -> HttpResponse:
     q = Q()
     from_date = None
     until_date = None
+    resolution = settings.COMMITMENT_GRAPH_RESOLUTION
     if request.method == 'GET':
-        form = FilterProjectForm(request.GET)
+        form = CommitmentFilterForm(request.GET)
         if form.is_valid():
+            resolution = form.cleaned_data["resolution"] or resolution
             filter_range = form.cleaned_data["filter_range"]
             from_date = filter_range[0]
             q &= Q(end__gte=from_date)
@@ -124,32 +120,148 @@ def commitment(request: HttpRequest) -> HttpResponse:
             q &= Q(start__lte=until_date)
 
             # apply status type query
-            status = form.cleaned_data["status"]
-            if status in 'PRFX':
-                q &= Q(project__status=status)
-            elif status == 'L':
-                q &= Q(project__status='F')|Q(project__status='R')
-            elif status == 'U':
-                q &= Q(project__status='F')|Q(project__status='R')|Q(project__status='P')
+            q &= Q(project__status__in=project_statuses(form.cleaned_data["status"]))
     else:
-        form = FilterProjectForm()
+        form = CommitmentFilterForm()
         
     # Get RSE allocations grouped by RSE based off Q filter and save the form
-    allocations = RSEAllocation.objects.filter(q)
+    allocations = RSEAllocation.objects.filter(q).for_gantt()
     view_dict['form'] = form
         
-    # Get unique RSE ids allocated to project and build list of (RSE, [RSEAllocation]) objects for commitment graph
-    allocation_unique_rses = allocations.values('rse').distinct()
+    # Get unique RSEs allocated to project and build list of (RSE, [RSEAllocation]) objects for commitment graph
+    # (the gantt chart loads its data separately from the commitment_gantt view)
+    # Each RSEs series is downsampled to the graph resolution so that the graph size is bounded for any date range
     commitment_data = []
-    rse_allocations = {}
-    for a in allocation_unique_rses:
-        r_a = allocations.filter(rse__id=a['rse'])
-        rse = RSE.objects.get(id=a['rse'])
-        rse_allocations[rse] = r_a
-        commitment_data.append((rse, RSEAllocation.commitment_summary(r_a, from_date, until_date)))
+    for rse in RSE.objects.filter(id__in=allocations.values('rse')).select_related('user'):
+        r_a = allocations.filter(rse=rse)
+        summary = RSEAllocation.cached_commitment_summary(rse, r_a, from_date, until_date)
+        commitment_data.append((rse, RSEAllocation.downsample_commitment(summary, resolution)))
     view_dict['commitment_data'] = commitment_data
-    view_dict['rse_allocations'] = rse_allocations
 	
 
     return render(request, 'commitments.html', view_dict)
 
+
+@user_passes_test(lambda u: u.is_superuser)
+def utilisation(request: HttpRequest) -> HttpResponse:
+    """
+    Team and RSE utilisation per month and financial year.
+    Reads the precomputed rollups (see the rollup_utilisation management command) with the current month computed live.
+    """
+
+    # Dict for view
+    view_dict = {}  # type: Dict[str, object]
+
+    # default to funded projects in the current financial year
+    now = timezone.now().date()
+    fy = FinancialYear(year=FinancialYear.year_of(now))
+    fy_start, fy_end = fy.start_date(), fy.end_date()
+    form = UtilisationFilterForm(request.GET or {'filter_range': f"{fy_start:%d/%m/%Y} - {fy_end:%d/%m/%Y}", 'status': UtilisationRollup.FUNDED})
+    form.is_valid()
+    from_date, until_date = form.cleaned_data["filter_range"]
+    status = form.cleaned_data.get("status", UtilisationRollup.FUNDED)
+    view_dict['form'] = form
+    view_dict['from_date'] = from_date
+    view_dict['until_date'] = until_date
+
+    rollups = UtilisationRollup.report(from_date, until_date, status)
+
+    # team rollups by month
+    view_dict['team_months'] = [r for r in rollups if r.rse_id is None]
+
+    # team and RSE rollups accumulated by financial year (keyed by RSE id, None for the team)
+    years = sorted({FinancialYear.year_of(r.month) for r in rollups})
+    totals = {}  # type: Dict[tuple, UtilisationRollup]
+    for r in rollups:
+        year = FinancialYear.year_of(r.month)
+        if (r.rse_id, year) not in totals:
+            totals[r.rse_id, year] = UtilisationRollup(rse=r.rse, month=FinancialYear(year=year).start_date(),
+                                                       status=status, allocated_days=0, available_days=0)
+        totals[r.rse_id, year].allocated_days += r.allocated_days
+        totals[r.rse_id, year].available_days += r.available_days
+    rses = sorted({r.rse for r in rollups if r.rse_id is not None}, key=str)
+    view_dict['team_years'] = [totals[None, year] for year in years]
+    view_dict['rse_years'] = [(rse, [totals.get((rse.id, year)) for year in years]) for rse in rses]
+    view_dict['current_month'] = month_start(now)
+
+    return render(request, 'utilisation.html', view_dict)
+
+
+@login_required
+def available_rses(request: HttpRequest) -> HttpResponse:
+    """
+    Search for RSEs with at least the required FTE percentage free throughout a date range (e.g. to staff a new project)
+    """
+
+    # Dict for view
+    view_dict = {}  # type: Dict[str, object]
+
+    # default to funded projects for the next 6 months
+    now = timezone.now().date()
+    form = AvailableRSEsForm(request.GET or {'filter_range': f"{now:%d/%m/%Y} - {now + relativedelta(months=6):%d/%m/%Y}", 'status': 'F', 'percentage': 50})
+    if form.is_valid():
+        from_date, until_date = form.cleaned_data["filter_range"]
+
+        statuses = project_statuses(form.cleaned_data["status"])
+        view_dict['available_rses'] = RSE.available(from_date, until_date, form.cleaned_data["percentage"], statuses)
+        view_dict['from_date'] = from_date
+        view_dict['until_date'] = until_date
+    view_dict['form'] = form
+
+    return render(request, 'available_rses.html', view_dict)
+
+
+@user_passes_test(lambda u: u.is_superuser)
+def over_allocations(request: HttpRequest) -> HttpResponse:
+    """
+    All periods where an RSE is allocated more than MAX_ALLOCATION_PERCENTAGE (100% FTE by default) found in a single
+    sweep over the allocations within the filter range. Defaults to funded projects.
+    """
+
+    # Dict for view
+    view_dict = {}  # type: Dict[str, object]
+
+    form = FilterProjectForm(request.GET or {'status': 'F'})
+    q = Q()
+    if form.is_valid():
+        from_date, until_date = form.cleaned_data["filter_range"]
+        q &= Q(end__gt=from_date) & Q(start__lt=until_date)
+        q &= Q(project__status__in=project_statuses(form.cleaned_data["status"]))
+    else:
+        from_date, until_date = Project.min_start_date(), Project.max_end_date()
+    view_dict['form'] = form
+
+    # allocations (limited to the filter range) as tuples for the sweep
+    allocations = [(rse_id, max(start, from_date), min(end, until_date), percentage) for rse_id, start, end, percentage
+                   in RSEAllocation.objects.filter(q).values_list('rse_id', 'start', 'end', 'percentage')]
+    limit = settings.MAX_ALLOCATION_PERCENTAGE if settings.MAX_ALLOCATION_PERCENTAGE is not None else 100
+    over = RSEAllocation.over_allocations(allocations, limit)
+
+    # list of (RSE, from, until, peak) ordered by date
+    rses = RSE.objects.select_related('user').in_bulk(over.keys())
+    view_dict['over_allocations'] = sorted(((rses[rse_id], f, u, peak) for rse_id, periods in over.items() for f, u, peak in periods), key=lambda o: (o[1], str(o[0])))
+    view_dict['limit'] = limit
+
+    return render(request, 'over_allocations.html', view_dict)
+
+
+@login_required
+def capacity_forecast(request: HttpRequest) -> HttpResponse:
+    """
+    JSON API of the free FTE of each RSE per day, week (default) or month from per day commitment arrays.
+    Defaults to funded projects from today for CAPACITY_FORECAST_MONTHS months (see CapacityForecastForm).
+    """
+    form = CapacityForecastForm(request.GET)
+    if not form.is_valid():
+        return json_response({"Error": form.errors.get_json_data()}, status=400)
+
+    from_date = form.cleaned_data["from_date"]
+    until_date = form.cleaned_data["until_date"]
+    granularity = form.cleaned_data["granularity"] or CapacityForecast.WEEK
+
+    statuses = project_statuses(form.cleaned_data["status"] or Project.FUNDED)
+    forecast = CapacityForecast.build(from_date, until_date, statuses)
+    data = forecast.to_json(granularity)
+    data['from_date'] = from_date.isoformat()
+    data['until_date'] = until_date.isoformat()
+    return json_response(data)
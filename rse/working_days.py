@@ -0,0 +1,70 @@
+from datetime import date, timedelta
+from array import array
+from functools import lru_cache
+from typing import Iterable, Tuple, Union
+from django.conf import settings
+from django.dispatch import receiver
+from django.test.signals import setting_changed
+
+
+class WorkingDayCalendar:
+    """
+    Calendar of working days which excludes weekends and institutional closures (e.g. bank holidays or a Christmas
+    closure). Each working day is weighted so that every calendar year has WORKING_DAYS_PER_YEAR (TRAC) days, i.e. holiday
+    allowance is shared equally between the working days of the year. The cumulative working days from the first day of
+    the calendar are precomputed so that the working days between any two dates is a difference of two array lookups.
+    Dates outside of the calendar years use the average rate of WORKING_DAYS_PER_YEAR per 365 calendar days.
+    """
+
+    def __init__(self, first_year: int, last_year: int, working_days_per_year: float,
+                 closures: Iterable[Union[date, Tuple[date, date]]] = (), weekend_days: Iterable[int] = (5, 6)):
+        self.origin = date(first_year, 1, 1)
+        self.default_rate = working_days_per_year / 365.0
+
+        # expand closures (single dates or inclusive date ranges) into a set of closed dates
+        closed = set()
+        for closure in closures:
+            first, last = closure if isinstance(closure, (tuple, list)) else (closure, closure)
+            closed.update(first + timedelta(days=n) for n in range((last - first).days + 1))
+        weekend_days = set(weekend_days)
+
+        # cumulative[i] is the working days from the origin up to (but not including) the origin plus i days
+        self.cumulative = array('d', [0.0])
+        for year in range(first_year, last_year + 1):
+            days = [date(year, 1, 1) + timedelta(days=n) for n in range((date(year + 1, 1, 1) - date(year, 1, 1)).days)]
+            working = [d.weekday() not in weekend_days and d not in closed for d in days]
+            weight = working_days_per_year / sum(working) if any(working) else 0
+            total = self.cumulative[-1]
+            for w in working:
+                if w:
+                    total += weight
+                self.cumulative.append(total)
+
+    def cumulative_working_days(self, d: date) -> float:
+        """ Working days from the calendar origin until the date (negative for dates before the origin) """
+        i = (d - self.origin).days
+        if i < 0:
+            return i * self.default_rate
+        last = len(self.cumulative) - 1
+        if i > last:
+            return self.cumulative[last] + (i - last) * self.default_rate
+        return self.cumulative[i]
+
+    def working_days(self, start: date, end: date) -> float:
+        """ Working days from the start date until the (exclusive) end date """
+        return self.cumulative_working_days(end) - self.cumulative_working_days(start)
+
+
+@lru_cache(maxsize=None)
+def working_day_calendar() -> WorkingDayCalendar:
+    """ The working day calendar (built once) of the WORKING_DAYS_PER_YEAR, INSTITUTIONAL_CLOSURES and WEEKEND_DAYS settings """
+    first_year, last_year = settings.WORKING_DAY_CALENDAR_YEARS
+    return WorkingDayCalendar(first_year, last_year, settings.WORKING_DAYS_PER_YEAR,
+                              closures=settings.INSTITUTIONAL_CLOSURES, weekend_days=settings.WEEKEND_DAYS)
+
+
+@receiver(setting_changed)
+def reset_working_day_calendar(setting: str, **kwargs):
+    """ Rebuilds the calendar if its settings are changed (i.e. by tests) """
+    if setting in ('WORKING_DAYS_PER_YEAR', 'INSTITUTIONAL_CLOSURES', 'WEEKEND_DAYS', 'WORKING_DAY_CALENDAR_YEARS'):
+        working_day_calendar.cache_clear()
@@ -0,0 +1,16 @@
+#!/bin/sh
+
+# Production container entrypoint
+# Applies migrations, collects (hashed and compressed) static files and then
+# replaces this shell with gunicorn (configured by gunicorn.conf.py).
+# Requires SECRET_KEY, ALLOWED_HOSTS and DATABASE_* environment variables
+# (see RSEAdmin/settings/production.py).
+
+set -e
+
+export DJANGO_SETTINGS_MODULE="${DJANGO_SETTINGS_MODULE:-RSEAdmin.settings.production}"
+
+python manage.py migrate --noinput
+python manage.py collectstatic --noinput
+
+exec gunicorn --config gunicorn.conf.py
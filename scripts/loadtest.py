@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+"""
+Simple HTTP load test for comparing deployment profiles (e.g. runserver vs gunicorn).
+
+Logs in as the given user (if provided) and then requests each path repeatedly
+from a number of concurrent clients, reporting requests per second and latency.
+Only uses the standard library so it can be run from any environment.
+
+Example:
+    python scripts/loadtest.py http://localhost:8080 / /projects /static/AdminLTE/css/AdminLTE.min.css \\
+        --username rseadmin --password demosite --concurrency 16 --requests 2000
+"""
+
+import argparse
+import http.client
+import statistics
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from http.cookies import SimpleCookie
+
+
+def login(base: urllib.parse.SplitResult, username: str, password: str) -> str:
+    """ Logs in using the Django login form and returns the cookie header for the session """
+    conn = http.client.HTTPConnection(base.hostname, base.port)
+    conn.request('GET', '/login/')
+    response = conn.getresponse()
+    response.read()
+    cookies = SimpleCookie()
+    cookies.load(response.getheader('Set-Cookie', ''))
+    csrf = cookies['csrftoken'].value
+
+    body = urllib.parse.urlencode({'username': username, 'password': password, 'csrfmiddlewaretoken': csrf})
+    conn.request('POST', '/login/', body=body, headers={
+        'Content-Type': 'application/x-www-form-urlencoded',
+        'Cookie': f'csrftoken={csrf}',
+        'Referer': f'{base.scheme}://{base.netloc}/login/',
+    })
+    response = conn.getresponse()
+    response.read()
+    for header, value in response.getheaders():
+        if header.lower() == 'set-cookie':
+            cookies.load(value)
+    if 'sessionid' not in cookies:
+        raise RuntimeError('Login failed (no session cookie returned)')
+    conn.close()
+    return '; '.join(f'{k}={v.value}' for k, v in cookies.items())
+
+
+def worker(base: urllib.parse.SplitResult, paths, requests: int, cookie: str):
+    """ Makes requests over a single keep alive connection and returns a list of (status, latency) """
+    results = []
+    conn = http.client.HTTPConnection(base.hostname, base.port, timeout=60)
+    headers = {'Cookie': cookie, 'Accept-Encoding': 'gzip, br'} if cookie else {'Accept-Encoding': 'gzip, br'}
+    for i in range(requests):
+        path = paths[i % len(paths)]
+        start = time.perf_counter()
+        try:
+            conn.request('GET', path, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            status = response.status
+            if response.getheader('Connection', '').lower() == 'close':
+                conn.close()
+        except (http.client.HTTPException, OSError):
+            conn.close()
+            status = 0
+        results.append((status, time.perf_counter() - start))
+    conn.close()
+    return results
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('url', help='Base URL of the server (e.g. http://localhost:8080)')
+    arg_parser.add_argument('paths', nargs='+', help='Paths to request (requested in turn by each client)')
+    arg_parser.add_argument('--username', help='Username to log in with')
+    arg_parser.add_argument('--password', help='Password to log in with')
+    arg_parser.add_argument('--concurrency', type=int, default=8, help='Number of concurrent clients')
+    arg_parser.add_argument('--requests', type=int, default=1000, help='Total number of requests')
+    args = arg_parser.parse_args()
+
+    base = urllib.parse.urlsplit(args.url)
+    cookie = login(base, args.username, args.password) if args.username else ''
+
+    per_client = max(1, args.requests // args.concurrency)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        futures = [pool.submit(worker, base, args.paths, per_client, cookie) for _ in range(args.concurrency)]
+        results = [r for f in futures for r in f.result()]
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for _, latency in results)
+    errors = sum(1 for status, _ in results if status == 0 or status >= 400)
+    print(f"Requests:     {len(results)} ({errors} errors)")
+    print(f"Concurrency:  {args.concurrency}")
+    print(f"Elapsed:      {elapsed:.2f} s")
+    print(f"Requests/sec: {len(results) / elapsed:.1f}")
+    print(f"Latency p50:  {statistics.median(latencies) * 1000:.1f} ms")
+    print(f"Latency p95:  {latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -4,4 +4,4 @@ from .models import *
 
 
 admin.site.register(TimeSheetEntry)
-
+admin.site.register(TimeSheetDayRollup)
@@ -1,9 +1,11 @@
 from django import forms
-from datetime import datetime, timedelta
+from datetime import datetime, time, timedelta
 from django.core.validators import RegexValidator
 
 from .models import *
 
+# Hourly entries created from the weekly grid are placed from the start of the time sheet calendars business hours
+TIMESHEET_DAY_START = time(9, 0)
 
 
 class TimesheetForm(forms.ModelForm):
@@ -45,6 +47,15 @@ class TimesheetForm(forms.ModelForm):
             if p.end < date:
                     errors['date'] = f"The time sheet entry date is after the end of the project ({p.end})"
 
+            # check hourly entries do not overlap other entries of the RSE (which would double count time)
+            if not errors:
+                entry = TimeSheetEntry(pk=self.instance.pk, project=p, rse=rse, date=date, all_day=cleaned_data.get('all_day', False),
+                                       start_time=cleaned_data.get('start_time'), end_time=cleaned_data.get('end_time'))
+                overlaps = TimeSheetEntry.find_overlaps([entry])
+                if overlaps:
+                    other = next(tse for pair in overlaps for tse in pair if tse is not entry)
+                    errors['start_time'] = f"The time sheet entry overlaps an existing entry on {other.project} ({other.start_time:%H:%M} - {other.end_time:%H:%M})"
+
         if errors:
             raise ValidationError(errors)
 
@@ -52,6 +63,7 @@ class ProjectTimeViewOptionsForm(forms.Form):
     """
     Form used for filtering on project time view.
     Allows selection of an RSE (or team) and selection of a granularity specifying the graphing report period.
+    Only RSEs with allocations or time sheet entries on the project can be selected.
     As the form is unbound it is up to the view to set a default value for granularity in the initial GET request data. There is probably a better way to do this but 2 days of searching stack overflow didn't lead me to it!
     """
 
@@ -63,10 +75,123 @@ class ProjectTimeViewOptionsForm(forms.Form):
         if not 'project' in kwargs:
             raise TypeError("ProjectTimeViewOptionsForm missing required argument: 'project'")
         self.project = kwargs.pop('project')
-        # get RSEs 
-        self.rses = RSE.objects.all()
+        # get RSEs (with users for display) which have worked on the project
+        self.rses = list(RSE.objects.filter(
+            Q(id__in=RSEAllocation.objects.filter(project=self.project).values('rse_id')) |
+            Q(id__in=TimeSheetEntry.objects.filter(project=self.project).values('rse_id'))
+        ).select_related('user').order_by('user__first_name', 'user__last_name'))
         super(ProjectTimeViewOptionsForm, self).__init__(*args,**kwargs)
 
         # populate RSE options
         self.fields['rse'].choices =  [('', '--- Team ---')]+[(rse.id, rse) for rse in self.rses]
         self.fields['rse'].empty_label = '--- Team ---'
+
+
+class TimesheetWeekForm(forms.Form):
+    """
+    Grid of the hours recorded by an RSE on each project on each day of a week (with a field per project and day).
+    Projects are the funded projects allocated to the RSE during the week (or all active funded projects) and any
+    projects with entries in the week. The entries and projects are each loaded in a single query.
+    A changed cell replaces the entries of the project on the day. A cell of WORKING_HOURS_PER_DAY hours becomes an all
+    day entry and any other number of hours an hourly entry placed in the first free period of the day (from
+    TIMESHEET_DAY_START) so that it does not overlap other entries. Unchanged cells keep their entries.
+    """
+
+    def __init__(self, *args, **kwargs):
+        for arg in ('rse', 'week'):
+            if not arg in kwargs:
+                raise TypeError(f"TimesheetWeekForm missing required argument: '{arg}'")
+        self.rse = kwargs.pop('rse')
+        self.week = kwargs.pop('week')
+        all_projects = kwargs.pop('all_projects', False)
+        super(TimesheetWeekForm, self).__init__(*args, **kwargs)
+        self.days = [self.week + timedelta(days=i) for i in range(7)]
+        end = self.days[-1]
+
+        # entries of the RSE in the week by project and day
+        self.entries = defaultdict(list)
+        for tse in TimeSheetEntry.objects.filter(rse=self.rse, date__gte=self.week, date__lte=end):
+            self.entries[tse.project_id, tse.date].append(tse)
+
+        active = Q(status=Project.FUNDED, start__lte=end, end__gte=self.week)
+        if not all_projects:
+            active &= Q(id__in=RSEAllocation.objects.filter(rse=self.rse, start__lte=end, end__gte=self.week).values('project_id'))
+        self.projects = list(Project.list_objects().filter(active | Q(id__in={p_id for p_id, _ in self.entries})).order_by('name'))
+
+        # a cell for each day of the project (or with entries)
+        self.cells = {}
+        for p in self.projects:
+            for day in self.days:
+                entries = self.entries[p.id, day]
+                if not entries and not p.start <= day <= p.end:
+                    continue
+                name = f'hours_{p.id}_{day:%Y%m%d}'
+                hours = round(TimeSheetEntry.working_days(entries) * settings.WORKING_HOURS_PER_DAY, 2) if entries else None
+                self.fields[name] = forms.FloatField(min_value=0, max_value=24, required=False, initial=hours,
+                                                     widget=forms.NumberInput(attrs={'class' : 'form-control', 'step': 0.1}))
+                self.cells[name] = (p, day)
+
+    def rows(self) -> List[Tuple[Project, List]]:
+        """ Rows of the grid as (project, [field or None for each day]) """
+        return [(p, [self[f'hours_{p.id}_{day:%Y%m%d}'] if f'hours_{p.id}_{day:%Y%m%d}' in self.fields else None for day in self.days])
+                for p in self.projects]
+
+    def clean(self):
+        cleaned_data = super(TimesheetWeekForm, self).clean()
+        self.deleted = []
+        self.created = []
+
+        # replace the entries of changed cells
+        changed = []
+        for name in self.changed_data:
+            if name not in cleaned_data:
+                continue
+            p, day = self.cells[name]
+            hours = round((cleaned_data[name] or 0) * 60) / 60 # whole minutes
+            if hours and p.start > day:
+                self.add_error(name, f"The time sheet entry date is before the start of the project ({p.start})")
+            elif hours and p.end < day:
+                self.add_error(name, f"The time sheet entry date is after the end of the project ({p.end})")
+            else:
+                self.deleted.extend(self.entries[p.id, day])
+                if hours:
+                    changed.append((p, day, hours))
+
+        # place hourly entries in the free periods of each day (after any remaining hourly entries)
+        deleted = {tse.pk for tse in self.deleted}
+        busy = defaultdict(list)
+        for entries in self.entries.values():
+            for tse in entries:
+                if tse.pk not in deleted and tse.is_hourly():
+                    busy[tse.date].append((tse.start_time, tse.end_time))
+        for p, day, hours in changed:
+            if abs(hours - settings.WORKING_HOURS_PER_DAY) < 0.005:
+                self.created.append(TimeSheetEntry(project=p, rse=self.rse, date=day, all_day=True))
+                continue
+            duration = timedelta(minutes=round(hours * 60))
+            start = datetime.combine(day, TIMESHEET_DAY_START)
+            for busy_start, busy_end in sorted(busy[day]):
+                if start + duration <= datetime.combine(day, busy_start):
+                    break
+                start = max(start, datetime.combine(day, busy_end))
+            if (start + duration).date() != day:
+                self.add_error(f'hours_{p.id}_{day:%Y%m%d}', f"There is not enough free time on {day} for {hours} hours")
+                continue
+            busy[day].append((start.time(), (start + duration).time()))
+            self.created.append(TimeSheetEntry(project=p, rse=self.rse, date=day, start_time=start.time(), end_time=(start + duration).time()))
+
+        # check against the stored entries (which may have been changed since the grid was loaded)
+        overlaps = TimeSheetEntry.find_overlaps(self.created, replaced=self.deleted)
+        if overlaps:
+            tse = overlaps[0][1]
+            raise ValidationError(f"The time sheet entries on {tse.date} overlap existing entries, please reload the time sheet")
+        return cleaned_data
+
+    def save(self) -> Tuple[int, int]:
+        """ Deletes the replaced entries and saves the new entries in a single transaction returning the number of each """
+        with transaction.atomic():
+            for tse in self.deleted:
+                tse.delete()
+            for tse in self.created:
+                tse.save()
+        return len(self.deleted), len(self.created)
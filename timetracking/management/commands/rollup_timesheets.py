@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from timetracking.models import TimeSheetDayRollup
+
+
+class Command(BaseCommand):
+    """
+    Rebuilds the per day time sheet rollups used by the time tracking reports.
+    Rollups are maintained when time sheet entries are saved or deleted so the command is only required if entries are
+    changed without saving them individually (e.g. loading fixtures or bulk deletes). It can also be run from cron, e.g.
+
+        0 3 * * 0 python manage.py rollup_timesheets
+
+    Rollups are recomputed and replaced in a single transaction with all RSEs locked so the command is safe to re-run. It
+    can be run while the site is in use but time sheet changes will wait until the rebuild has finished.
+    """
+    help = 'Recomputes the per RSE, project and day time sheet rollups'
+
+    def handle(self, *args, **options):
+        count = TimeSheetDayRollup.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Saved {count} time sheet rollups'))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from timetracking.models import TimeSheetEntry
+
+
+class Command(BaseCommand):
+    """
+    Reports overlapping hourly time sheet entries (which double count time) for all RSEs.
+    Entries are read in a single pass sorted by RSE, date and start time (using the rse and date index), e.g.
+
+        python manage.py scan_timesheet_overlaps
+
+    Each overlapping entry is reported at least once against the preceding entry of the RSE on the day which ends latest.
+    """
+    help = 'Reports overlapping hourly time sheet entries'
+
+    def handle(self, *args, **options):
+        entries = (TimeSheetEntry.objects.filter(all_day=False)
+                   .select_related('rse__user', 'project')
+                   .order_by('rse_id', 'date', 'start_time', 'end_time'))
+        count = 0
+        for earlier, later in TimeSheetEntry.overlapping(entries.iterator()):
+            count += 1
+            self.stdout.write(f'{later.rse} {later.date}: {later.project} ({later.start_time:%H:%M} - {later.end_time:%H:%M}) '
+                              f'overlaps {earlier.project} ({earlier.start_time:%H:%M} - {earlier.end_time:%H:%M})')
+        if count:
+            self.stdout.write(self.style.WARNING(f'Found {count} overlapping time sheet entries'))
+        else:
+            self.stdout.write(self.style.SUCCESS('No overlapping time sheet entries found'))
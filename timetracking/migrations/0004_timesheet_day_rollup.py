@@ -0,0 +1,51 @@
+# Generated by Django 3.2.17 on 2026-10-19 04:38
+# Modified by hand to populate the rollups of existing time sheet entries
+
+from collections import defaultdict
+from datetime import date, datetime
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+def rollup_timesheets(apps, schema_editor):
+    TimeSheetEntry = apps.get_model('timetracking', 'TimeSheetEntry')
+    TimeSheetDayRollup = apps.get_model('timetracking', 'TimeSheetDayRollup')
+    days = defaultdict(float)
+    for rse_id, project_id, day, all_day, start_time, end_time in TimeSheetEntry.objects.values_list(
+            'rse_id', 'project_id', 'date', 'all_day', 'start_time', 'end_time').iterator():
+        if all_day:
+            days[rse_id, project_id, day] += 1
+        else:
+            days[rse_id, project_id, day] += (datetime.combine(date.min, end_time) - datetime.combine(date.min, start_time)).total_seconds() / (60*60*settings.WORKING_HOURS_PER_DAY)
+    TimeSheetDayRollup.objects.bulk_create([TimeSheetDayRollup(rse_id=rse_id, project_id=project_id, date=day, working_days=d)
+                                            for (rse_id, project_id, day), d in days.items()], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rse', '0017_archived_allocations'),
+        ('timetracking', '0003_alter_timesheetentry_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimeSheetDayRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('working_days', models.FloatField()),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='rse.project')),
+                ('rse', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='rse.rse')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='timesheetdayrollup',
+            index=models.Index(fields=['project', 'date'], name='timetrackin_project_3c13de_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='timesheetdayrollup',
+            unique_together={('rse', 'project', 'date')},
+        ),
+        migrations.RunPython(rollup_timesheets, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.17 on 2026-10-19 04:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('timetracking', '0004_timesheet_day_rollup'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='timesheetentry',
+            index=models.Index(fields=['rse', 'date'], name='timetrackin_rse_id_7593b8_idx'),
+        ),
+    ]
@@ -1,6 +1,11 @@
-from django.db import models
+from __future__ import annotations
+from django.db import models, transaction
+from django.db.models import Count, Sum, F, Q, DurationField, ExpressionWrapper
 from rse.models import *
 from datetime import datetime, date
+from collections import defaultdict
+from itertools import chain
+from typing import Iterable, Iterator
 from django.conf import settings
 
 
@@ -15,6 +20,29 @@ class TimeSheetEntry(models.Model):
     start_time = models.TimeField(blank=True, null=True)
     end_time = models.TimeField(blank=True, null=True)
 
+    class Meta:
+        indexes = [models.Index(fields=['rse', 'date'])]
+
+    def save(self, *args, **kwargs):
+        """ Saves the entry and updates the day rollups of the entry (and of its previous RSE, project and date if changed) """
+        with transaction.atomic():
+            previous = None
+            if self.pk is not None:
+                previous = TimeSheetEntry.objects.filter(pk=self.pk).values_list('rse_id', 'project_id', 'date').first()
+            TimeSheetDayRollup.lock(self.rse_id, *([previous[0]] if previous else []))
+            super(TimeSheetEntry, self).save(*args, **kwargs)
+            if previous is not None and previous != (self.rse_id, self.project_id, self.date):
+                TimeSheetDayRollup.update_day(*previous)
+            TimeSheetDayRollup.update_day(self.rse_id, self.project_id, self.date)
+
+    def delete(self, *args, **kwargs):
+        """ Deletes the entry and updates the day rollup of the entry """
+        with transaction.atomic():
+            TimeSheetDayRollup.lock(self.rse_id)
+            result = super(TimeSheetEntry, self).delete(*args, **kwargs)
+            TimeSheetDayRollup.update_day(self.rse_id, self.project_id, self.date)
+        return result
+
     def duration(self):
         """ duration is is based off the global WORKING_HOURS_PER_DAY value (if all day event) or the actual hours if hourly entry """
         if self.all_day:
@@ -41,4 +69,150 @@ class TimeSheetEntry(models.Model):
                 timesheet_days_sum += (datetime.combine(date.today(), tse.end_time) - datetime.combine(date.today(), tse.start_time)).seconds / (60*60*settings.WORKING_HOURS_PER_DAY) # convert hours to fractional days
 
         return timesheet_days_sum
+
+    def is_hourly(self) -> bool:
+        """ True if the entry has a start and end time (rather than being an all day entry) """
+        return not self.all_day and self.start_time is not None and self.end_time is not None
+
+    @staticmethod
+    def overlapping(tses: Iterable[TimeSheetEntry]) -> Iterator[Tuple[TimeSheetEntry, TimeSheetEntry]]:
+        """
+        Finds overlapping hourly entries in a single pass over time sheet entries sorted by RSE, date and start time (all
+        day entries are ignored). Yields (earlier, later) pairs where earlier is the preceding entry of the RSE on the day
+        which ends latest, so every overlapping entry is reported at least once.
+        """
+        latest = None
+        for tse in tses:
+            if not tse.is_hourly():
+                continue
+            if latest is None or (latest.rse_id, latest.date) != (tse.rse_id, tse.date):
+                latest = tse
+                continue
+            if tse.start_time < latest.end_time:
+                yield latest, tse
+            if tse.end_time > latest.end_time:
+                latest = tse
+
+    @staticmethod
+    def find_overlaps(tses: List[TimeSheetEntry], replaced: Iterable[TimeSheetEntry] = ()) -> List[Tuple[TimeSheetEntry, TimeSheetEntry]]:
+        """
+        Finds overlaps of new (or changed) time sheet entries with each other and with the stored hourly entries of their
+        RSEs on the same days. Stored entries are loaded in a single query (using the rse and date index) and any stored
+        versions of the entries (or replaced entries which are to be deleted) are excluded. Returns the overlapping pairs
+        which include an entry.
+        """
+        hourly = [tse for tse in tses if tse.is_hourly()]
+        if not hourly:
+            return []
+        days = Q()
+        for rse_id, day in {(tse.rse_id, tse.date) for tse in hourly}:
+            days |= Q(rse_id=rse_id, date=day)
+        stored = (TimeSheetEntry.objects.filter(days, all_day=False, start_time__isnull=False, end_time__isnull=False)
+                  .exclude(pk__in=[tse.pk for tse in chain(tses, replaced) if tse.pk is not None])
+                  .select_related('project'))
+        entries = sorted(chain(stored, hourly), key=lambda tse: (tse.rse_id, tse.date, tse.start_time, tse.end_time))
+        new = {id(tse) for tse in hourly}
+        return [(a, b) for a, b in TimeSheetEntry.overlapping(entries) if id(a) in new or id(b) in new]
+
+    @staticmethod
+    def project_rse_summary(project: Project, rses: List[RSE]) -> List[Tuple[RSE, float, float, float, float]]:
+        """
+        Returns a list of (rse, scheduled days to today, recorded days to today, total scheduled days, total recorded days)
+        for each RSE on a project. Scheduled days are the working days of the RSEs allocations and recorded days the working
+        days of their time sheet entries (from the day rollups). Allocations and recorded days are each loaded in a single
+        query.
+        """
+        now = timezone.now().date()
+        scheduled = defaultdict(lambda: [0, 0])
+        for a in RSEAllocation.objects.filter(project=project):
+            if a.start <= now:
+                scheduled[a.rse_id][0] += a.working_days(project.start, now)
+            scheduled[a.rse_id][1] += a.working_days(None, None)
+        recorded = {r['rse']: r for r in TimeSheetDayRollup.objects.filter(project=project).values('rse').annotate(
+            to_today=Sum('working_days', filter=Q(date__gte=project.start, date__lte=now)), total=Sum('working_days'))}
+
+        summary = []
+        for rse in rses:
+            r = recorded.get(rse.id, {})
+            summary.append((rse, scheduled[rse.id][0], r.get('to_today') or 0, scheduled[rse.id][1], r.get('total') or 0))
+        return summary
+
+
+class TimeSheetDayRollup(models.Model):
+    """
+    Total working days (see TimeSheetEntry.working_days) recorded by an RSE on a project on a single day.
+    Rollups are updated whenever a time sheet entry is saved or deleted so that reports sum a single row per RSE, project
+    and day rather than every entry. The rollup_timesheets management command rebuilds the table (e.g. after entries have
+    been bulk loaded or deleted with a query set).
+    """
+    rse = models.ForeignKey(RSE, on_delete=models.CASCADE)
+    project = models.ForeignKey(Project, on_delete=models.CASCADE)
+    date = models.DateField()
+    working_days = models.FloatField()
+
+    class Meta:
+        unique_together = ('rse', 'project', 'date')
+        indexes = [models.Index(fields=['project', 'date'])]
+
+    def __str__(self) -> str:
+        return f"{self.rse} on {self.project} {self.date}: {self.working_days:.2f} days"
+
+    @staticmethod
+    def compute(entries: 'QuerySet[TimeSheetEntry]') -> List[TimeSheetDayRollup]:
+        """
+        Computes (unsaved) rollups of a query set of time sheet entries in a single query grouped by RSE, project and date.
+        Hourly entries are summed as durations in the database (supported by both SQLite and PostgreSQL).
+        """
+        rows = (entries.values('rse_id', 'project_id', 'date')
+                .order_by('rse_id', 'project_id', 'date')
+                .annotate(days=Count('id', filter=Q(all_day=True)),
+                          hours=Sum(ExpressionWrapper(F('end_time') - F('start_time'), output_field=DurationField()), filter=Q(all_day=False))))
+        rollups = []
+        for row in rows:
+            days = row['days']
+            if row['hours'] is not None:
+                days += row['hours'].total_seconds() / (60*60*settings.WORKING_HOURS_PER_DAY)
+            rollups.append(TimeSheetDayRollup(rse_id=row['rse_id'], project_id=row['project_id'], date=row['date'], working_days=days))
+        return rollups
+
+    @staticmethod
+    def lock(*rse_ids: int):
+        """
+        Locks the RSEs (in id order to avoid deadlocks) until the end of the current transaction so that concurrent
+        changes to the entries of an RSE recompute their rollups one at a time. Otherwise each transaction would compute
+        a rollup from only its own entries and the last to save would overwrite the other. SQLite does not support (or
+        need) row locks as it only permits a single writer.
+        """
+        list(RSE.objects.select_for_update().filter(pk__in=rse_ids).order_by('pk').values_list('pk', flat=True))
+
+    @staticmethod
+    def update_day(rse_id: int, project_id: int, day: date):
+        """ Recomputes the rollup of an RSE on a project on a day (deleting it if there are no longer any entries) """
+        with transaction.atomic():
+            TimeSheetDayRollup.lock(rse_id)
+            rollups = TimeSheetDayRollup.compute(TimeSheetEntry.objects.filter(rse_id=rse_id, project_id=project_id, date=day))
+            if rollups:
+                TimeSheetDayRollup.objects.update_or_create(rse_id=rse_id, project_id=project_id, date=day,
+                                                            defaults={'working_days': rollups[0].working_days})
+            else:
+                TimeSheetDayRollup.objects.filter(rse_id=rse_id, project_id=project_id, date=day).delete()
+
+    @staticmethod
+    def rebuild() -> int:
+        """
+        Recomputes and replaces all rollups in a single transaction and returns the number of rollups saved.
+        All RSEs are locked before computing so that entries saved or deleted during the rebuild wait for it to finish
+        (rather than their rollup updates being replaced by the rebuild).
+        """
+        with transaction.atomic():
+            TimeSheetDayRollup.lock(*RSE.objects.values_list('pk', flat=True))
+            rollups = TimeSheetDayRollup.compute(TimeSheetEntry.objects.all())
+            TimeSheetDayRollup.objects.all().delete()
+            TimeSheetDayRollup.objects.bulk_create(rollups)
+        return len(rollups)
+
+    @staticmethod
+    def recorded_days(rollups: 'QuerySet[TimeSheetDayRollup]') -> float:
+        """ Total working days of a query set of rollups """
+        return rollups.aggregate(days=Sum('working_days'))['days'] or 0
  
\ No newline at end of file
@@ -0,0 +1,116 @@
+from datetime import date, timedelta
+from typing import Dict, List, Tuple
+import itertools as it
+from django.db.models import Sum, DateField
+from django.db.models.functions import Trunc
+
+from rse.models import *
+from rse.working_days import working_day_calendar
+from timetracking.models import TimeSheetDayRollup
+
+##########################
+### Effort Time Series ###
+##########################
+
+# Time series of recorded (time sheet) and allocated effort grouped into calendar buckets of a day, week (starting on a
+# Monday) or month. Recorded days (from the time sheet day rollups) are grouped in the database by truncating their
+# dates (which is supported by both SQLite and PostgreSQL) so a series requires a single aggregate query regardless of
+# the number of buckets. Allocations span many buckets so cannot be grouped by truncation, instead they are loaded in a
+# single query and their effort is distributed into the buckets in a single pass. Series are available for the team, an
+# RSE or a project (or an RSE on a project) through effort_series.
+
+GRANULARITIES = ('day', 'week', 'month')
+
+
+def truncate_date(d: date, granularity: str) -> date:
+    """ Returns the start of the calendar bucket containing the date (matches the database truncation of dates) """
+    if granularity == 'day':
+        return d
+    if granularity == 'week':
+        return d - timedelta(days=d.weekday())
+    if granularity == 'month':
+        return d.replace(day=1)
+    raise ValueError(f"Unknown granularity '{granularity}' (must be one of {', '.join(GRANULARITIES)})")
+
+
+def calendar_buckets(start: date, end: date, granularity: str) -> List[Tuple[date, date]]:
+    """
+    Returns a list of (bucket start, bucket end) tuples of the calendar buckets between the start date (inclusive) and the
+    end date (exclusive). The first and last buckets are limited to the start and end dates.
+    """
+    buckets = []
+    bucket_start = start
+    while bucket_start < end:
+        bucket_end = truncate_date(bucket_start, granularity)
+        if granularity == 'day':
+            bucket_end += timedelta(days=1)
+        elif granularity == 'week':
+            bucket_end += timedelta(days=7)
+        else:
+            bucket_end = (bucket_end + timedelta(days=31)).replace(day=1)
+        bucket_end = min(bucket_end, end)
+        buckets.append((bucket_start, bucket_end))
+        bucket_start = bucket_end
+    return buckets
+
+
+def timesheet_days(start: date, end: date, granularity: str, rse: RSE = None, project: Project = None) -> Dict[date, float]:
+    """
+    Returns a dict of bucket start date (see calendar_buckets) to the working days recorded on time sheet entries (between
+    the start date and exclusive end date) for any RSE and project. Days are summed from the day rollups of the entries.
+    """
+    rollups = TimeSheetDayRollup.objects.filter(date__gte=start, date__lt=end)
+    if rse is not None:
+        rollups = rollups.filter(rse=rse)
+    if project is not None:
+        rollups = rollups.filter(project=project)
+
+    rows = (rollups.annotate(bucket=Trunc('date', granularity, output_field=DateField()))
+            .values('bucket')
+            .order_by('bucket')
+            .annotate(days=Sum('working_days')))
+
+    # the first bucket may be truncated to a date before the start date
+    return {max(row['bucket'], start): row['days'] for row in rows}
+
+
+def allocated_days(start: date, end: date, granularity: str, rse: RSE = None, project: Project = None) -> Dict[date, float]:
+    """
+    Returns a dict of bucket start date (see calendar_buckets) to the working days of (non deleted) allocations for any
+    RSE and project. Days are calculated as in RSEAllocation.working_days.
+    """
+    allocations = RSEAllocation.objects.filter(start__lt=end, end__gt=start)
+    if rse is not None:
+        allocations = allocations.filter(rse=rse)
+    if project is not None:
+        allocations = allocations.filter(project=project)
+
+    # sweep the changes in allocated percentage (limited to the date range) through the buckets accumulating percentage
+    # weighted working days (see rse.working_days)
+    events = sorted(it.chain.from_iterable(((max(s, start), p), (min(e, end), -p)) for s, e, p in allocations.values_list('start', 'end', 'percentage')))
+    calendar = working_day_calendar()
+    allocated = {}  # type: Dict[date, float]
+    percentage = 0
+    i = 0
+    for bucket_start, bucket_end in calendar_buckets(start, end, granularity):
+        percentage_days = 0
+        last = bucket_start
+        while i < len(events) and events[i][0] < bucket_end:
+            d, change = events[i]
+            percentage_days += calendar.working_days(last, d) * percentage
+            percentage += change
+            last = d
+            i += 1
+        percentage_days += calendar.working_days(last, bucket_end) * percentage
+        allocated[bucket_start] = percentage_days / 100.0
+    return allocated
+
+
+def effort_series(start: date, end: date, granularity: str, rse: RSE = None, project: Project = None) -> List[Tuple[date, date, float, float]]:
+    """
+    Returns a list of (bucket start, bucket end, allocated days, recorded days) for each calendar bucket between the start
+    date and exclusive end date. The series is for the team unless an RSE and/or project is given.
+    """
+    allocated = allocated_days(start, end, granularity, rse=rse, project=project)
+    recorded = timesheet_days(start, end, granularity, rse=rse, project=project)
+    return [(s, e, allocated.get(s, 0), recorded.get(s, 0)) for s, e in calendar_buckets(start, end, granularity)]
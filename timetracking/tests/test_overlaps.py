@@ -0,0 +1,76 @@
+from datetime import date, time
+from io import StringIO
+from django.core.management import call_command
+
+from timetracking.forms import TimesheetForm
+from timetracking.models import *
+from timetracking.tests.test_views import TimeTrackingViewTestCase
+
+
+class TimeSheetOverlapTests(TimeTrackingViewTestCase):
+    """
+    Tests for detecting overlapping hourly time sheet entries
+    """
+
+    def entry(self, start: time, end: time, rse=None, day=date(2018, 2, 1)) -> TimeSheetEntry:
+        tse = TimeSheetEntry(project=self.project, rse=rse or self.rse, date=day, start_time=start, end_time=end)
+        tse.save()
+        return tse
+
+    def form(self, start: str, end: str, instance=None) -> TimesheetForm:
+        return TimesheetForm({'project': self.project.id, 'rse': self.rse.id, 'date': '2018-02-01', 'all_day': False,
+                              'start_time': start, 'end_time': end}, instance=instance)
+
+    def test_find_overlaps(self):
+        """ Overlaps with stored entries of the RSE on the day are found in a single query """
+        morning = self.entry(time(9, 0), time(12, 0))
+        self.entry(time(13, 0), time(17, 0))
+        # all day entries, other days and other RSEs are not checked
+        TimeSheetEntry(project=self.project, rse=self.rse, date=date(2018, 2, 1), all_day=True).save()
+        self.entry(time(9, 0), time(17, 0), day=date(2018, 2, 2))
+        other = RSE(user=User.objects.create_user(username='otheruser', password='12345'))
+        other.save()
+        self.entry(time(9, 0), time(17, 0), rse=other)
+
+        lunch = TimeSheetEntry(project=self.project, rse=self.rse, date=date(2018, 2, 1), start_time=time(12, 0), end_time=time(13, 0))
+        late = TimeSheetEntry(project=self.project, rse=self.rse, date=date(2018, 2, 1), start_time=time(11, 0), end_time=time(12, 30))
+        with self.assertNumQueries(1):
+            self.assertEqual(TimeSheetEntry.find_overlaps([lunch]), [])
+        self.assertEqual(TimeSheetEntry.find_overlaps([late]), [(morning, late)])
+        # new entries are checked against each other
+        self.assertEqual(TimeSheetEntry.find_overlaps([lunch, late]), [(morning, late), (late, lunch)])
+        # an entry does not overlap its stored version
+        morning.end_time = time(12, 30)
+        self.assertEqual(TimeSheetEntry.find_overlaps([morning]), [])
+
+    def test_entries_without_times(self):
+        """ Stored entries which are neither all day nor have times are not checked """
+        TimeSheetEntry(project=self.project, rse=self.rse, date=date(2018, 2, 1), all_day=False).save()
+        self.entry(time(9, 0), time(12, 0))
+        late = TimeSheetEntry(project=self.project, rse=self.rse, date=date(2018, 2, 1), start_time=time(11, 0), end_time=time(13, 0))
+        self.assertEqual(len(TimeSheetEntry.find_overlaps([late])), 1)
+        self.assertTrue(self.form('12:00', '13:00').is_valid())
+
+    def test_form(self):
+        """ The time sheet form rejects entries which overlap another entry """
+        morning = self.entry(time(9, 0), time(12, 0))
+        self.assertTrue(self.form('12:00', '13:00').is_valid())
+        form = self.form('11:30', '13:00')
+        self.assertFalse(form.is_valid())
+        self.assertIn('overlaps an existing entry on test_project (09:00 - 12:00)', form.errors['start_time'][0])
+        # editing an entry
+        self.assertTrue(self.form('10:00', '12:30', instance=morning).is_valid())
+
+    def test_scan(self):
+        """ The scan command reports every overlapping entry """
+        self.entry(time(9, 0), time(17, 0))
+        self.entry(time(10, 0), time(11, 0))
+        self.entry(time(10, 30), time(12, 0))
+        self.entry(time(9, 0), time(12, 0), day=date(2018, 2, 2))
+        TimeSheetEntry.objects.bulk_create([TimeSheetEntry(project=self.project, rse=self.rse, date=date(2018, 2, 2), start_time=time(11, 0), end_time=time(13, 0))])
+
+        out = StringIO()
+        call_command('scan_timesheet_overlaps', stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(lines[-1], 'Found 3 overlapping time sheet entries')
+        self.assertIn('2018-02-02: test_project (11:00 - 13:00) overlaps test_project (09:00 - 12:00)', lines[2])
@@ -0,0 +1,56 @@
+from datetime import date, time
+
+from timetracking.models import *
+from timetracking.reporting import calendar_buckets, effort_series
+from timetracking.tests.test_views import TimeTrackingViewTestCase
+
+
+class EffortSeriesTests(TimeTrackingViewTestCase):
+    """
+    Tests for the calendar bucketed effort series
+    """
+
+    def setUp(self):
+        super().setUp()
+        other_user = User.objects.create_user(username='otheruser', password='12345', first_name='Other', last_name='User')
+        self.other = RSE(user=other_user, employed_from=date(2017, 1, 1), employed_until=date(2025, 1, 1))
+        self.other.save()
+        self.allocations = [
+            RSEAllocation(rse=self.rse, project=self.project, percentage=50, start=date(2018, 1, 10), end=date(2018, 3, 20)),
+            RSEAllocation(rse=self.other, project=self.project, percentage=20, start=date(2018, 2, 5), end=date(2018, 2, 12)),
+        ]
+        for a in self.allocations:
+            a.save()
+        self.tses = [
+            TimeSheetEntry(project=self.project, rse=self.rse, date=date(2018, 1, 10), all_day=True),
+            TimeSheetEntry(project=self.project, rse=self.rse, date=date(2018, 1, 31), start_time=time(9, 0), end_time=time(12, 42)),
+            TimeSheetEntry(project=self.project, rse=self.other, date=date(2018, 2, 5), start_time=time(9, 0), end_time=time(10, 51)),
+            TimeSheetEntry(project=self.project, rse=self.other, date=date(2018, 3, 1), all_day=True),
+        ]
+        for tse in self.tses:
+            tse.save()
+
+    def test_calendar_buckets(self):
+        """ Buckets are aligned to the calendar and limited to the date range """
+        self.assertEqual(calendar_buckets(date(2018, 1, 15), date(2018, 3, 10), 'month'),
+                         [(date(2018, 1, 15), date(2018, 2, 1)), (date(2018, 2, 1), date(2018, 3, 1)), (date(2018, 3, 1), date(2018, 3, 10))])
+        # 2018-01-03 is a Wednesday
+        self.assertEqual(calendar_buckets(date(2018, 1, 3), date(2018, 1, 16), 'week'),
+                         [(date(2018, 1, 3), date(2018, 1, 8)), (date(2018, 1, 8), date(2018, 1, 15)), (date(2018, 1, 15), date(2018, 1, 16))])
+        self.assertEqual(len(calendar_buckets(date(2018, 1, 1), date(2019, 1, 1), 'day')), 365)
+
+    def test_series(self):
+        """ Bucketed effort matches the per bucket working days of allocations and time sheet entries """
+        for granularity in ('day', 'week', 'month'):
+            for rse in (None, self.rse, self.other):
+                with self.assertNumQueries(2):
+                    series = effort_series(date(2018, 1, 15), date(2018, 3, 10), granularity, rse=rse, project=self.project)
+                for s, e, allocated, recorded in series:
+                    expected = sum(a.working_days(s, e) for a in self.allocations if (rse is None or a.rse == rse) and a.start < e and a.end > s)
+                    self.assertAlmostEqual(allocated, expected)
+                    expected = TimeSheetEntry.working_days(tse for tse in self.tses if (rse is None or tse.rse == rse) and s <= tse.date < e)
+                    self.assertAlmostEqual(recorded, expected)
+
+        # 1 + 0.5 + 0.25 days recorded in January and February by the team (on any project)
+        series = effort_series(date(2018, 1, 1), date(2018, 3, 1), 'month')
+        self.assertAlmostEqual(sum(recorded for _, _, _, recorded in series), 1.75)
@@ -0,0 +1,75 @@
+from datetime import date, time
+from io import StringIO
+from django.core.management import call_command
+from django.urls import reverse_lazy
+
+from timetracking.models import *
+from timetracking.tests.test_views import TimeTrackingViewTestCase, TimeTrackingAsyncViewTestCase
+
+
+class TimeSheetDayRollupTests(TimeTrackingViewTestCase):
+    """
+    Tests for the per day time sheet rollups
+    """
+
+    def rollups(self):
+        return {(r.rse_id, r.project_id, r.date): round(r.working_days, 4) for r in TimeSheetDayRollup.objects.all()}
+
+    def test_maintained(self):
+        """ Rollups follow entries as they are created, edited and deleted """
+        all_day = TimeSheetEntry(project=self.project, rse=self.rse, date=date(2018, 2, 1), all_day=True)
+        all_day.save()
+        hourly = TimeSheetEntry(project=self.project, rse=self.rse, date=date(2018, 2, 1), start_time=time(9, 0), end_time=time(12, 42))
+        hourly.save()
+        self.assertEqual(self.rollups(), {(self.rse.id, self.project.id, date(2018, 2, 1)): 1.5})
+
+        # moving an entry updates both days
+        hourly.date = date(2018, 2, 2)
+        hourly.save()
+        self.assertEqual(self.rollups(), {(self.rse.id, self.project.id, date(2018, 2, 1)): 1,
+                                          (self.rse.id, self.project.id, date(2018, 2, 2)): 0.5})
+
+        all_day.delete()
+        self.assertEqual(self.rollups(), {(self.rse.id, self.project.id, date(2018, 2, 2)): 0.5})
+
+    def test_rebuild(self):
+        """ The management command rebuilds rollups of entries changed without saving """
+        TimeSheetEntry(project=self.project, rse=self.rse, date=date(2018, 2, 1), all_day=True).save()
+        TimeSheetEntry.objects.bulk_create([TimeSheetEntry(project=self.project, rse=self.rse, date=date(2018, 3, 1), all_day=True)])
+        TimeSheetDayRollup.objects.filter(date=date(2018, 2, 1)).update(working_days=5)
+
+        out = StringIO()
+        call_command('rollup_timesheets', stdout=out)
+        self.assertIn('Saved 2 time sheet rollups', out.getvalue())
+        self.assertEqual(self.rollups(), {(self.rse.id, self.project.id, date(2018, 2, 1)): 1,
+                                          (self.rse.id, self.project.id, date(2018, 3, 1)): 1})
+
+    def test_time_projects(self):
+        """ Recorded days of projects are summed from the rollups """
+        TimeSheetEntry(project=self.project, rse=self.rse, date=date(2018, 2, 1), all_day=True).save()
+        TimeSheetEntry(project=self.project, rse=self.rse, date=date(2018, 2, 2), start_time=time(9, 0), end_time=time(12, 42)).save()
+        # entries before the project start are not included
+        TimeSheetEntry(project=self.project, rse=self.rse, date=date(2017, 12, 1), all_day=True).save()
+
+        self.client.login(username='testuser', password='12345')
+        response = self.client.get(reverse_lazy('time_projects'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([p.recorded for p in response.context['projects']], [1.5])
+
+
+class TimeSheetDayRollupAjaxTests(TimeTrackingAsyncViewTestCase):
+    """
+    Tests for rollups maintained by the async time sheet AJAX views
+    """
+
+    def test_add_and_delete(self):
+        """ Entries added and deleted through the AJAX views update the rollups """
+        self.client.login(username='testuser', password='12345')
+        self.client.post(reverse_lazy('timesheet_add'), {
+            'project': self.project.id, 'rse': self.rse.id, 'date': '2018-02-01',
+            'all_day': 'false', 'start_time': '09:00', 'end_time': '12:42'})
+        self.assertEqual(list(TimeSheetDayRollup.objects.values_list('date', 'working_days')), [(date(2018, 2, 1), 0.5)])
+
+        response = self.client.post(reverse_lazy('timesheet_delete'), {'id': TimeSheetEntry.objects.get().id})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(TimeSheetDayRollup.objects.exists())
@@ -0,0 +1,165 @@
+from datetime import date, time
+from django.utils import timezone
+from django.urls import reverse_lazy
+from django.test import TestCase, TransactionTestCase
+
+from timetracking.models import *
+from rse.working_days import working_day_calendar
+
+
+class TimeTrackingDataMixin:
+    """
+    Mixin which creates an admin, an RSE, a client and a funded project
+    """
+
+    def setUp(self):
+        self.admin_user = User.objects.create_superuser(username='admin', password='12345')
+        self.user = User.objects.create_user(username='testuser', password='12345', first_name='Test', last_name='User')
+        self.rse = RSE(user=self.user, employed_from=date(2017, 1, 1), employed_until=date(2025, 1, 1))
+        self.rse.save()
+        c = Client(name="test_client", department="COM")
+        c.save()
+        self.project = DirectlyIncurredProject(percentage=50, creator=self.user, created=timezone.now(), proj_costing_id="12345",
+                                               name="test_project", client=c, start=date(2018, 1, 1), end=date(2019, 1, 1), status='F')
+        self.project.save()
+
+
+class TimeTrackingViewTestCase(TimeTrackingDataMixin, TestCase):
+    pass
+
+
+class TimeTrackingAsyncViewTestCase(TimeTrackingDataMixin, TransactionTestCase):
+    """
+    The async AJAX views access the database from a thread pool (using a separate connection to the test case) so
+    data must be committed rather than isolated in a test case transaction.
+    """
+    pass
+
+
+class TimesheetExportTests(TimeTrackingViewTestCase):
+    """
+    Tests for the streamed CSV export of time sheet entries
+    """
+
+    def test_timesheet_export(self):
+        """ Export includes entries in the date range with working days calculated per entry """
+        TimeSheetEntry(project=self.project, rse=self.rse, date=date(2018, 2, 1), all_day=True).save()
+        TimeSheetEntry(project=self.project, rse=self.rse, date=date(2018, 2, 2), start_time=time(9, 0), end_time=time(12, 42)).save()
+        TimeSheetEntry(project=self.project, rse=self.rse, date=date(2018, 6, 1), all_day=True).save()
+
+        self.client.login(username='admin', password='12345')
+        response = self.client.get(reverse_lazy('timesheet_export'), {'filter_range': '01/01/2018 - 01/03/2018', 'status': 'A'})
+        self.assertEqual(response.status_code, 200)
+        rows = [line.split(',') for line in b''.join(response.streaming_content).decode().splitlines()]
+
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[1][-1], '1')
+        # 3.7 hours is half of a 7.4 hour working day
+        self.assertEqual(rows[2][-1], '0.5')
+
+
+class ProjectTimeViewTests(TimeTrackingViewTestCase):
+    """
+    Tests for the project time view RSE options and per RSE summary
+    """
+
+    def test_rse_options_and_summary(self):
+        """ Only RSEs with allocations or time sheet entries on the project are selectable and summarised """
+        other = RSE(user=User.objects.create_user(username='otheruser', password='12345', first_name='Other', last_name='User'))
+        other.save()
+        recorder = RSE(user=User.objects.create_user(username='recorder', password='12345', first_name='Another', last_name='User'))
+        recorder.save()
+        RSEAllocation(rse=self.rse, project=self.project, percentage=50, start=date(2018, 1, 1), end=date(2018, 3, 1)).save()
+        TimeSheetEntry(project=self.project, rse=self.rse, date=date(2018, 2, 1), all_day=True).save()
+        TimeSheetEntry(project=self.project, rse=recorder, date=date(2018, 2, 2), start_time=time(9, 0), end_time=time(12, 42)).save()
+
+        self.client.login(username='testuser', password='12345')
+        response = self.client.get(reverse_lazy('time_project', kwargs={'project_id': self.project.id}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([c[0] for c in response.context['form'].fields['rse'].choices], ['', recorder.id, self.rse.id])
+
+        scheduled = working_day_calendar().working_days(date(2018, 1, 1), date(2018, 3, 1)) * 0.5
+        self.assertEqual(response.context['rse_summary'], [(recorder, 0, 0.5, 0, 0.5), (self.rse, scheduled, 1, scheduled, 1)])
+
+        # RSEs which have not worked on the project can not be selected
+        response = self.client.get(reverse_lazy('time_project', kwargs={'project_id': self.project.id}), {'rse': other.id, 'granularity': 'week'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['rse_name'], "RSE Team (all RSEs)")
+        response = self.client.get(reverse_lazy('time_project', kwargs={'project_id': self.project.id}), {'rse': recorder.id, 'granularity': 'week'})
+        self.assertEqual(response.context['rse_name'], "Another User")
+
+    def test_zero_working_days(self):
+        """ Projects without any working days (e.g. over a weekend) report 0% progress """
+        weekend = DirectlyIncurredProject(percentage=50, creator=self.user, created=timezone.now(), proj_costing_id="12345",
+                                          name="weekend_project", client=self.project.client, start=date(2018, 2, 3), end=date(2018, 2, 4), status='F')
+        weekend.save()
+        self.assertEqual(weekend.working_days, 0)
+
+        self.client.login(username='testuser', password='12345')
+        response = self.client.get(reverse_lazy('time_project', kwargs={'project_id': weekend.id}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['total_percent'], 0)
+
+
+class TimesheetAjaxTests(TimeTrackingAsyncViewTestCase):
+    """
+    Tests for the async time sheet AJAX views
+    """
+
+    def test_login_required(self):
+        """ Anonymous users are redirected to login """
+        response = self.client.get(reverse_lazy('timesheet_events'), {'start': '2018-02-01', 'end': '2018-03-01'})
+        self.assertEqual(response.status_code, 302)
+
+    def test_add_and_events(self):
+        """ Entries added through the AJAX view are returned as calendar events for the RSE """
+        self.client.login(username='testuser', password='12345')
+        response = self.client.post(reverse_lazy('timesheet_add'), {
+            'project': self.project.id, 'rse': self.rse.id, 'date': '2018-02-01',
+            'all_day': 'false', 'start_time': '09:00', 'end_time': '12:00'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(TimeSheetEntry.objects.count(), 1)
+        # the entry is encoded once (not as a JSON string)
+        self.assertEqual(response.json(), {'id': TimeSheetEntry.objects.get().id, 'project': self.project.id, 'rse': self.rse.id,
+                                           'date': '2018-02-01', 'all_day': False, 'start_time': '09:00:00', 'end_time': '12:00:00'})
+
+        # all day entries have no times
+        response = self.client.post(reverse_lazy('timesheet_add'), {
+            'project': self.project.id, 'rse': self.rse.id, 'date': '2018-02-02', 'all_day': 'true'})
+        self.assertEqual(response.json()['start_time'], None)
+
+        response = self.client.get(reverse_lazy('timesheet_events'), {'start': '2018-02-01', 'end': '2018-03-01'})
+        self.assertEqual(response.status_code, 200)
+        events = response.json()
+        self.assertEqual(len(events), 2)
+        self.assertEqual(events[0]['title'], 'test_project')
+        self.assertEqual(events[0]['start'], '2018-02-01T09:00:00')
+        self.assertEqual(events[0]['end'], '2018-02-01T12:00:00')
+        self.assertEqual((events[1]['start'], events[1]['allDay']), ('2018-02-02', True))
+        self.assertEqual(events[0]['backgroundColor'], events[1]['backgroundColor'])
+
+    def test_add_invalid(self):
+        """ Entries outside of the project are rejected with a (non server) error """
+        self.client.login(username='testuser', password='12345')
+        response = self.client.post(reverse_lazy('timesheet_add'), {
+            'project': self.project.id, 'rse': self.rse.id, 'date': '2020-02-01', 'all_day': 'true'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Error', response.json())
+        self.assertEqual(TimeSheetEntry.objects.count(), 0)
+
+    def test_delete_permission(self):
+        """ RSEs can only delete their own entries """
+        tse = TimeSheetEntry(project=self.project, rse=self.rse, date=date(2018, 2, 1), all_day=True)
+        tse.save()
+        other_user = User.objects.create_user(username='otheruser', password='12345')
+        RSE(user=other_user).save()
+
+        self.client.login(username='otheruser', password='12345')
+        response = self.client.post(reverse_lazy('timesheet_delete'), {'id': tse.id})
+        self.assertEqual(response.status_code, 403)
+        self.assertTrue(TimeSheetEntry.objects.filter(id=tse.id).exists())
+
+        self.client.login(username='testuser', password='12345')
+        response = self.client.post(reverse_lazy('timesheet_delete'), {'id': tse.id})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(TimeSheetEntry.objects.filter(id=tse.id).exists())
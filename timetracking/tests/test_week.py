@@ -0,0 +1,89 @@
+from datetime import date, time
+from django.urls import reverse_lazy
+from django.utils import timezone
+
+from timetracking.models import *
+from timetracking.tests.test_views import TimeTrackingViewTestCase
+
+
+class TimesheetWeekTests(TimeTrackingViewTestCase):
+    """
+    Tests for the weekly time sheet grid
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.other_project = DirectlyIncurredProject(percentage=50, creator=self.user, created=timezone.now(), proj_costing_id="54321",
+                                                     name="other_project", client=self.project.client, start=date(2018, 1, 1), end=date(2018, 2, 7), status='F')
+        self.other_project.save()
+        for p in (self.project, self.other_project):
+            RSEAllocation(rse=self.rse, project=p, percentage=50, start=date(2018, 1, 1), end=date(2018, 3, 1)).save()
+        self.monday = TimeSheetEntry(project=self.project, rse=self.rse, date=date(2018, 2, 5), all_day=True)
+        self.monday.save()
+        TimeSheetEntry(project=self.project, rse=self.rse, date=date(2018, 2, 6), start_time=time(9, 0), end_time=time(12, 0)).save()
+        TimeSheetEntry(project=self.other_project, rse=self.rse, date=date(2018, 2, 7), start_time=time(9, 0), end_time=time(10, 0)).save()
+        self.url = f"{reverse_lazy('timesheet_week')}?week=2018-02-07"
+
+    def grid(self, **changes) -> dict:
+        """ POST data of the unchanged grid with changed cells """
+        self.client.login(username='testuser', password='12345')
+        form = self.client.get(self.url).context['form']
+        data = {name: '' if form[name].initial is None else form[name].initial for name in form.fields}
+        data.update(changes)
+        return data
+
+    def test_grid(self):
+        """ Hours are loaded for each day of the allocated projects (within the project dates) """
+        self.client.login(username='testuser', password='12345')
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        form = response.context['form']
+        self.assertEqual(form.week, date(2018, 2, 5))
+        self.assertEqual([p.name for p, _ in form.rows()], ['other_project', 'test_project'])
+        self.assertEqual([field is not None for field in form.rows()[0][1]], [True] * 3 + [False] * 4)
+        self.assertEqual(form[f'hours_{self.project.id}_20180205'].initial, 7.4)
+        self.assertEqual(form[f'hours_{self.project.id}_20180206'].initial, 3)
+        self.assertIsNone(form[f'hours_{self.project.id}_20180207'].initial)
+
+    def test_save(self):
+        """ Only changed cells replace their entries, hourly entries are placed after existing entries """
+        data = self.grid(**{f'hours_{self.project.id}_20180206': '2',
+                            f'hours_{self.project.id}_20180207': '4',
+                            f'hours_{self.project.id}_20180208': '7.4'})
+        response = self.client.post(self.url, data)
+        self.assertEqual(response.status_code, 302)
+
+        entries = [(tse.project_id, tse.date, tse.all_day, tse.start_time, tse.end_time) for tse in TimeSheetEntry.objects.order_by('date', 'start_time')]
+        self.assertEqual(entries, [(self.project.id, date(2018, 2, 5), True, None, None),
+                                   (self.project.id, date(2018, 2, 6), False, time(9, 0), time(11, 0)),
+                                   (self.other_project.id, date(2018, 2, 7), False, time(9, 0), time(10, 0)),
+                                   (self.project.id, date(2018, 2, 7), False, time(10, 0), time(14, 0)),
+                                   (self.project.id, date(2018, 2, 8), True, None, None)])
+        # unchanged entries are kept
+        self.assertTrue(TimeSheetEntry.objects.filter(id=self.monday.id).exists())
+        self.assertEqual(TimeSheetDayRollup.recorded_days(TimeSheetDayRollup.objects.all()), 7.4 / 7.4 + 2 / 7.4 + 5 / 7.4 + 1)
+
+        # clearing a cell deletes its entries
+        self.client.post(self.url, self.grid(**{f'hours_{self.project.id}_20180205': ''}))
+        self.assertFalse(TimeSheetEntry.objects.filter(id=self.monday.id).exists())
+
+    def test_invalid(self):
+        """ Invalid grids are not saved """
+        data = self.grid(**{f'hours_{self.project.id}_20180206': '2',
+                            f'hours_{self.other_project.id}_20180207': '14',
+                            f'hours_{self.project.id}_20180207': '8.5'})
+        response = self.client.post(self.url, data)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['form'].errors, {f'hours_{self.project.id}_20180207': ['There is not enough free time on 2018-02-07 for 8.5 hours']})
+        self.assertEqual(TimeSheetEntry.objects.count(), 3)
+        self.assertEqual(TimeSheetEntry.objects.get(date=date(2018, 2, 6)).end_time, time(12, 0))
+
+    def test_select_rse(self):
+        """ Admin users select an RSE (the empty option selects no RSE) """
+        self.client.login(username='admin', password='12345')
+        for params in ({}, {'rse_id': ''}):
+            response = self.client.get(reverse_lazy('timesheet_week'), params)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('form', response.context)
+        response = self.client.get(reverse_lazy('timesheet_week'), {'rse_id': self.rse.id, 'week': '2018-02-07'})
+        self.assertEqual(response.context['form'].rse, self.rse)
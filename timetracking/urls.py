@@ -13,6 +13,9 @@ urlpatterns = [
     # Login using built in auth view
     re_path(r'^time/timesheet$', views.timesheet, name='timesheet'),
 
+    # Weekly grid of hours per project (saved in a single request)
+    re_path(r'^time/timesheet/week$', views.timesheet_week, name='timesheet_week'),
+
     #############################
     ### AJAX Responsive URLS ####
     #############################
@@ -30,7 +33,7 @@ urlpatterns = [
     re_path(r'^time/timesheet/edit$', views.timesheet_edit, name='timesheet_edit'),
 
     # Responsive view to move or edit (resize) a time sheet entry
-    re_path(r'^time/timesheet/delete$', views.timesheet_delete.as_view(), name='timesheet_delete'),
+    re_path(r'^time/timesheet/delete$', views.timesheet_delete, name='timesheet_delete'),
 
     ########################
     ### Reporting Views ####
@@ -42,4 +45,7 @@ urlpatterns = [
     # List of active projects to view time project breakdown
     re_path(r'^time/projects$', views.time_projects, name='time_projects'),
 
+    # Streamed CSV export of time sheet entries (filtered by date range and project status)
+    re_path(r'^time/export/timesheets$', views.timesheet_export, name='timesheet_export'),
+
 ]
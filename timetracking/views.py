@@ -1,80 +1,103 @@
 from datetime import datetime, timedelta
 from dateutil import parser
 from typing import Dict
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
 from django.utils import timezone
 from django.contrib.auth.decorators import login_required
+from django.contrib.auth.views import redirect_to_login
+from django.core.exceptions import PermissionDenied
+from django.db import close_old_connections
 from django.urls import reverse_lazy
-from django.db.models import Q
+from django.db.models import F, Q, Sum
 from django.http import HttpRequest, HttpResponse, HttpResponseRedirect, Http404, HttpResponseServerError
 from django.shortcuts import get_object_or_404, render
 from django.contrib.auth.decorators import user_passes_test
 from django.contrib.auth.mixins import UserPassesTestMixin
 from django.contrib import messages
-from django.http import JsonResponse
 from django.conf import settings
 from django.core.serializers import serialize
-from django.http import JsonResponse
-import json
-from django.forms.models import model_to_dict
 from django.conf import settings
 from django.views.generic.edit import DeleteView
 
+from RSEAdmin.routers import read_replica
 from timetracking.forms import *
 from rse.forms import *
+from rse.views.responses import json_response
+from rse.views.exports import EXPORT_CHUNK_SIZE, csv_streaming_response, filter_project_form_query
+from rse.working_days import working_day_calendar
+from timetracking.reporting import effort_series
 
 
 def timesheetentry_json(timesheetentry) -> dict:
-    """ Helper function to convert a TimeSheetEntry object into a json dict with nice date and time formatting """
+    """ Helper function to convert a TimeSheetEntry object into a json dict (dates and times are encoded by json_response) """
     data = {}
     data['id'] = timesheetentry.id
-    data['project'] = timesheetentry.project.id
-    data['rse'] = timesheetentry.rse.id
-    data['date'] = timesheetentry.date.strftime(r'%Y-%m-%d')
+    data['project'] = timesheetentry.project_id
+    data['rse'] = timesheetentry.rse_id
+    data['date'] = timesheetentry.date
     data['all_day'] = timesheetentry.all_day
-    data['start_time'] = timesheetentry.start_time.strftime(r'%H:%M:%S')
-    data['end_time'] = timesheetentry.start_time.strftime(r'%H:%M:%S')
+    data['start_time'] = timesheetentry.start_time
+    data['end_time'] = timesheetentry.end_time
 
     return data
 
-def json_error_response(message:str, raise_server_error: bool = True) -> JsonResponse:
+def json_error_response(message:str, raise_server_error: bool = True) -> HttpResponse:
     """ Helper function for generating a json response with an error code"""
-    response = JsonResponse({"Error": message})
-    if raise_server_error:
-        response.status_code = 400
-    return response
+    return json_response({"Error": message}, status=400 if raise_server_error else 200)
 
-def daterange(start_date, end_date, delta: str ='days'):
+# Thread pool used by the async views to run blocking database code. Each thread holds its own database connection.
+database_executor = ThreadPoolExecutor(max_workers=settings.ASYNC_DATABASE_THREADS, thread_name_prefix='timetracking-db')
+
+
+def database_sync_to_async(func):
     """
-    Generator function for iterating between two dates
-    Delta can break the time period down by days weeks or months
+    Wraps a function which accesses the database so that it can be awaited from an async view.
+    The function is run in the database thread pool (rather than the single thread used by Django for thread sensitive
+    code) so that many requests can wait on the database concurrently. Old or broken connections of the pool thread are
+    closed before and after the call (as is done at the start and end of each request for sync views).
     """
+    def run_with_connection(*args, **kwargs):
+        close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(database_executor, functools.partial(context.run, run_with_connection, *args, **kwargs))
+    return wrapper
 
-    if delta == 'day':
-        days = int ((end_date - start_date).days)
-        for n in range(days):
-            yield (start_date + timedelta(n), start_date + timedelta(n+1), 1)
-    if delta == 'week':
-        weeks = int ((end_date - start_date).days/7)
-        for n in range(weeks):
-            yield (start_date + timedelta(n*7), start_date + timedelta((n+1)*7), 7)
-    if delta == 'month':
-        # convert to months
-        ym_start= 12*start_date.year + start_date.month - 1 
-        ym_end= 12*end_date.year + end_date.month - 1
-        for ym in range( ym_start, ym_end ):
-            # start
-            y, m = divmod( ym, 12 )
-            s = date(y, m+1, 1)
-            if s < start_date:
-                s = start_date
-            # end
-            y, m = divmod( ym +1, 12 )
-            e = date(y, m+1, 1)
-            if e > end_date:
-                e = end_date
-            yield (s, e, (e-s).days)
+
+def async_login_required(view):
+    """
+    Equivalent of the login_required decorator for async views.
+    The user is lazily loaded from the session so must be resolved outside of the event loop.
+    """
+    @functools.wraps(view)
+    async def wrapped_view(request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        is_authenticated = await database_sync_to_async(lambda: request.user.is_authenticated)()
+        if not is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        return await view(request, *args, **kwargs)
+    return wrapped_view
 
 
+def request_rse_id(request: HttpRequest, default_rse_id):
+    """
+    Helper function to get the RSE id for a time sheet request.
+    Admin users may provide any RSE id in the GET request whereas RSE users can only access their own time sheet.
+    """
+    if request.user.is_superuser:
+        return request.GET.get('rse_id', default_rse_id)
+    else:
+        rse = get_object_or_404(RSE, user=request.user)
+        return rse.id
 
 
 ############################
@@ -100,12 +123,90 @@ def timesheet(request: HttpRequest) -> HttpResponse:
     return render(request, 'timesheet.html', view_dict)
 
 
+@login_required
+def timesheet_week(request: HttpRequest) -> HttpResponse:
+    """
+    Renders (and saves) a grid of the hours recorded by an RSE on each project for a week starting on Monday.
+    Admin users may select any RSE whereas RSE users can only edit their own time sheet. Only the changed cells of the
+    grid are saved (in a single transaction).
+    """
+    view_dict = {}  # type: Dict[str, object]
+
+    # week containing the requested date (defaults to this week)
+    try:
+        day = datetime.strptime(request.GET.get('week', ''), r'%Y-%m-%d').date()
+    except ValueError:
+        day = timezone.now().date()
+    week = day - timedelta(days=day.weekday())
+    all_projects = request.GET.get('filter') == 'A'
+    view_dict['week'] = week
+    view_dict['previous_week'] = week - timedelta(days=7)
+    view_dict['next_week'] = week + timedelta(days=7)
+    view_dict['filter'] = 'A' if all_projects else 'R'
+
+    if request.user.is_superuser:
+        view_dict['rses'] = RSE.objects.select_related('user')
+    rse_id = request_rse_id(request, None) or None # the empty option of the RSE picker selects no RSE
+    if rse_id is None:
+        return render(request, 'timesheet_week.html', view_dict)
+    try:
+        rse = RSE.objects.select_related('user').get(id=rse_id)
+    except (RSE.DoesNotExist, ValueError):
+        raise Http404
+    view_dict['rse'] = rse
+
+    if request.method == 'POST':
+        form = TimesheetWeekForm(request.POST, rse=rse, week=week, all_projects=all_projects)
+        if form.is_valid():
+            deleted, created = form.save()
+            messages.add_message(request, messages.SUCCESS, f'Time sheet for week starting {week} saved ({deleted} entries replaced, {created} entries created).')
+            return HttpResponseRedirect(request.get_full_path())
+    else:
+        form = TimesheetWeekForm(rse=rse, week=week, all_projects=all_projects)
+    view_dict['form'] = form
+
+    return render(request, 'timesheet_week.html', view_dict)
+
+
 #############################
 ### AJAX Responsive URLS ####
 #############################
 
-@login_required
-def timesheet_events(request: HttpRequest) -> HttpResponse:
+# The AJAX views are async so that the bursts of concurrent requests made by the time sheet calendar do not each
+# occupy a worker while waiting on the database. Database access is performed through database_sync_to_async.
+
+
+def timesheet_events_data(request: HttpRequest, start: datetime, end: datetime) -> list:
+    """ Returns a list of FullCalendar event dicts for the time sheet entries of the requested RSE between start and end """
+    rse_id = request_rse_id(request, -1)
+
+    # query database (colours are calculated once per project)
+    tses = TimeSheetEntry.objects.filter(rse__id=rse_id, date__gte=start, date__lte=end).values_list(
+        'id', 'project_id', 'rse_id', 'date', 'all_day', 'start_time', 'end_time', 'project__name', 'project__start', 'project__end')
+    colours = {}
+    events = []
+    for tse_id, project_id, tse_rse_id, day, all_day, start_time, end_time, name, project_start, project_end in tses:
+        if project_id not in colours:
+            p_rgb = Project.colour(name, project_start, project_end)
+            colours[project_id] = f"rgb({p_rgb['r']}, {p_rgb['g']}, {p_rgb['b']})"
+        event = {'title': name, 'backgroundColor': colours[project_id]}
+        if all_day:
+            event['start'] = day
+            event['allDay'] = True
+        else:
+            event['start'] = datetime.combine(day, start_time)
+            event['end'] = datetime.combine(day, end_time)
+        # extended properties
+        event['extendedProps'] = {'db_id': tse_id, 'project_id': project_id, 'rse_id': tse_rse_id}
+
+        # append event to list
+        events.append(event)
+
+    return events
+
+
+@async_login_required
+async def timesheet_events(request: HttpRequest) -> HttpResponse:
     """
     Gets a JSON set of time sheet events for a given date time period.
     This view is used to populate th JS FulCalendar display.
@@ -126,45 +227,30 @@ def timesheet_events(request: HttpRequest) -> HttpResponse:
     except (ValueError ):
         return json_error_response("GET parameters 'start' and 'end' could not be parsed")
 
-    #select an RSE
-    if request.user.is_superuser:
-        rse_id = request.GET.get('rse_id', -1)
-    #else get the rse id of user
-    else:
-        rse = get_object_or_404(RSE, user=request.user)
-        rse_id = rse.id
+    events = await database_sync_to_async(timesheet_events_data)(request, start, end)
 
-    # query database
-    tses = TimeSheetEntry.objects.filter(rse__id=rse_id, date__gte=start, date__lte=end)
-    events = []
-    for tse in tses:
-        event = {}
-        event['title'] = tse.project.name
-        p_rgb = tse.project.colour_rbg
-        event['backgroundColor'] = f"rgb({p_rgb['r']}, {p_rgb['g']}, {p_rgb['b']})"
-        if tse.all_day:
-            event['start'] = tse.date.strftime(r'%Y-%m-%d')
-            event['allDay '] = True
-        else:
-            event_start = datetime.combine(tse.date, tse.start_time)
-            event_end = datetime.combine(tse.date, tse.end_time)
-            event['start'] = event_start.strftime(r'%Y-%m-%dT%H:%M:%S')
-            event['end'] = event_end.strftime(r'%Y-%m-%dT%H:%M:%S')
-        # extended properties
-        extendedProps = {}
-        extendedProps['db_id'] = tse.id
-        extendedProps['project_id'] = tse.project.id
-        extendedProps['rse_id'] = tse.rse.id
-        event['extendedProps'] = extendedProps
+    return json_response(events)
 
-        # append event to list
-        events.append(event)
 
+def timesheet_projects_data(request: HttpRequest, start: datetime, end: datetime, filter_str: str) -> list:
+    """ Returns a list of project dicts (with colour) for the requested RSE and filter between start and end """
+    rse_id = request_rse_id(request, '-1')
+
+    # Filter all active projects
+    if filter_str == 'A' and rse_id != '-1':
+        projects = Project.list_objects().filter(start__lt=end, end__gt=start, status=Project.FUNDED)
+    # Filter projects allocated to the RSE
+    else:
+        # get any allocations that fall within query period
+        project_ids = RSEAllocation.objects.filter(rse__id=rse_id, start__lt=end, end__gt=start).values_list('project_id').distinct()
+        projects = Project.list_objects().filter(id__in=project_ids, status=Project.FUNDED)
+
+    # merge rgb property with selected project fields
+    return [dict(p, **Project.colour(p['name'], p['start'], p['end'])) for p in projects.values('id', 'name', 'start', 'end')]
 
-    return JsonResponse(events, safe=False)
 
-@login_required
-def timesheet_projects(request: HttpRequest) -> HttpResponse:
+@async_login_required
+async def timesheet_projects(request: HttpRequest) -> HttpResponse:
     """
     Gets a JSON set of projects (funded only) for a given time period and RSE
     If the RSE id is -1 (value from template which represents whole team) then all projects are returned.
@@ -185,50 +271,57 @@ def timesheet_projects(request: HttpRequest) -> HttpResponse:
     except (ValueError ):
         return json_error_response("GET parameters 'start' and 'end' must be in format '%Y-%m-%dT%H:%M:%SZ'")
 
-    # get the RSE
-    if request.user.is_superuser:
-        rse_id = request.GET.get('rse_id', '-1')
-    #else get the rse id of user
-    else:
-        rse = get_object_or_404(RSE, user=request.user)
-        rse_id = rse.id
+    output = await database_sync_to_async(timesheet_projects_data)(request, start, end, filter_str)
 
-    # Filter all active projects
-    if filter_str == 'A' and rse_id != '-1':
-        projects =  Project.objects.filter(start__lt=end, end__gt=start, status=Project.FUNDED)
-    # Filter projects allocated to the RSE
-    else:
-        # get any allocations that fall within query period
-        project_ids = RSEAllocation.objects.filter(rse__id=rse_id, start__lt=end, end__gt=start).values_list('project_id').distinct()
-        projects = Project.objects.filter(id__in=project_ids, status=Project.FUNDED)
+    return json_response(output)
 
-    # merge rgb property with selected project fields
-    output = [dict(model_to_dict(p, fields=['id', 'name', 'start', 'end']), **p.colour_rbg) for p in projects]
 
-    return JsonResponse(list(output), safe=False)
+def timesheet_add_entry(request: HttpRequest) -> HttpResponse:
+    """ Validates and saves a new time sheet entry from the POST data returning a JSON response """
+    form = TimesheetForm(request.POST)
+    if form.is_valid():
+        entry = form.save()
+        return json_response(timesheetentry_json(entry))
+    else:
+        # construct an error string based off validation field values
+        # requires double join as each field may have multiple error strings
+        error_str = ". ".join(". ".join(error) for error in form.errors.values())
+        return json_error_response(error_str, raise_server_error=False) # not a server side error
 
-@login_required
-def timesheet_add(request: HttpRequest) -> HttpResponse:
+
+@async_login_required
+async def timesheet_add(request: HttpRequest) -> HttpResponse:
     """
     Adds a timesheet entry (e.g. as a result of external drag drop in JS FulCalendar library)
     Returns a JSON response of object and raises an error code if the edit fails.
     """
     if request.method == 'POST':
-        form = TimesheetForm(request.POST)
-        if form.is_valid():
-            entry = form.save()
-            return JsonResponse(json.dumps(timesheetentry_json(entry)), safe=False)
-        else:
-            # construct an error string based off validation field values
-            # requires double join as each field may have multiple error strings
-            error_str = ". ".join(". ".join(error) for error in form.errors.values())
-            return json_error_response(error_str, raise_server_error=False) # not a server side error
+        return await database_sync_to_async(timesheet_add_entry)(request)
     
     return json_error_response("Unable to create new Timesheet Entry")
 
 
-@login_required
-def timesheet_edit(request: HttpRequest) -> HttpResponse:
+def timesheet_edit_entry(request: HttpRequest) -> HttpResponse:
+    """ Validates and saves changes to an existing time sheet entry from the POST data returning a JSON response """
+    id = request.POST.get('id')
+    try:
+        event = TimeSheetEntry.objects.get(id=id)
+    except (TimeSheetEntry.DoesNotExist, ValueError):
+        return json_error_response(f"Timesheet Entry id={id} does not exist")
+
+    form = TimesheetForm(request.POST, instance=event)
+    if form.is_valid():
+        entry = form.save()
+        return json_response(timesheetentry_json(entry))
+    else:
+        # construct an error string based off validation field values
+        # requires double join as each field may have multiple error strings
+        error_str = ". ".join(". ".join(error) for error in form.errors.values())
+        return json_error_response("Timesheet entry could not be edited. " + error_str, raise_server_error=False) # not a server side error
+
+
+@async_login_required
+async def timesheet_edit(request: HttpRequest) -> HttpResponse:
     """
     Edit a timesheet entry (e.g. as a result of drag drop or resize in JS FulCalendar library)
     Returns a JSON response and raises an error code if the edit fails.
@@ -239,59 +332,35 @@ def timesheet_edit(request: HttpRequest) -> HttpResponse:
         # get instance
         if 'id' not in request.POST:
             return json_error_response("Timesheet Entry id not provided in POST")
-        id = request.POST.get('id')
-        try:
-            event = TimeSheetEntry.objects.get(id=id)
-        except DoesNotExist:
-            return json_error_response(f"Timesheet Entry id={id} does not exist")
-
-        form = TimesheetForm(request.POST, instance=event)
-        if form.is_valid():
-            entry = form.save()
-            return JsonResponse(json.dumps(timesheetentry_json(entry)), safe=False)
-        else:
-            # construct an error string based off validation field values
-            # requires double join as each field may have multiple error strings
-            error_str = ". ".join(". ".join(error) for error in form.errors.values())
-            return json_error_response("Timesheet entry could not be edited. " + error_str, raise_server_error=False) # not a server side error
+        return await database_sync_to_async(timesheet_edit_entry)(request)
     
     return json_error_response("Unable to edit Timesheet Entry")
 
 
-class timesheet_delete(UserPassesTestMixin, DeleteView):
+def timesheet_delete_entry(request: HttpRequest):
     """
-    DeletView class for deleteing TimeSheetEntry object.
-    Overriding the test_func prevents users from deleteing entries which do not belong to them.
+    Deletes the time sheet entry with the id in the POST data.
+    Only super users or RSEs deleting their own time sheet entries are permitted.
     """
-    model = TimeSheetEntry
-    success_message = "Timesheet entry was successfully deleted."
-    
-    def get(self, request, *args, **kwargs):
-        """ disable this view when arriving by get (i.e. only allow post) """
+    tse = get_object_or_404(TimeSheetEntry.objects.select_related('rse'), id=request.POST.get('id'))
+    if not request.user.is_superuser and tse.rse.user_id != request.user.id:
+        raise PermissionDenied
+    tse.delete()
+
+
+@async_login_required
+async def timesheet_delete(request: HttpRequest) -> HttpResponse:
+    """
+    POST only view for deleting a TimeSheetEntry object.
+    Users can not delete entries which do not belong to them (unless they are a super user).
+    """
+    if request.method != 'POST':
+        # disable this view when arriving by get (i.e. only allow post)
         raise Http404("Page does not exist")
 
-    def test_func(self):
-        """ Only for super users or for RSEs to delete their own time sheet entries"""
-        if self.request.user.is_superuser:
-            return True
-        else:
-            # can only delete own time sheet entries
-            tse = self.get_object()
-            if tse.rse.user.id == self.request.user.id:
-                return True
-            else:
-                return False
-
-    def get_object(self, queryset=None):
-        id = self.request.POST['id']
-        return self.get_queryset().filter(id=id).get()
-      
-    def delete(self, request, *args, **kwargs):
-        # No success message as this wont be displayed until the next request (and page is AJAX based)
-        # messages.success(self.request, self.success_message)
-        # call super which will the the actual delete
-        self.get_object().delete()
-        return JsonResponse(json.dumps({'delete': 'ok'}), safe=False)
+    # No success message as this wont be displayed until the next request (and page is AJAX based)
+    await database_sync_to_async(timesheet_delete_entry)(request)
+    return json_response({'delete': 'ok'})
         
 
 ########################
@@ -299,10 +368,11 @@ class timesheet_delete(UserPassesTestMixin, DeleteView):
 ########################
 
 @login_required
+@read_replica
 def time_project(request: HttpRequest, project_id: int) -> HttpResponse:
     """
     This view presents the recorded (from time sheets), scheduled (from allocations) and project total effort committed.
-    Data is generated fro the ChartJS template into three sets of plots by iterating dat regions (in days, weeks, or months)
+    Data is generated fro the ChartJS template into three sets of plots from calendar buckets (in days, weeks, or months)
     """
     view_dict = {}
 
@@ -315,20 +385,17 @@ def time_project(request: HttpRequest, project_id: int) -> HttpResponse:
     view_dict['project'] = project
 
     # create the form used fro filtering by RSE or granularity of report
-    if len(request.GET):
-        form = ProjectTimeViewOptionsForm(request.GET, project=project)
-        if form.is_valid():
-            granularity = form.cleaned_data['granularity'] 
-            # load data depending on RSE selection
-            if form.cleaned_data['rse'] == "":
-                allocations = RSEAllocation.objects.filter(project=project)
-                tses = TimeSheetEntry.objects.filter(project=project)
-                view_dict['rse_name'] = f"RSE Team (all RSEs)"
-            else:
-                rse = get_object_or_404(RSE, id=form.cleaned_data['rse'])
-                allocations = RSEAllocation.objects.filter(rse=rse, project=project)
-                tses = TimeSheetEntry.objects.filter(rse=rse, project=project)
-                view_dict['rse_name'] = f"{rse.user.first_name} {rse.user.last_name}"
+    form = ProjectTimeViewOptionsForm(request.GET, project=project) if len(request.GET) else None
+    if form is not None and form.is_valid():
+        granularity = form.cleaned_data['granularity'] 
+        # load data depending on RSE selection
+        if form.cleaned_data['rse'] == "":
+            rollups = TimeSheetDayRollup.objects.filter(project=project)
+            view_dict['rse_name'] = f"RSE Team (all RSEs)"
+        else:
+            rse = next(r for r in form.rses if str(r.id) == form.cleaned_data['rse'])
+            rollups = TimeSheetDayRollup.objects.filter(rse=rse, project=project)
+            view_dict['rse_name'] = f"{rse.user.first_name} {rse.user.last_name}"
     else:
         # default granularity for unbound form (i.e. first load without form submission)
         d = project.duration
@@ -340,8 +407,7 @@ def time_project(request: HttpRequest, project_id: int) -> HttpResponse:
             granularity = 'month'
         # create unbound form (this is the only way to use initial value for a choice field) and load data
         form = ProjectTimeViewOptionsForm(project=project, initial={'granularity': granularity})
-        allocations = RSEAllocation.objects.filter(project=project)
-        tses = TimeSheetEntry.objects.filter(project=project)
+        rollups = TimeSheetDayRollup.objects.filter(project=project)
         view_dict['rse_name'] = f"RSE Team (all RSEs)"
 
     view_dict['form'] = form
@@ -350,7 +416,9 @@ def time_project(request: HttpRequest, project_id: int) -> HttpResponse:
     # project expected days
     project_days = []
     project_days_sum = 0
-    working_day = project.working_days / (project.end - project.start).days  # average fractional day for project (varies for service projects)
+    # project working days are spread over the working days (see rse.working_days) of the project
+    calendar = working_day_calendar()
+    project_calendar_days = calendar.working_days(project.start, project.end)
     # project allocated days
     allocated_days = []
     allocated_days_sum = 0
@@ -363,22 +431,19 @@ def time_project(request: HttpRequest, project_id: int) -> HttpResponse:
     allocated_days.append([project.start, 0])
     timesheet_days.append([project.start, 0])
 
-    # iterate through days on project to build datasets for graphing
-    for start_date, end_date, duration in daterange(project.start, project.end, delta=granularity):
+    # iterate through the calendar buckets (days, weeks or months) of the project to build cumulative datasets for graphing
+    for start_date, end_date, allocated, recorded in effort_series(project.start, project.end, granularity, rse=rse, project=project):
         # project expected days
-        project_days_sum += working_day*duration
+        if project_calendar_days:
+            project_days_sum += project.working_days * calendar.working_days(start_date, end_date) / project_calendar_days
         project_days.append([end_date, project_days_sum])
-        
-        # project allocated days by allocations which are active on current
-        active = allocations.filter(start__lte=end_date, end__gt=start_date)
-        for a in active:
-            # allocated day need to be converted into equivalent working days
-            allocated_days_sum += a.working_days(start_date, end_date)
+
+        # project allocated days (as equivalent working days)
+        allocated_days_sum += allocated
         allocated_days.append([end_date, allocated_days_sum])
 
         # timesheet entries
-        tses_for_day = tses.filter(date__gte=start_date, date__lt=end_date)
-        timesheet_days_sum += TimeSheetEntry.working_days(tses=tses_for_day)
+        timesheet_days_sum += recorded
         timesheet_days.append([end_date, timesheet_days_sum])
 
     # add datasets to dict
@@ -388,20 +453,27 @@ def time_project(request: HttpRequest, project_id: int) -> HttpResponse:
 
     # Summary data
     view_dict['today_expected'] = project.scheduled_working_days_to_today(rse=rse)
-    view_dict['today_delivered'] = TimeSheetEntry.working_days(tses=tses.filter(date__gte=project.start, date__lte=timezone.now().date()))
+    view_dict['today_delivered'] = TimeSheetDayRollup.recorded_days(rollups.filter(date__gte=project.start, date__lte=timezone.now().date()))
     view_dict['today_remaining'] = view_dict['today_expected'] - view_dict['today_delivered']
     try:
         view_dict['today_percent'] = view_dict['today_delivered']*100.0 / view_dict['today_expected']
     except ZeroDivisionError:
         view_dict['today_percent'] = 0
     view_dict['total_expected'] = project.working_days
-    view_dict['total_delivered'] =  TimeSheetEntry.working_days(tses)
+    view_dict['total_delivered'] =  TimeSheetDayRollup.recorded_days(rollups)
     view_dict['total_remaining'] = view_dict['total_expected'] - view_dict['total_delivered']
-    view_dict['total_percent'] = view_dict['total_delivered']*100.0 / view_dict['total_expected'] # no need to catch div by 0 as total_expected can not be 0
+    try:
+        view_dict['total_percent'] = view_dict['total_delivered']*100.0 / view_dict['total_expected']
+    except ZeroDivisionError: # e.g. a project which falls on a weekend or within a closure
+        view_dict['total_percent'] = 0
+
+    # Per RSE summary (of the RSEs which can be selected)
+    view_dict['rse_summary'] = TimeSheetEntry.project_rse_summary(project, form.rses)
 
     return render(request, 'time_project.html', view_dict)
 
 @login_required
+@read_replica
 def time_projects(request: HttpRequest) -> HttpResponse:
     """
     View for all funded projects to provide a link for the full breakdown with graphing. 
@@ -417,12 +489,16 @@ def time_projects(request: HttpRequest) -> HttpResponse:
        
     # funded projects only
     now = timezone.now().date()
-    projects = Project.objects.filter(status=Project.FUNDED)
+    projects = Project.list_objects().filter(status=Project.FUNDED)
+
+    # recorded days to today of each project (from the day rollups) in a single query
+    recorded = dict(TimeSheetDayRollup.objects.filter(project__in=projects, date__gte=F('project__start'), date__lte=now)
+                    .values('project').order_by('project').annotate(days=Sum('working_days')).values_list('project', 'days'))
 
     #append recorded and scheduled days
     for p in projects:
         p.scheduled = p.scheduled_working_days_to_today()
-        p.recorded = TimeSheetEntry.working_days(tses=TimeSheetEntry.objects.filter(project=p, date__gte=p.start, date__lte=timezone.now().date()))
+        p.recorded = recorded.get(p.id, 0)
         try:
             p.progress = p.recorded/p.scheduled*100
         except ZeroDivisionError:
@@ -431,3 +507,42 @@ def time_projects(request: HttpRequest) -> HttpResponse:
     view_dict['projects'] = projects
     
     return render(request, 'time_projects.html', view_dict)
+
+
+@user_passes_test(lambda u: u.is_superuser)
+@read_replica
+def timesheet_export(request: HttpRequest) -> HttpResponse:
+    """
+    Streams a CSV export of time sheet entries filtered by a FilterProjectForm date range and (project) status.
+    Uses a values_list projection and a chunked iterator so that memory use is independent of the number of entries.
+    """
+    q = filter_project_form_query(request, start_field='date', end_field='date')
+
+    entries = TimeSheetEntry.objects.filter(q).order_by('date', 'id').values_list(
+        'id',
+        'date',
+        'rse__user__username',
+        'rse__user__first_name',
+        'rse__user__last_name',
+        'project_id',
+        'project__proj_costing_id',
+        'project__name',
+        'all_day',
+        'start_time',
+        'end_time',
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+    def rows():
+        """ Appends the working days (as used in TimeSheetEntry.working_days) to each entry """
+        for entry in entries:
+            all_day, start_time, end_time = entry[-3:]
+            if all_day:
+                days = 1
+            else:
+                days = (datetime.combine(date.min, end_time) - datetime.combine(date.min, start_time)).seconds / (60*60*settings.WORKING_HOURS_PER_DAY)
+            yield entry + (round(days, 4),)
+
+    header = ['Entry ID', 'Date', 'Username', 'First Name', 'Last Name', 'Project ID', 'Project Costing ID',
+              'Project Name', 'All Day', 'Start Time', 'End Time', 'Working Days']
+
+    return csv_streaming_response('timesheets.csv', header, rows())